@@ -1,10 +1,13 @@
 from django.contrib import admin
 from .models import TypingTest, TypingTestPhase, BehavioralProfile, TestProgress
+from .changelist import LargeTableAdminMixin, UserAutocompleteFilter
+from .summary import refresh_candidate_summary
 
 @admin.register(TypingTest)
-class TypingTestAdmin(admin.ModelAdmin):
+class TypingTestAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('user', 'created_at', 'wpm_average', 'accuracy_average')
-    list_filter = ('created_at', 'user')
+    list_filter = ('created_at', ('user', UserAutocompleteFilter))
+    list_select_related = ('user',)
     search_fields = ('user__username', 'user__email')
     readonly_fields = ('user', 'created_at', 'wpm_average', 'accuracy_average')
     
@@ -15,11 +18,17 @@ class TypingTestAdmin(admin.ModelAdmin):
         return request.user.is_superuser
 
 @admin.register(TypingTestPhase)
-class TypingTestPhaseAdmin(admin.ModelAdmin):
+class TypingTestPhaseAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('typing_test', 'phase_number', 'wpm', 'accuracy', 'time_seconds')
-    list_filter = ('phase_number', 'typing_test__created_at')
+    list_filter = ('phase_number', 'typing_test__created_at', ('typing_test__user', UserAutocompleteFilter))
+    # O __str__ do teste exibe o nome do usuário
+    list_select_related = ('typing_test__user',)
+    search_user_field = 'typing_test__user'
     search_fields = ('typing_test__user__username',)
-    readonly_fields = ('typing_test', 'phase_number', 'original_phrase', 'typed_text', 'time_seconds', 'wpm', 'accuracy', 'created_at')
+    readonly_fields = (
+        'typing_test', 'phase_number', 'phrase_id', 'phrase_version', 'original_phrase', 'typed_text',
+        'time_seconds', 'wpm', 'normalized_wpm', 'accuracy', 'created_at',
+    )
     
     def has_add_permission(self, request):
         return False
@@ -28,9 +37,10 @@ class TypingTestPhaseAdmin(admin.ModelAdmin):
         return request.user.is_superuser
 
 @admin.register(BehavioralProfile)
-class BehavioralProfileAdmin(admin.ModelAdmin):
+class BehavioralProfileAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('user', 'dominant_quadrant', 'created_at', 'quadrant_a_score', 'quadrant_b_score', 'quadrant_c_score', 'quadrant_d_score')
-    list_filter = ('dominant_quadrant', 'created_at', 'user')
+    list_filter = ('dominant_quadrant', 'created_at', ('user', UserAutocompleteFilter))
+    list_select_related = ('user',)
     search_fields = ('user__username', 'user__email')
     readonly_fields = ('user', 'created_at', 'quadrant_a_score', 'quadrant_b_score', 'quadrant_c_score', 'quadrant_d_score', 'dominant_quadrant', 'answers')
     
@@ -53,9 +63,10 @@ class BehavioralProfileAdmin(admin.ModelAdmin):
         return request.user.is_superuser
 
 @admin.register(TestProgress)
-class TestProgressAdmin(admin.ModelAdmin):
+class TestProgressAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('user', 'typing_test_completed', 'behavioral_test_completed', 'progress_percentage')
     list_filter = ('typing_test_completed', 'behavioral_test_completed')
+    list_select_related = ('user',)
     search_fields = ('user__username', 'user__email')
     readonly_fields = ('user', 'progress_percentage', 'typing_test_completed_at', 'behavioral_test_completed_at')
     
@@ -73,6 +84,10 @@ class TestProgressAdmin(admin.ModelAdmin):
             'fields': ('progress_percentage',)
         }),
     )
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        refresh_candidate_summary(obj.user_id)
     
     def has_add_permission(self, request):
         return False
@@ -0,0 +1,85 @@
+"""Codificação compacta das respostas do teste de perfil comportamental.
+
+As 25 respostas (escala 1–5) cabem em 3 bits cada. Em vez da lista JSON de
+objetos com id, quadrante e valor, ``BehavioralProfile.packed_answers`` grava:
+
+    byte 0     versão do banco de questões (core.scoring)
+    corpo      uma resposta de 3 bits por questão, na ordem de ``QUESTION_IDS``,
+               do bit mais significativo para o menos, completada com zeros
+               até o byte seguinte (25 questões: 10 bytes)
+
+O valor 0 marca uma questão sem resposta, que só aparece em perfis gravados
+antes da validação no servidor.
+
+O layout (quantas questões, quantos bits cada) é o da versão gravada no
+byte 0, consultado em ``LAYOUTS``: perfis de um banco anterior continuam
+legíveis depois que ``QUESTION_BANK_VERSION`` muda. Ao trocar o banco, a nova
+versão ganha uma entrada e as antigas ficam.
+
+Todas as linhas de uma versão têm o mesmo tamanho, então um lote decodifica
+de uma vez com NumPy, sem laço em Python:
+
+    bits = numpy.unpackbits(numpy.frombuffer(b''.join(rows), 'u1').reshape(len(rows), -1)[:, 1:], axis=1)
+    matrix = bits[:, :3 * QUESTIONS].reshape(len(rows), QUESTIONS, 3) @ [4, 2, 1]
+"""
+from collections import namedtuple
+
+from .scoring import QUESTION_BANK_VERSION, QUESTION_IDS, SCALE_MAX, InvalidAnswers
+
+Layout = namedtuple('Layout', ['questions', 'bits'])
+
+# versão do banco de questões -> layout das respostas codificadas
+LAYOUTS = {
+    1: Layout(questions=25, bits=3),
+}
+
+
+def packed_size(layout):
+    """Bytes de uma linha codificada com ``layout``, contando o byte da versão"""
+    return 1 + (layout.questions * layout.bits + 7) // 8
+
+
+QUESTIONS = len(QUESTION_IDS)
+PACKED_SIZE = packed_size(LAYOUTS[QUESTION_BANK_VERSION])
+
+
+def _layout(version):
+    try:
+        return LAYOUTS[version]
+    except KeyError:
+        raise InvalidAnswers(f"Versão do banco de questões desconhecida: {version!r}") from None
+
+
+def pack_answers(vector, version=QUESTION_BANK_VERSION):
+    """Codifica um vetor de respostas (um valor por questão, 0 = sem resposta)"""
+    layout = _layout(version)
+    if len(vector) != layout.questions:
+        raise InvalidAnswers(f"Esperado {layout.questions} respostas, recebidas: {len(vector)}")
+    number = 0
+    for value in vector:
+        if not 0 <= value <= SCALE_MAX:
+            raise InvalidAnswers(f"Resposta fora da escala: {value!r}")
+        number = number << layout.bits | value
+    size = packed_size(layout)
+    padding = (size - 1) * 8 - layout.questions * layout.bits
+    return bytes([version]) + (number << padding).to_bytes(size - 1, 'big')
+
+
+def packed_version(packed):
+    """Versão do banco de questões gravada no byte 0, ou ``None`` se vazio"""
+    packed = bytes(packed)
+    return packed[0] if packed else None
+
+
+def unpack_answers(packed):
+    """Vetor de respostas gravado por ``pack_answers``, no layout da versão gravada"""
+    packed = bytes(packed)
+    if not packed:
+        raise InvalidAnswers("Respostas codificadas vazias")
+    layout = _layout(packed[0])
+    size = packed_size(layout)
+    if len(packed) != size:
+        raise InvalidAnswers(f"Respostas codificadas inválidas ({len(packed)} bytes, versão {packed[0]})")
+    number = int.from_bytes(packed[1:], 'big') >> ((size - 1) * 8 - layout.questions * layout.bits)
+    mask = (1 << layout.bits) - 1
+    return [(number >> (layout.bits * i)) & mask for i in range(layout.questions - 1, -1, -1)]
@@ -0,0 +1,166 @@
+"""Arquivo frio das colunas volumosas de fases antigas.
+
+``original_phrase`` e ``typed_text`` das fases quase nunca são lidos depois
+que o processo seletivo termina. O comando ``archive_cold_data`` move esses
+valores para ``TypingTestPhaseArchive``, um frame comprimido por linha, e
+deixa as colunas originais nulas. (As respostas dos perfis, que já passaram
+por aqui, hoje ocupam 11 bytes em ``packed_answers``; ver ``core.answers``.)
+
+A leitura continua transparente: os campos arquivados usam
+``ArchivedAttribute``, que, ao encontrar a coluna nula, busca o frame da linha
+(uma consulta, ou nenhuma com ``select_related('archive')``) e o descomprime
+apenas nesse momento. Páginas que não exibem esses campos não pagam nada.
+
+Cada frame começa com dois bytes, o codec e a versão do dicionário, seguidos
+do JSON compacto ``{campo: valor}`` comprimido:
+
+* ``zlib``: deflate puro (sem cabeçalho nem checksum, que custariam mais que
+  as próprias frases), com um dicionário compartilhado formado pelas frases do
+  banco e pelo formato das respostas. Uma frase do banco vira uma única
+  referência de poucos bytes.
+* ``lzma``: LZMA2 em formato puro, sem dicionário; comprime melhor textos
+  longos e livres.
+
+Frames antigos precisam continuar legíveis: os dicionários são imutáveis, e
+mudar o conteúdo exige uma versão nova em ``DICTIONARIES``.
+"""
+import json
+import lzma
+import zlib
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+
+from .phrases import PHRASE_BANKS
+
+CODEC_ZLIB = 1
+CODEC_LZMA = 2
+CODECS = {'zlib': CODEC_ZLIB, 'lzma': CODEC_LZMA}
+
+LZMA_FILTERS = [{'id': lzma.FILTER_LZMA2, 'preset': 9 | lzma.PRESET_EXTREME}]
+
+# Um quadrante por questão, como no banco de questões da versão 1; copiado
+# aqui para que o dicionário não mude junto com core.scoring
+_ANSWERS_V1 = 'AAAAABBBBBCCCCCDDDDDABCDA'
+
+
+class CorruptFrame(ValueError):
+    pass
+
+
+def _dictionary_v1():
+    phrases = '\n'.join(PHRASE_BANKS[1][phrase_id] for phrase_id in sorted(PHRASE_BANKS[1]))
+    # O deflate alcança mais barato o fim do dicionário: o formato das
+    # respostas, repetido em todo perfil, fica por último
+    answers = json.dumps(
+        [{'questionId': qid, 'quadrant': quadrant, 'answer': 3} for qid, quadrant in enumerate(_ANSWERS_V1, 1)],
+        separators=(',', ':'),
+    )
+    return f'{phrases}\n{{"original_phrase":"","typed_text":""}}{answers}'.encode('utf-8')
+
+
+# versão -> dicionário do zlib; 0 é "sem dicionário"
+DICTIONARIES = {
+    0: b'',
+    1: _dictionary_v1(),
+}
+DICTIONARY_VERSION = 1
+
+
+def compress_frame(values, codec='zlib'):
+    """Frame comprimido com os ``values`` (``{campo: valor}`` serializável em JSON)"""
+    payload = json.dumps(values, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    if codec == 'lzma':
+        return bytes([CODEC_LZMA, 0]) + lzma.compress(payload, format=lzma.FORMAT_RAW, filters=LZMA_FILTERS)
+    if codec != 'zlib':
+        raise ValueError(f"Codec desconhecido: {codec}")
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -15, 9, zdict=DICTIONARIES[DICTIONARY_VERSION])
+    return bytes([CODEC_ZLIB, DICTIONARY_VERSION]) + compressor.compress(payload) + compressor.flush()
+
+
+def decompress_frame(frame):
+    """``{campo: valor}`` gravado em um frame de ``compress_frame``"""
+    frame = bytes(frame)
+    if len(frame) < 2:
+        raise CorruptFrame("Frame de arquivo truncado")
+    codec, version = frame[0], frame[1]
+    if codec not in CODECS.values() or version not in DICTIONARIES:
+        raise CorruptFrame(f"Frame com codec {codec} e dicionário {version} desconhecidos")
+    try:
+        if codec == CODEC_ZLIB:
+            decompressor = zlib.decompressobj(-15, zdict=DICTIONARIES[version])
+            payload = decompressor.decompress(frame[2:]) + decompressor.flush()
+        else:
+            payload = lzma.decompress(frame[2:], format=lzma.FORMAT_RAW, filters=LZMA_FILTERS)
+        return json.loads(payload)
+    except (zlib.error, lzma.LZMAError, ValueError) as error:
+        raise CorruptFrame(f"Frame de arquivo ilegível: {error}") from error
+
+
+def stored_size(field, value):
+    """Bytes que o valor ocupa na coluna original (texto ou JSON em UTF-8)"""
+    if value is None:
+        return 0
+    if isinstance(field, models.JSONField):
+        value = json.dumps(value, cls=field.encoder)
+    return len(str(value).encode('utf-8'))
+
+
+def archived_fields(model):
+    """Campos do ``model`` cujos valores vão para o arquivo frio"""
+    return [field for field in model._meta.concrete_fields if isinstance(field, ArchivedFieldMixin)]
+
+
+def archived_values(instance):
+    """Valores arquivados da instância, descomprimidos uma única vez"""
+    cache = instance.__dict__.get('_archived_values')
+    if cache is None:
+        try:
+            frame = instance.archive.frame
+        except ObjectDoesNotExist:
+            cache = {}
+        else:
+            cache = decompress_frame(frame)
+        instance.__dict__['_archived_values'] = cache
+    return cache
+
+
+class ArchivedAttribute(DeferredAttribute):
+    """Descritor que resolve a coluna nula pelo frame do arquivo.
+
+    O valor descomprimido não volta para ``instance.__dict__``: um ``save()``
+    da instância mantém a coluna nula e a linha continua arquivada. Atribuir
+    um valor novo o grava na coluna; um novo arquivamento substitui o frame.
+    """
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if value is None:
+            value = archived_values(instance).get(self.field.attname)
+        return value
+
+    def __set__(self, instance, value):
+        # Com __set__ o descritor tem precedência sobre o __dict__ da instância,
+        # onde o Django guarda a coluna (nula, se arquivada)
+        instance.__dict__[self.field.attname] = value
+
+
+class ArchivedFieldMixin:
+    """Campo que pode ir para o arquivo frio; precisa de ``null=True``, que
+    marca a linha arquivada (formulários continuam exigindo o valor)"""
+    descriptor_class = ArchivedAttribute
+
+    def pre_save(self, model_instance, add):
+        # A coluna como está, sem passar pelo descritor: o save() não desarquiva
+        return model_instance.__dict__.get(self.attname)
+
+
+class ArchivedTextField(ArchivedFieldMixin, models.TextField):
+    pass
+
+
+class ArchivedJSONField(ArchivedFieldMixin, models.JSONField):
+    pass
@@ -0,0 +1,213 @@
+"""Build dos arquivos estáticos: minificação, hash no nome e pré-compressão.
+
+O ``collectstatic`` com ``StaticBuildStorage`` grava em ``STATIC_ROOT`` o JS e
+o CSS minificados, com o hash do conteúdo no nome (``digitacao.3f2a9c.js``) e
+as variantes ``.gz`` e ``.br`` ao lado, que o WhiteNoise serve conforme o
+``Accept-Encoding``. Como o nome muda junto com o conteúdo, esses arquivos
+saem com ``Cache-Control: immutable`` e o navegador não os revalida.
+
+Os minificadores são conservadores: tiram comentários e espaços, mas mantêm
+as quebras de linha do JS (a inserção automática de ``;`` depende delas) e
+não reescrevem identificadores.
+"""
+import re
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+IDENTIFIER = re.compile(r'[\w$]')
+
+# Depois destas palavras, uma "/" abre uma expressão regular, não uma divisão
+REGEX_KEYWORDS = {
+    'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void',
+    'throw', 'case', 'do', 'else', 'yield', 'await',
+}
+
+
+def _skip_string(source, i):
+    """Índice logo após a string que começa em ``source[i]``"""
+    quote = source[i]
+    i += 1
+    while i < len(source) and source[i] != quote:
+        i += 2 if source[i] == '\\' else 1
+    return i + 1
+
+
+def _skip_template(source, i):
+    """Índice logo após o template literal (com ``${...}`` aninhados) em ``source[i]``"""
+    i += 1
+    while i < len(source) and source[i] != '`':
+        if source[i] == '\\':
+            i += 2
+        elif source.startswith('${', i):
+            i = _skip_braces(source, i + 2)
+        else:
+            i += 1
+    return i + 1
+
+
+def _skip_braces(source, i):
+    depth = 1
+    while i < len(source) and depth:
+        char = source[i]
+        if char in '\'"':
+            i = _skip_string(source, i)
+            continue
+        if char == '`':
+            i = _skip_template(source, i)
+            continue
+        depth += {'{': 1, '}': -1}.get(char, 0)
+        i += 1
+    return i
+
+
+def _skip_regex(source, i):
+    in_class = False
+    i += 1
+    while i < len(source):
+        char = source[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == '\n':
+            break
+        if char == '[':
+            in_class = True
+        elif char == ']':
+            in_class = False
+        elif char == '/' and not in_class:
+            i += 1
+            break
+        i += 1
+    while i < len(source) and IDENTIFIER.match(source[i]):
+        i += 1
+    return i
+
+
+def _starts_regex(tokens):
+    """Se uma "/" depois dos ``tokens`` já emitidos abre uma expressão regular"""
+    if not tokens:
+        return True
+    last = tokens[-1].rstrip()
+    if not last:
+        return True
+    if last[-1] in ')]':
+        return False
+    if IDENTIFIER.match(last[-1]):
+        word = re.search(r'[\w$]+$', last).group()
+        return word in REGEX_KEYWORDS
+    return True
+
+
+def _needs_space(before, after):
+    if IDENTIFIER.match(before) and IDENTIFIER.match(after):
+        return True
+    # "a + +b", "a - -b"
+    return before == after and before in '+-'
+
+
+def minify_js(source):
+    """Remove comentários, indentação e espaços supérfluos de um script"""
+    tokens = []  # trechos já minificados (strings, regex e código)
+    pending = None  # espaço pendente: ' ' ou '\n'
+    i = 0
+
+    def emit(text):
+        nonlocal pending
+        if pending and tokens:
+            before = tokens[-1][-1]
+            if pending == '\n' and before != '\n':
+                tokens.append('\n')
+            elif pending == ' ' and _needs_space(before, text[0]):
+                tokens.append(' ')
+        pending = None
+        tokens.append(text)
+
+    def space(kind):
+        nonlocal pending
+        if pending != '\n':
+            pending = kind
+
+    while i < len(source):
+        char = source[i]
+        if source.startswith('//', i):
+            end = source.find('\n', i)
+            i = len(source) if end == -1 else end
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            end = len(source) if end == -1 else end + 2
+            space('\n' if '\n' in source[i:end] else ' ')
+            i = end
+        elif char in '\'"':
+            end = _skip_string(source, i)
+            emit(source[i:end])
+            i = end
+        elif char == '`':
+            end = _skip_template(source, i)
+            emit(source[i:end])
+            i = end
+        elif char == '/' and _starts_regex(tokens):
+            end = _skip_regex(source, i)
+            emit(source[i:end])
+            i = end
+        elif char.isspace():
+            space('\n' if char == '\n' else ' ')
+            i += 1
+        else:
+            emit(char)
+            i += 1
+    return ''.join(tokens).strip() + '\n'
+
+
+CSS_TOKEN = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|(/\*.*?\*/)|(\s+)|([^"'/\s]+|/)''', re.S)
+
+
+def _minify_css_code(css):
+    css = re.sub(r' ?([{};,]) ?', r'\1', re.sub(r' +', ' ', css))
+    # Só o espaço depois dos ":"; antes deles ("a :hover") ele faz parte do seletor
+    return css.replace(': ', ':').replace(';}', '}')
+
+
+def minify_css(source):
+    """Remove comentários e espaços supérfluos de uma folha de estilos"""
+    parts, code = [], []
+    for string, comment, whitespace, other in CSS_TOKEN.findall(source):
+        if string:
+            # Strings entram intactas, entre os trechos de código já minificados
+            parts.extend([_minify_css_code(''.join(code)), string])
+            code = []
+        elif whitespace or comment:
+            code.append(' ')
+        else:
+            code.append(other)
+    parts.append(_minify_css_code(''.join(code)))
+    return ''.join(parts).strip() + '\n'
+
+
+MINIFIERS = {
+    '.js': minify_js,
+    '.css': minify_css,
+}
+
+
+class StaticBuildStorage(CompressedManifestStaticFilesStorage):
+    """Storage do ``collectstatic``: minifica JS e CSS ao copiá-los para
+    ``STATIC_ROOT``, antes do hash, e depois comprime as versões com hash.
+
+    Sem build (desenvolvimento e testes), as URLs apontam para os originais,
+    servidos pelos finders; em produção, ``check --deploy`` exige o manifesto.
+    """
+
+    def url(self, name, force=False):
+        if not self.hashed_files and not force:
+            return FileSystemStorage.url(self, name)
+        return super().url(name, force)
+
+    def _save(self, name, content):
+        minify = next((function for suffix, function in MINIFIERS.items() if name.endswith(suffix)), None)
+        if minify is not None and not name.endswith(('.min.js', '.min.css')):
+            # chunks() volta ao início: o post_process passa o arquivo já lido para o hash
+            source = b''.join(content.chunks()).decode('utf-8')
+            content = ContentFile(minify(source).encode('utf-8'))
+        return super()._save(name, content)
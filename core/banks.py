@@ -0,0 +1,40 @@
+"""Documento JSON com os bancos de frases e de questões servido aos testes.
+
+O documento só muda junto com as versões dos bancos, então é montado uma vez
+por processo. A ETag forte é o hash do conteúdo: com ``Cache-Control:
+no-cache``, o navegador revalida a cada carga do teste e recebe um 304 sem
+corpo enquanto a versão for a mesma.
+"""
+import hashlib
+import json
+from functools import cache
+
+from .phrases import FEATURES, PHRASE_BANK_VERSION, PHRASE_BANKS
+from .scoring import QUESTION_BANK_VERSION, QUESTION_IDS, QUESTION_QUADRANTS, QUESTION_TEXTS, SCALE_MAX, SCALE_MIN
+
+
+def bank_payload(phrase_version=PHRASE_BANK_VERSION):
+    return {
+        'frases': {
+            'versao': phrase_version,
+            'itens': [
+                {'id': phrase_id, 'texto': text, 'dificuldade': FEATURES[phrase_version, phrase_id].difficulty}
+                for phrase_id, text in sorted(PHRASE_BANKS[phrase_version].items())
+            ],
+        },
+        'questoes': {
+            'versao': QUESTION_BANK_VERSION,
+            'escala': [SCALE_MIN, SCALE_MAX],
+            'itens': [
+                {'id': qid, 'quadrante': QUESTION_QUADRANTS[qid], 'texto': QUESTION_TEXTS[qid]}
+                for qid in QUESTION_IDS
+            ],
+        },
+    }
+
+
+@cache
+def bank_document(phrase_version=PHRASE_BANK_VERSION):
+    """``(corpo JSON compacto, ETag)`` dos bancos na versão atual"""
+    body = json.dumps(bank_payload(phrase_version), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return body, hashlib.sha256(body).hexdigest()[:32]
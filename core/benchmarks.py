@@ -0,0 +1,154 @@
+"""Utilitários compartilhados pelos comandos de benchmark (``bench_*``).
+
+Os benchmarks rodam contra o banco configurado usando candidatos temporários,
+que são removidos ao final.
+"""
+import asyncio
+import contextlib
+import statistics
+import threading
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.utils import timezone
+
+from users.models import Users as User
+from .phrases import PHRASE_BANK_VERSION, PHRASE_BANKS, assigned_phrases, phrase_text
+from .sqlite import WRITE_PREFIXES
+
+# As três primeiras frases do banco, as antigas frases fixas do navegador
+SAMPLE_PHRASES = [PHRASE_BANKS[1][phrase_id] for phrase_id in (1, 2, 3)]
+
+
+@contextlib.contextmanager
+def temporary_candidates(count, prefix='bench'):
+    """Cria ``count`` candidatos descartáveis e os remove ao sair"""
+    tag = f'{prefix}-{uuid.uuid4().hex[:8]}-'
+    users = User.objects.bulk_create([
+        User(
+            username=f'{tag}{i}',
+            email=f'{tag}{i}@bench.invalid',
+            first_name='Bench',
+            last_name=str(i),
+            vaga='Benchmark',
+        )
+        for i in range(count)
+    ])
+    try:
+        yield users
+    finally:
+        User.objects.filter(username__startswith=tag).delete()
+
+
+def sample_typing_payload(user_id, version=PHRASE_BANK_VERSION, phrase_ids=None):
+    """Payload no formato enviado por ``static/js/digitacao.js``, com as frases
+    atribuídas ao candidato (ou ``phrase_ids``, lidos da página do teste)"""
+    payload = []
+    for number, phrase_id in enumerate(phrase_ids or assigned_phrases(user_id, version), start=1):
+        phrase = phrase_text(version, phrase_id)
+        payload.append({
+            'phase': number,
+            'phraseId': phrase_id,
+            'phraseVersion': version,
+            'originalPhrase': phrase,
+            'typedText': phrase,
+            'timeSeconds': '12.5',
+            'wpm': f'{len(phrase) / 5 / (12.5 / 60):.1f}',
+            'accuracy': '100.0',
+        })
+    return payload
+
+
+def sample_behavioral_payload():
+    """Payload no formato enviado por ``static/js/personalidade.js``"""
+    quadrants = 'AAAAABBBBBCCCCCDDDDDABCDA'
+    return {
+        'answers': [
+            {'questionId': i, 'quadrant': quadrant, 'answer': (i % 5) + 1}
+            for i, quadrant in enumerate(quadrants, start=1)
+        ],
+        'scores': {'A': 60, 'B': 60, 'C': 60, 'D': 60, 'dominant': 'A'},
+    }
+
+
+class StatementCounter:
+    """``execute_wrapper`` que conta comandos SQL e escritas por conexão"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.statements = 0
+        self.writes = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.statements += 1
+            if sql.lstrip().upper().startswith(WRITE_PREFIXES):
+                self.writes += 1
+        return execute(sql, params, many, context)
+
+
+def percentile(values, pct):
+    """Percentil por interpolação linear (``pct`` entre 0 e 100)"""
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[min(max(int(pct), 1), 99) - 1]
+
+
+def login_sessions(users):
+    """Cria uma sessão autenticada por candidato e retorna as chaves, na ordem.
+
+    As sessões são gravadas em um único ``bulk_create``; os servidores
+    testados as leem do banco como em um login normal.
+    """
+    store = SessionStore()
+    expire_date = timezone.now() + timedelta(seconds=settings.SESSION_COOKIE_AGE)
+    sessions = [
+        Session(
+            session_key=uuid.uuid4().hex,
+            session_data=store.encode({
+                SESSION_KEY: str(user.pk),
+                BACKEND_SESSION_KEY: settings.AUTHENTICATION_BACKENDS[0],
+                HASH_SESSION_KEY: user.get_session_auth_hash(),
+            }),
+            expire_date=expire_date,
+        )
+        for user in users
+    ]
+    Session.objects.bulk_create(sessions, batch_size=500)
+    return [session.session_key for session in sessions]
+
+
+async def http_request(host, port, method, path, cookies=None, headers=None, body=b''):
+    """Requisição HTTP/1.1 mínima (uma conexão por requisição).
+
+    Retorna ``(status, cabeçalhos, corpo)``, com os nomes dos cabeçalhos em
+    minúsculas. Redirecionamentos não são seguidos.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        lines = [f'{method} {path} HTTP/1.1', f'Host: {host}:{port}', 'Connection: close']
+        if cookies:
+            lines.append('Cookie: ' + '; '.join(f'{name}={value}' for name, value in cookies.items()))
+        for name, value in (headers or {}).items():
+            lines.append(f'{name}: {value}')
+        if body:
+            lines.append(f'Content-Length: {len(body)}')
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode() + body)
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    head, _, content = response.partition(b'\r\n\r\n')
+    status_line, *header_lines = head.decode('latin-1').split('\r\n')
+    status = int(status_line.split()[1]) if status_line else 0
+    response_headers = []
+    for line in header_lines:
+        name, _, value = line.partition(':')
+        response_headers.append((name.strip().lower(), value.strip()))
+    return status, response_headers, content
@@ -0,0 +1,187 @@
+"""Listagens do admin para tabelas grandes.
+
+Com centenas de milhares de linhas, o changelist padrão do Django fica
+inviável: o filtro por usuário lista todos os usuários na barra lateral, cada
+página faz ``COUNT(*)`` exatos e a paginação por OFFSET percorre todas as
+linhas anteriores. ``LargeTableAdminMixin`` troca essas peças por um filtro
+com autocomplete, contagens aproximadas (ou limitadas) e navegação por cursor
+(``core.pagination``) na ordenação padrão.
+"""
+from django import forms
+from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ORDER_VAR, PAGE_VAR, ChangeList
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max
+from django.utils.functional import cached_property
+
+from .pagination import InvalidCursor, paginate_keyset
+from .search import matching_user_ids
+
+AFTER_VAR = 'apos'
+BEFORE_VAR = 'antes'
+
+# Acima disso a contagem de um changelist filtrado deixa de ser exata
+COUNT_LIMIT = 10000
+
+
+def estimated_row_count(model, using='default'):
+    """Estimativa barata do total de linhas da tabela.
+
+    No SQLite usa as estatísticas do ``ANALYZE`` quando existem; senão o maior
+    ``id``, lido direto do índice da chave primária.
+    """
+    connection = connections[using]
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+            if cursor.fetchone():
+                cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [model._meta.db_table])
+                row = cursor.fetchone()
+                if row:
+                    return int(row[0].split()[0])
+    return model._default_manager.using(using).aggregate(total=Max('pk'))['total'] or 0
+
+
+class ApproximateCountPaginator(Paginator):
+    """Paginador que nunca conta a tabela inteira.
+
+    Sem filtros, o total é ``estimated_row_count``; com filtros, a contagem
+    para em ``COUNT_LIMIT`` linhas. ``approximate`` indica que o número
+    exibido não é exato.
+    """
+    approximate = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            self.approximate = True
+            return estimated_row_count(queryset.model, queryset.db)
+        count = queryset[:COUNT_LIMIT].count()
+        self.approximate = count >= COUNT_LIMIT
+        return count
+
+
+class KeysetChangeList(ChangeList):
+    """Changelist paginado por cursor quando a ordenação é a padrão (``-pk``).
+
+    Ordenando por uma coluna, volta à paginação por página, com a contagem
+    limitada do ``ApproximateCountPaginator``.
+    """
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        for name in (AFTER_VAR, BEFORE_VAR):
+            lookup_params.pop(name, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        # Filtros e ordenação novos recomeçam da primeira página
+        new_params = new_params or {}
+        cursors = [name for name in (AFTER_VAR, BEFORE_VAR) if name not in new_params]
+        return super().get_query_string(new_params, [*(remove or []), *cursors])
+
+    @property
+    def keyset(self):
+        return ORDER_VAR not in self.params and not self.show_all and not self.list_editable
+
+    def get_results(self, request):
+        if not self.keyset:
+            return super().get_results(request)
+
+        paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
+        try:
+            page = paginate_keyset(
+                self.queryset, 'id',
+                after=request.GET.get(AFTER_VAR),
+                before=request.GET.get(BEFORE_VAR),
+                page_size=self.list_per_page,
+            )
+        except InvalidCursor as e:
+            raise IncorrectLookupParameters(e)
+
+        self.result_count = paginator.count
+        self.show_full_result_count = False
+        self.full_result_count = None
+        self.show_admin_actions = True
+        self.result_list = page.items
+        self.can_show_all = False
+        self.multi_page = page.has_next or page.has_previous
+        self.paginator = paginator
+        self.keyset_page = page
+
+    def next_page_url(self):
+        return self.get_query_string({AFTER_VAR: self.keyset_page.next_cursor}, remove=[PAGE_VAR])
+
+    def previous_page_url(self):
+        return self.get_query_string({BEFORE_VAR: self.keyset_page.previous_cursor}, remove=[PAGE_VAR])
+
+
+class UserAutocompleteFilter(admin.FieldListFilter):
+    """Filtro por usuário com a busca do autocomplete do admin, sem listar todos.
+
+    Use como ``('user', UserAutocompleteFilter)``; o admin do usuário precisa
+    de ``search_fields``.
+    """
+    template = 'admin/core/autocomplete_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = f'{field_path}__{field.target_field.name}__exact'
+        values = params.get(self.lookup_kwarg) or []
+        self.lookup_val = values[-1] if values else None
+        super().__init__(field, request, params, model, model_admin, field_path)
+        # O campo de formulário liga o widget às opções (só o usuário escolhido é consultado)
+        self.form_field = forms.ModelChoiceField(
+            queryset=field.related_model._default_manager.all(),
+            required=False,
+            widget=AutocompleteSelect(field, model_admin.admin_site, attrs={
+                'class': 'admin-autocomplete-filter',
+                'data-filter-param': self.lookup_kwarg,
+            }),
+        )
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def get_facet_counts(self, pk_attname, filtered_qs):
+        return {}
+
+    def widget_html(self):
+        return self.form_field.widget.render(self.lookup_kwarg, self.lookup_val)
+
+    def choices(self, changelist):
+        yield {
+            'selected': self.lookup_val is None,
+            'query_string': changelist.get_query_string(remove=[self.lookup_kwarg]),
+            'display': 'Todos',
+        }
+
+
+class LargeTableAdminMixin:
+    """Configuração de changelist para tabelas grandes (ver o docstring do módulo)"""
+    ordering = ('-pk',)
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+    # Caminho até o usuário; a busca usa o índice FTS5 em vez de LIKE '%termo%'
+    search_user_field = 'user'
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        user_ids = matching_user_ids(search_term)
+        if user_ids is None:
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(**{f'{self.search_user_field}__in': user_ids}), False
+
+    @property
+    def media(self):
+        # Select2 e o script que aplica o filtro ao escolher um usuário
+        autocomplete = AutocompleteSelect(None, self.admin_site).media
+        return super().media + autocomplete + forms.Media(js=[
+            'admin/js/vendor/jquery/jquery.js', 'admin/js/jquery.init.js', 'js/admin_autocomplete_filter.js',
+        ])
@@ -0,0 +1,104 @@
+"""Checks do ``manage.py check`` para os arquivos estáticos dos templates.
+
+Os arquivos com hash no nome (``core.assets``) são servidos como imutáveis;
+um template que escreve o caminho à mão (``/static/js/digitacao.js``) pula o
+hash e, como o build não guarda os originais, quebra em produção.
+
+Também confere que o cache de páginas é compartilhado quando mais de um
+processo grava (``check_page_cache_shared``).
+"""
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, Warning, register
+from django.template import engines
+
+# {% static 'css/digitacao.css' %}
+STATIC_TAG = re.compile(r'''{%\s*static\s+(["'])(?P<name>[^"']+)\1''')
+
+
+def _hardcoded_static(text):
+    prefix = re.escape(settings.STATIC_URL)
+    return re.compile(rf'''(?:["'(=]\s*{prefix}|{{{{\s*STATIC_URL\s*}}}})''').search(text)
+
+
+def template_files():
+    """Templates do projeto e dos apps (``.html``, ``.txt``)"""
+    for engine in engines.all():
+        for directory in engine.template_dirs:
+            for path in sorted(Path(directory).rglob('*')):
+                if path.suffix in ('.html', '.txt') and path.is_file():
+                    yield path
+
+
+def _manifest_built():
+    return bool(getattr(staticfiles_storage, 'hashed_files', None))
+
+
+@register(Tags.staticfiles, Tags.templates)
+def check_static_references(app_configs=None, **kwargs):
+    """Os templates só referenciam estáticos pelo ``{% static %}`` e, depois do
+    build, só nomes que têm versão com hash no manifesto"""
+    errors = []
+    hashed = staticfiles_storage.hashed_files if _manifest_built() else None
+    for path in template_files():
+        text = path.read_text(encoding='utf-8', errors='replace')
+        for number, line in enumerate(text.splitlines(), 1):
+            if _hardcoded_static(line):
+                errors.append(Error(
+                    f"{path}:{number} referencia um arquivo estático sem {{% static %}}",
+                    hint="Use {% static 'caminho' %} para servir a versão com hash.",
+                    id='core.E001',
+                ))
+            if hashed is None:
+                continue
+            for match in STATIC_TAG.finditer(line):
+                if staticfiles_storage.clean_name(match['name']) not in hashed:
+                    errors.append(Error(
+                        f"{path}:{number}: '{match['name']}' não tem versão com hash no manifesto",
+                        hint="Confira o caminho e rode collectstatic.",
+                        id='core.E002',
+                    ))
+    return errors
+
+
+@register(Tags.staticfiles, deploy=True)
+def check_static_build(app_configs=None, **kwargs):
+    if _manifest_built():
+        return []
+    return [Warning(
+        "O manifesto dos arquivos estáticos não existe; as páginas vão referenciar arquivos sem hash.",
+        hint="Rode collectstatic antes de publicar.",
+        id='core.W001',
+    )]
+
+
+@register(Tags.caches)
+def check_page_cache_shared(app_configs=None, **kwargs):
+    """O cache "paginas" em memória só vale para um processo.
+
+    As páginas são invalidadas (``bump_user_version``) no processo que grava:
+    outro worker web, ou o ``drain_submissions`` com
+    ``SUBMISSION_QUEUE_WORKER = 'external'``. Os demais processos nunca veem a
+    invalidação e servem páginas antigas.
+    """
+    if not isinstance(caches['paginas'], LocMemCache):
+        return []
+    if settings.SUBMISSION_QUEUE_ENABLED and settings.SUBMISSION_QUEUE_WORKER == 'external':
+        return [Error(
+            "A fila de submissões com drenagem externa exige um cache \"paginas\" compartilhado entre processos.",
+            hint="Defina PAGE_CACHE_BACKEND e PAGE_CACHE_LOCATION (ex.: Redis) ou use SUBMISSION_QUEUE_WORKER=thread.",
+            id='core.E003',
+        )]
+    if settings.WEB_CONCURRENCY > 1:
+        return [Warning(
+            f"Com {settings.WEB_CONCURRENCY} processos web (WEB_CONCURRENCY), o cache \"paginas\" em memória "
+            "não recebe as invalidações feitas pelos outros processos.",
+            hint="Defina PAGE_CACHE_BACKEND e PAGE_CACHE_LOCATION (ex.: Redis).",
+            id='core.W002',
+        )]
+    return []
@@ -0,0 +1,219 @@
+"""Exportação dos resultados dos candidatos em CSV e XLSX.
+
+As linhas são lidas do ``CandidateSummary`` com ``.iterator(chunk_size=...)`` e
+projeções ``values_list``, e as fases do último teste de digitação são buscadas
+em uma consulta por lote. Os dois formatos são gerados de forma incremental,
+então a memória usada é limitada a um lote, independentemente do total de
+candidatos exportados.
+"""
+import csv
+import zipfile
+from datetime import datetime
+from itertools import batched
+from xml.sax.saxutils import escape
+
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from .models import TypingTest, TypingTestPhase
+
+EXPORT_CHUNK_SIZE = 2000
+
+PHASES = (1, 2, 3)
+
+SUMMARY_COLUMNS = (
+    ('Nome', 'first_name'),
+    ('Sobrenome', 'last_name'),
+    ('E-mail', 'user__email'),
+    ('Vaga', 'vaga'),
+    ('Data do teste de digitação', 'typing_test_created_at'),
+    ('WPM médio', 'wpm_average'),
+    ('Precisão média (%)', 'accuracy_average'),
+)
+
+PROFILE_COLUMNS = (
+    ('Data do perfil comportamental', 'behavioral_profile_created_at'),
+    ('Quadrante A', 'quadrant_a_score'),
+    ('Quadrante B', 'quadrant_b_score'),
+    ('Quadrante C', 'quadrant_c_score'),
+    ('Quadrante D', 'quadrant_d_score'),
+    ('Perfil dominante', 'dominant_quadrant'),
+)
+
+PHASE_FIELDS = (
+    ('WPM', 'wpm'),
+    ('Precisão (%)', 'accuracy'),
+    ('Tempo (s)', 'time_seconds'),
+)
+
+HEADER = (
+    [label for label, _ in SUMMARY_COLUMNS]
+    + [f'Fase {number} - {label}' for number in PHASES for label, _ in PHASE_FIELDS]
+    + [label for label, _ in PROFILE_COLUMNS]
+)
+
+
+def export_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Gera o cabeçalho e uma lista de valores por candidato do queryset de resumos"""
+    latest_test = Subquery(
+        TypingTest.objects.filter(user=OuterRef('user_id')).order_by('-created_at', '-id').values('id')[:1]
+    )
+    fields = [field for _, field in SUMMARY_COLUMNS] + [field for _, field in PROFILE_COLUMNS]
+    rows = queryset.annotate(latest_test_id=latest_test).values_list('latest_test_id', *fields)
+    split = len(SUMMARY_COLUMNS) + 1
+
+    yield HEADER
+    for chunk in batched(rows.iterator(chunk_size=chunk_size), chunk_size):
+        phases = {}
+        test_ids = [row[0] for row in chunk if row[0] is not None]
+        # Sem a ordenação padrão do modelo, que juntaria TypingTest para ordenar
+        # por created_at em uma árvore temporária
+        for test_id, number, *values in TypingTestPhase.objects.filter(typing_test_id__in=test_ids).order_by().values_list(
+            'typing_test_id', 'phase_number', *(field for _, field in PHASE_FIELDS)
+        ):
+            phases[test_id, number] = values
+
+        empty = [None] * len(PHASE_FIELDS)
+        for row in chunk:
+            phase_values = [value for number in PHASES for value in phases.get((row[0], number), empty)]
+            yield [*row[1:split], *phase_values, *row[split:]]
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, float):
+        return round(value, 2)
+    if isinstance(value, datetime):
+        return timezone.localtime(value).strftime('%d/%m/%Y %H:%M')
+    return value
+
+
+# Prefixos que o Excel e o LibreOffice interpretam como fórmula
+_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _csv_cell(value):
+    """Valor do CSV; textos que começariam uma fórmula (nome, vaga) ganham ``'``.
+
+    No XLSX não é preciso: células ``inlineStr`` nunca são avaliadas.
+    """
+    value = _csv_value(value)
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+class _Echo:
+    """Pseudo-arquivo que devolve a linha escrita pelo ``csv.writer``"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    """Gera o CSV em bytes, uma linha por vez (com BOM para o Excel reconhecer o UTF-8)"""
+    writer = csv.writer(_Echo())
+    yield '\ufeff'.encode()
+    for row in rows:
+        yield writer.writerow([_csv_cell(value) for value in row]).encode()
+
+
+class _ZipSink:
+    """Destino não posicionável para o ``zipfile``.
+
+    Sem ``seek``, o ``zipfile`` grava os tamanhos em descritores após os dados,
+    o que permite enviar cada parte do arquivo assim que ela é escrita.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+_XLSX_STATIC_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Candidatos" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+# Caracteres de controle não são permitidos em XML 1.0
+_XML_INVALID = dict.fromkeys(c for c in range(32) if c not in (9, 10, 13))
+
+
+def _xlsx_cell(value):
+    if value is None:
+        return '<c/>'
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f'<c><v>{round(value, 2) if isinstance(value, float) else value}</v></c>'
+    text = _csv_value(value)
+    text = escape(str(text).translate(_XML_INVALID))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def stream_xlsx(rows):
+    """Gera uma planilha XLSX de uma aba, escrevendo as linhas incrementalmente.
+
+    Os textos são gravados como ``inlineStr``, dispensando a tabela de strings
+    compartilhadas, que exigiria conhecer todas as linhas antes de escrever.
+    """
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in _XLSX_STATIC_PARTS.items():
+            archive.writestr(name, content)
+        yield sink.drain()
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            for row in rows:
+                sheet.write(('<row>' + ''.join(_xlsx_cell(value) for value in row) + '</row>').encode())
+                data = sink.drain()
+                if data:
+                    yield data
+            sheet.write(b'</sheetData></worksheet>')
+    yield sink.drain()
@@ -0,0 +1,87 @@
+from django import forms
+
+from .models import BehavioralProfile
+from .search import RANK_WINDOW
+
+
+class CandidatoFiltroForm(forms.Form):
+    """Filtros e ordenação da listagem de candidatos"""
+    ORDENACAO_CAMPOS = {
+        'recentes': 'typing_test_completed_at',
+        'wpm': 'wpm_average',
+        'precisao': 'accuracy_average',
+    }
+    ORDENACAO_CHOICES = [
+        ('recentes', 'Mais recentes'),
+        ('wpm', 'Velocidade (WPM)'),
+        ('precisao', 'Precisão'),
+    ]
+    DIRECAO_CHOICES = [
+        ('desc', 'Decrescente'),
+        ('asc', 'Crescente'),
+    ]
+
+    vaga = forms.CharField(required=False, max_length=100)
+    perfil = forms.ChoiceField(choices=[('', 'Todos os perfis')] + BehavioralProfile.QUADRANT_CHOICES, required=False)
+    wpm_min = forms.FloatField(required=False, min_value=0)
+    wpm_max = forms.FloatField(required=False, min_value=0)
+    precisao_min = forms.FloatField(required=False, min_value=0, max_value=100)
+    precisao_max = forms.FloatField(required=False, min_value=0, max_value=100)
+    ordenar = forms.ChoiceField(choices=ORDENACAO_CHOICES, required=False)
+    direcao = forms.ChoiceField(choices=DIRECAO_CHOICES, required=False)
+    por_pagina = forms.IntegerField(required=False, min_value=10, max_value=100)
+
+    def filter(self, queryset):
+        """Aplica os filtros válidos ao queryset de ``CandidateSummary``"""
+        data = self.cleaned_data
+        lookups = {
+            'vaga': 'vaga',
+            'perfil': 'dominant_quadrant',
+            'wpm_min': 'wpm_average__gte',
+            'wpm_max': 'wpm_average__lte',
+            'precisao_min': 'accuracy_average__gte',
+            'precisao_max': 'accuracy_average__lte',
+        }
+        filters = {
+            lookup: data[name]
+            for name, lookup in lookups.items()
+            if data.get(name) not in (None, '')
+        }
+        return queryset.filter(**filters)
+
+    @property
+    def sort_field(self):
+        return self.ORDENACAO_CAMPOS[self.cleaned_data.get('ordenar') or 'recentes']
+
+    @property
+    def descending(self):
+        return self.cleaned_data.get('direcao') != 'asc'
+
+    @property
+    def page_size(self):
+        return self.cleaned_data.get('por_pagina') or 25
+
+
+class AderenciaForm(forms.Form):
+    """Perfil ideal usado na busca de candidatos mais próximos"""
+    vaga = forms.CharField(required=False, max_length=100)
+    a = forms.IntegerField(label='Quadrante A', min_value=0, max_value=100, initial=50)
+    b = forms.IntegerField(label='Quadrante B', min_value=0, max_value=100, initial=50)
+    c = forms.IntegerField(label='Quadrante C', min_value=0, max_value=100, initial=50)
+    d = forms.IntegerField(label='Quadrante D', min_value=0, max_value=100, initial=50)
+    wpm = forms.FloatField(label='WPM', min_value=0, initial=40)
+    precisao = forms.FloatField(label='Precisão', min_value=0, max_value=100, initial=95)
+    k = forms.IntegerField(label='Resultados', min_value=1, max_value=100, initial=10, required=False)
+
+    @property
+    def ideal(self):
+        """Valores na ordem de ``core.matching.FEATURES``"""
+        data = self.cleaned_data
+        return (data['a'], data['b'], data['c'], data['d'], data['wpm'], data['precisao'])
+
+
+class BuscaCandidatosForm(forms.Form):
+    """Busca textual por nome, e-mail, vaga ou perfil"""
+    q = forms.CharField(required=False, max_length=200)
+    # As páginas cobrem os RANK_WINDOW resultados ordenados; além disso, refine a busca
+    pagina = forms.IntegerField(required=False, min_value=1, max_value=RANK_WINDOW // 20)
@@ -0,0 +1,117 @@
+"""Codificação compacta do fluxo de teclas de uma fase do teste de digitação.
+
+Cada evento é um par (código da tecla, milissegundos desde o evento anterior).
+Os dois canais são gravados como vetores ``uint16`` little-endian contíguos,
+opcionalmente comprimidos com zlib, em vez de uma lista JSON de objetos:
+
+    byte 0     versão do formato
+    byte 1     flags (bit 0: corpo comprimido com zlib)
+    corpo      uint32 quantidade de eventos + códigos[n] + deltas[n]
+
+Os vetores decodificados são ``array.array`` e expõem o buffer protocol, então
+``numpy.frombuffer(stream.deltas, dtype='<u2')`` não copia os dados.
+"""
+import struct
+import sys
+import zlib
+from array import array
+
+FORMAT_VERSION = 1
+FLAG_ZLIB = 0x01
+MAX_EVENTS = 5000
+MAX_VALUE = 0xFFFF  # Intervalos acima de ~65s são truncados
+
+_HEADER = struct.Struct('<BB')
+_COUNT = struct.Struct('<I')
+
+
+class KeystrokeError(ValueError):
+    pass
+
+
+def _little_endian(values):
+    if sys.byteorder != 'little':
+        values = array('H', values)
+        values.byteswap()
+    return values
+
+
+class KeystrokeStream:
+    """Fluxo decodificado: vetores paralelos de códigos e intervalos (ms)"""
+    __slots__ = ('codes', 'deltas')
+
+    def __init__(self, codes, deltas):
+        self.codes = codes
+        self.deltas = deltas
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __iter__(self):
+        return zip(self.codes, self.deltas)
+
+    @property
+    def total_ms(self):
+        return sum(self.deltas)
+
+
+def encode_keystrokes(events, compress=True):
+    """Codifica uma sequência de pares ``(código, delta_ms)`` em bytes"""
+    if len(events) > MAX_EVENTS:
+        raise KeystrokeError(f"Máximo de {MAX_EVENTS} teclas por fase, recebidas: {len(events)}")
+
+    try:
+        pairs = [(int(code), int(delta)) for code, delta in events]
+    except (TypeError, ValueError) as e:
+        raise KeystrokeError(f"Evento de tecla inválido: {e}") from e
+
+    codes = array('H')
+    deltas = array('H')
+    for code, delta in pairs:
+        if code < 0 or delta < 0:
+            raise KeystrokeError("Códigos e intervalos devem ser não negativos")
+        codes.append(min(code, MAX_VALUE))
+        deltas.append(min(delta, MAX_VALUE))
+
+    body = _COUNT.pack(len(codes)) + _little_endian(codes).tobytes() + _little_endian(deltas).tobytes()
+    flags = 0
+    if compress:
+        compressed = zlib.compress(body, 6)
+        if len(compressed) < len(body):
+            body, flags = compressed, FLAG_ZLIB
+    return _HEADER.pack(FORMAT_VERSION, flags) + body
+
+
+def decode_keystrokes(blob):
+    """Decodifica bytes gerados por ``encode_keystrokes``"""
+    if blob is None:
+        return None
+    blob = bytes(blob)
+    version, flags = _HEADER.unpack_from(blob)
+    if version != FORMAT_VERSION:
+        raise KeystrokeError(f"Versão de formato desconhecida: {version}")
+    body = blob[_HEADER.size:]
+    if flags & FLAG_ZLIB:
+        body = zlib.decompress(body)
+
+    (count,) = _COUNT.unpack_from(body)
+    offset = _COUNT.size
+    codes = array('H')
+    codes.frombytes(body[offset:offset + 2 * count])
+    deltas = array('H')
+    deltas.frombytes(body[offset + 2 * count:offset + 4 * count])
+    if sys.byteorder != 'little':
+        codes.byteswap()
+        deltas.byteswap()
+    return KeystrokeStream(codes, deltas)
+
+
+def iter_keystroke_streams(queryset, chunk_size=2000):
+    """Percorre fases com teclas gravadas decodificando sob demanda.
+
+    Lê apenas ``id`` e o blob, em lotes do cursor do banco, e produz
+    ``(id, KeystrokeStream)`` sem manter mais de um lote em memória.
+    """
+    rows = queryset.filter(keystrokes__isnull=False).values_list('id', 'keystrokes')
+    for pk, blob in rows.iterator(chunk_size=chunk_size):
+        yield pk, decode_keystrokes(blob)
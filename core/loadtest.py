@@ -0,0 +1,243 @@
+"""Gerador de carga com o fluxo real de candidatos e recrutadores.
+
+Roda contra um servidor já em execução (``runserver``, gunicorn ou uvicorn)
+que use o mesmo banco do comando ``loadtest``, sem serviços externos. Cada
+candidato virtual faz login pelo formulário (com CSRF e cookies de sessão),
+abre as páginas e envia os dois testes; cada recrutador virtual alterna entre
+a listagem e a página de um candidato. A concorrência de candidatos segue as
+rampas configuradas, e o resultado é um relatório JSON por endpoint.
+"""
+import asyncio
+import json
+import random
+import re
+import time
+from collections import defaultdict
+from urllib.parse import urlencode, urlsplit
+
+from django.urls import reverse
+
+from .benchmarks import http_request, percentile, sample_behavioral_payload, sample_typing_payload
+from .phrases import PHRASE_BANK_VERSION
+
+CSRF_INPUT = re.compile(rb'name="csrfmiddlewaretoken" value="([^"]+)"')
+CANDIDATE_LINK = re.compile(rb'/candidato/(\d+)/')
+ASSIGNED_PHRASES = re.compile(rb'<script id="frases-candidato" type="application/json">(.*?)</script>', re.S)
+# Gravado na hora (200) ou aceito pela fila de submissões (202, SUBMISSION_QUEUE_ENABLED)
+SAVED = (200, 202)
+
+
+def parse_stages(values):
+    """Converte ``["10:30", "50:60"]`` em ``[(10, 30.0), (50, 60.0)]`` (candidatos:segundos)"""
+    stages = []
+    for value in values:
+        users, _, seconds = value.partition(':')
+        stages.append((int(users), float(seconds)))
+    return stages
+
+
+def target_at(stages, elapsed):
+    """Concorrência alvo após ``elapsed`` segundos: rampa linear dentro de cada estágio"""
+    previous = 0
+    for users, seconds in stages:
+        if elapsed < seconds:
+            return round(previous + (users - previous) * elapsed / seconds)
+        elapsed -= seconds
+        previous = users
+    return None
+
+
+class Recorder:
+    """Latências e erros por endpoint"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.error_samples = {}
+
+    def record(self, endpoint, seconds, error=None):
+        self.latencies[endpoint].append(seconds)
+        if error is not None:
+            self.errors[endpoint] += 1
+            self.error_samples.setdefault(endpoint, error)
+
+    def report(self, elapsed, **meta):
+        endpoints = {}
+        for endpoint, values in sorted(self.latencies.items()):
+            errors = self.errors[endpoint]
+            endpoints[endpoint] = {
+                'requests': len(values),
+                'errors': errors,
+                'error_rate': round(errors / len(values), 4),
+                'throughput': round(len(values) / elapsed, 2),
+                'p50_ms': round(percentile(values, 50) * 1000, 1),
+                'p95_ms': round(percentile(values, 95) * 1000, 1),
+                'p99_ms': round(percentile(values, 99) * 1000, 1),
+                'max_ms': round(max(values) * 1000, 1),
+            }
+            if endpoint in self.error_samples:
+                endpoints[endpoint]['first_error'] = self.error_samples[endpoint]
+        requests = sum(len(values) for values in self.latencies.values())
+        errors = sum(self.errors.values())
+        return {
+            **meta,
+            'duration_s': round(elapsed, 2),
+            'requests': requests,
+            'errors': errors,
+            'error_rate': round(errors / requests, 4) if requests else 0,
+            'throughput': round(requests / elapsed, 2),
+            'endpoints': endpoints,
+        }
+
+
+class Browser:
+    """Sessão HTTP de um usuário virtual: cookies, CSRF e medição das requisições"""
+
+    def __init__(self, url, recorder, think_time):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.recorder = recorder
+        self.think_time = think_time
+        self.cookies = {}
+
+    async def request(self, endpoint, method, path, data=None, json_body=None, expect=(200,)):
+        headers, body = {}, b''
+        if method == 'POST':
+            headers['X-CSRFToken'] = self.cookies.get('csrftoken', '')
+            headers['Referer'] = f'http://{self.host}:{self.port}{path}'
+            if json_body is not None:
+                headers['Content-Type'] = 'application/json'
+                body = json.dumps(json_body).encode()
+            else:
+                headers['Content-Type'] = 'application/x-www-form-urlencoded'
+                body = urlencode(data or {}).encode()
+
+        start = time.perf_counter()
+        error = None
+        try:
+            status, response_headers, content = await http_request(
+                self.host, self.port, method, path, self.cookies, headers, body,
+            )
+        except OSError as e:
+            status, response_headers, content = 0, [], b''
+            error = f'{type(e).__name__}: {e}'
+        elapsed = time.perf_counter() - start
+
+        for name, value in response_headers:
+            if name == 'set-cookie':
+                cookie, _, _ = value.partition(';')
+                key, _, cookie_value = cookie.partition('=')
+                self.cookies[key.strip()] = cookie_value.strip().strip('"')
+        if error is None and status not in expect:
+            error = f'HTTP {status}'
+        elif error is None and json_body is not None and b'"success"' not in content:
+            error = content[:200].decode(errors='replace')
+        self.recorder.record(endpoint, elapsed, error)
+
+        if self.think_time:
+            await asyncio.sleep(random.uniform(0, self.think_time))
+        return status, content
+
+    async def login(self, email, password):
+        path = reverse('login')
+        _, content = await self.request('login (GET)', 'GET', path)
+        match = CSRF_INPUT.search(content)
+        token = match.group(1).decode() if match else self.cookies.get('csrftoken', '')
+        await self.request(
+            'login (POST)', 'POST', path,
+            data={'csrfmiddlewaretoken': token, 'username': email, 'password': password},
+            expect=(302,),
+        )
+
+
+async def candidate_flow(browser, email, password):
+    """Fluxo completo de um candidato, do login ao teste comportamental"""
+    await browser.login(email, password)
+    await browser.request('index', 'GET', reverse('index'))
+    _, content = await browser.request('teste-digitacao', 'GET', reverse('digitacao'))
+    # As frases atribuídas vêm na página, como para o navegador
+    match = ASSIGNED_PHRASES.search(content)
+    assigned = json.loads(match.group(1)) if match else {'versao': PHRASE_BANK_VERSION, 'ids': None}
+    payload = sample_typing_payload(None, version=assigned['versao'], phrase_ids=assigned['ids'])
+    await browser.request(
+        'api/save-typing-test', 'POST', reverse('save_typing_test'), json_body=payload, expect=SAVED,
+    )
+    await browser.request('teste-personalidade', 'GET', reverse('personalidade'))
+    await browser.request(
+        'api/save-behavioral-test', 'POST', reverse('save_behavioral_test'), json_body=sample_behavioral_payload(),
+        expect=SAVED,
+    )
+
+
+async def recruiter_loop(browser, email, password, stop):
+    """Recrutador alternando entre a listagem e a página de um candidato"""
+    await browser.login(email, password)
+    while not stop.is_set():
+        _, content = await browser.request('relatorios', 'GET', reverse('relatorios'))
+        ids = CANDIDATE_LINK.findall(content)
+        if ids:
+            user_id = int(random.choice(ids))
+            await browser.request('candidato/<id>', 'GET', reverse('detalhes_candidato', args=[user_id]))
+        elif browser.think_time == 0:
+            # Listagem ainda vazia: evita um laço sem espera
+            await asyncio.sleep(0.1)
+
+
+async def run(url, stages, candidates, recruiters, password, think_time=0.0):
+    """Executa as rampas e retorna o relatório.
+
+    ``candidates`` e ``recruiters`` são listas de e-mails; cada candidato
+    virtual ativo usa um e-mail da fila por fluxo.
+    """
+    recorder = Recorder()
+    pool = asyncio.Queue()
+    for email in candidates:
+        pool.put_nowait(email)
+    stop_all = asyncio.Event()
+    flows = {'completed': 0}
+
+    async def candidate_worker(stop):
+        while not stop.is_set() and not stop_all.is_set():
+            email = await pool.get()
+            if stop.is_set() or stop_all.is_set():
+                pool.put_nowait(email)
+                break
+            try:
+                await candidate_flow(Browser(url, recorder, think_time), email, password)
+                flows['completed'] += 1
+            finally:
+                pool.put_nowait(email)
+
+    recruiter_tasks = [
+        asyncio.create_task(recruiter_loop(Browser(url, recorder, think_time), email, password, stop_all))
+        for email in recruiters
+    ]
+
+    workers = []  # (evento de parada, tarefa)
+    start = time.perf_counter()
+    peak = 0
+    while (target := target_at(stages, time.perf_counter() - start)) is not None:
+        workers = [(event, task) for event, task in workers if not task.done()]
+        active = [(event, task) for event, task in workers if not event.is_set()]
+        for _ in range(target - len(active)):
+            event = asyncio.Event()
+            workers.append((event, asyncio.create_task(candidate_worker(event))))
+        for event, _ in active[target:]:
+            # O candidato termina o fluxo atual antes de sair
+            event.set()
+        peak = max(peak, target)
+        await asyncio.sleep(0.5)
+
+    stop_all.set()
+    await asyncio.gather(*(task for _, task in workers), *recruiter_tasks, return_exceptions=True)
+    elapsed = time.perf_counter() - start
+
+    return recorder.report(
+        elapsed,
+        url=url,
+        stages=[{'candidates': users, 'seconds': seconds} for users, seconds in stages],
+        peak_candidates=peak,
+        recruiters=len(recruiters),
+        completed_flows=flows['completed'],
+    )
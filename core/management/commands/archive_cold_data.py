@@ -0,0 +1,112 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.archive import CODECS, archived_fields, compress_frame, stored_size
+from core.models import TypingTestPhase, TypingTestPhaseArchive
+
+# (modelo, tabela de arquivo, rótulo no relatório)
+TARGETS = [
+    (TypingTestPhase, TypingTestPhaseArchive, 'fases'),
+]
+
+
+def _database_bytes():
+    """Páginas em uso e livres do arquivo SQLite, em bytes"""
+    with connection.cursor() as cursor:
+        page_size = cursor.execute("PRAGMA page_size").fetchone()[0]
+        page_count = cursor.execute("PRAGMA page_count").fetchone()[0]
+        freelist = cursor.execute("PRAGMA freelist_count").fetchone()[0]
+    return page_count * page_size, freelist * page_size
+
+
+class Command(BaseCommand):
+    help = (
+        "Move para a tabela de arquivo, comprimidos, a frase e o texto digitado das fases "
+        "mais antigas que ARCHIVE_AFTER_DAYS, e informa os bytes recuperados"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days', type=int, default=settings.ARCHIVE_AFTER_DAYS,
+            help="Idade mínima (dias) das linhas arquivadas",
+        )
+        parser.add_argument('--codec', choices=sorted(CODECS), default='zlib')
+        parser.add_argument('--batch-size', type=int, default=2000, help="Linhas arquivadas por transação")
+        parser.add_argument('--dry-run', action='store_true', help="Apenas medir a compressão, sem gravar")
+        parser.add_argument('--vacuum', action='store_true', help="Rodar VACUUM ao final para devolver o espaço ao disco")
+
+    def _archive(self, model, archive_model, cutoff, options):
+        """Arquiva as linhas do ``model`` criadas antes de ``cutoff``: ``(linhas, bytes antes, bytes depois)``"""
+        fields = archived_fields(model)
+        names = [field.attname for field in fields]
+        pending = model.objects.filter(
+            created_at__lt=cutoff, **{f'{name}__isnull': False for name in names},
+        ).order_by('pk')
+
+        last_id = 0
+        rows = before = after = 0
+        while True:
+            # Paginação por id: no --dry-run as linhas continuam pendentes
+            batch = list(pending.filter(pk__gt=last_id).values_list('pk', *names)[:options['batch_size']])
+            if not batch:
+                break
+            last_id = batch[-1][0]
+
+            archives = []
+            for pk, *values in batch:
+                frame = compress_frame(dict(zip(names, values)), options['codec'])
+                before += sum(stored_size(field, value) for field, value in zip(fields, values))
+                after += len(frame)
+                archives.append(archive_model(pk=pk, frame=frame))
+
+            if not options['dry_run']:
+                with transaction.atomic():
+                    # Uma linha alterada depois de arquivada volta com o frame substituído
+                    archive_model.objects.bulk_create(
+                        archives, batch_size=500, update_conflicts=True,
+                        unique_fields=[archive_model._meta.pk.name], update_fields=['frame', 'archived_at'],
+                    )
+                    model.objects.filter(pk__in=[archive.pk for archive in archives]).update(
+                        **dict.fromkeys(names, None),
+                    )
+            rows += len(batch)
+        return rows, before, after
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        sqlite = connection.vendor == 'sqlite'
+        if sqlite:
+            file_before, _ = _database_bytes()
+
+        total = 0
+        for model, archive_model, label in TARGETS:
+            rows, before, after = self._archive(model, archive_model, cutoff, options)
+            reclaimed = before - after
+            total += reclaimed
+            ratio = before / after if after else 0
+            self.stdout.write(
+                f"{rows} {label}: {before} bytes nas colunas -> {after} bytes em frames "
+                f"({reclaimed} bytes recuperados, {ratio:.1f}x)"
+            )
+
+        elapsed = time.perf_counter() - start
+        verb = "seriam recuperados" if options['dry_run'] else "recuperados"
+        self.stdout.write(f"{total} bytes {verb} em {elapsed:.2f}s ({options['codec']})")
+
+        if options['dry_run']:
+            return
+        if sqlite and options['vacuum']:
+            with connection.cursor() as cursor:
+                cursor.execute("VACUUM")
+            file_after, _ = _database_bytes()
+            self.stdout.write(f"Arquivo do banco: {file_before} -> {file_after} bytes após o VACUUM")
+        elif sqlite:
+            _, free = _database_bytes()
+            self.stdout.write(f"{free} bytes livres no arquivo do banco; rode com --vacuum para devolvê-los ao disco")
+        self.stdout.write(self.style.SUCCESS("Arquivamento concluído"))
@@ -0,0 +1,67 @@
+import multiprocessing
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+
+from core.benchmarks import sample_behavioral_payload, sample_typing_payload, temporary_candidates
+from core.sqlite import lock_stats
+from core.submissions import save_typing_submission, save_behavioral_submission
+
+
+def _submit_all(users):
+    """Executado em cada processo: submete os dois testes de cada candidato"""
+    lock_stats.reset()
+    answers = sample_behavioral_payload()['answers']
+    done, errors = 0, []
+    for user in users:
+        try:
+            save_typing_submission(user, sample_typing_payload(user.pk))
+            save_behavioral_submission(user, answers)
+            done += 1
+        except Exception as e:
+            errors.append(str(e))
+    connection.close()
+    return done, errors, lock_stats.snapshot()
+
+
+class Command(BaseCommand):
+    help = "Mede submissões por segundo com N processos gravando no SQLite ao mesmo tempo"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', default='1,2,4,8', help="Quantidades de processos, separadas por vírgula")
+        parser.add_argument('--candidates', type=int, default=50, help="Candidatos por processo")
+
+    def handle(self, *args, **options):
+        with connection.cursor() as cursor:
+            pragmas = {}
+            for name in ('journal_mode', 'synchronous', 'busy_timeout'):
+                cursor.execute(f'PRAGMA {name}')
+                pragmas[name] = cursor.fetchone()[0]
+        self.stdout.write("Pragmas: " + ", ".join(f"{name}={value}" for name, value in pragmas.items()))
+
+        # Cada processo, como um worker do gunicorn, abre a própria conexão
+        context = multiprocessing.get_context('fork')
+        for workers in (int(n) for n in options['workers'].split(',')):
+            with temporary_candidates(workers * options['candidates'], prefix='concurrent') as users:
+                shares = [users[i::workers] for i in range(workers)]
+                connections.close_all()
+                with context.Pool(workers) as pool:
+                    start = time.perf_counter()
+                    results = pool.map(_submit_all, shares)
+                    elapsed = time.perf_counter() - start
+
+            done = sum(result[0] for result in results)
+            errors = [error for result in results for error in result[1]]
+            stats = [result[2] for result in results]
+            acquisitions = sum(s['acquisitions'] for s in stats)
+            wait = sum(s['wait_seconds'] for s in stats)
+            self.stdout.write(
+                f"{workers:>2} processos: {done / elapsed:8.1f} candidatos/s | "
+                f"espera média pelo bloqueio {wait / max(acquisitions, 1) * 1000:6.2f} ms "
+                f"(máx. {max(s['max_wait_seconds'] for s in stats) * 1000:7.1f} ms) | "
+                f"{sum(s['retries'] for s in stats)} novas tentativas | "
+                f"{len(errors)} erros em {elapsed:.2f}s"
+            )
+            if errors:
+                self.stdout.write(self.style.WARNING(f"             primeiro erro: {errors[0]}"))
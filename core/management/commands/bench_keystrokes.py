@@ -0,0 +1,62 @@
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import SAMPLE_PHRASES
+from core.keystrokes import decode_keystrokes, encode_keystrokes, iter_keystroke_streams
+from core.models import TypingTestPhase
+
+
+def synthetic_events(phrase, rng):
+    """Uma tecla por caractere, com intervalos típicos e algumas correções"""
+    events = []
+    for char in phrase:
+        events.append((ord(char.upper()) if char.isalpha() else ord(char), rng.randint(60, 350)))
+        if rng.random() < 0.03:
+            events.append((8, rng.randint(150, 600)))  # Backspace
+    return events
+
+
+class Command(BaseCommand):
+    help = "Mede tamanho e vazão de codificação/decodificação do fluxo de teclas"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--phases', type=int, default=100000, help="Fases sintéticas")
+        parser.add_argument('--no-compress', action='store_true')
+        parser.add_argument('--from-db', action='store_true', help="Decodificar as fases gravadas no banco")
+
+    def handle(self, *args, **options):
+        if options['from_db']:
+            start = time.perf_counter()
+            count = events = 0
+            for pk, stream in iter_keystroke_streams(TypingTestPhase.objects.all()):
+                count += 1
+                events += len(stream)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f"{count} fases ({events} teclas) decodificadas do banco em {elapsed:.2f}s")
+            return
+
+        rng = random.Random(7)
+        streams = [synthetic_events(SAMPLE_PHRASES[i % len(SAMPLE_PHRASES)], rng) for i in range(options['phases'])]
+        compress = not options['no_compress']
+
+        start = time.perf_counter()
+        blobs = [encode_keystrokes(events, compress=compress) for events in streams]
+        encode_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        decoded_events = 0
+        for blob in blobs:
+            decoded_events += len(decode_keystrokes(blob))
+        decode_elapsed = time.perf_counter() - start
+
+        sample = streams[:1000]
+        json_size = sum(len(json.dumps([{'key': c, 'delta': d} for c, d in events])) for events in sample) / len(sample)
+        blob_size = sum(len(blob) for blob in blobs) / len(blobs)
+        n = len(blobs)
+        self.stdout.write(f"{n} fases, {decoded_events / n:.0f} teclas por fase em média")
+        self.stdout.write(f"tamanho por fase: {blob_size:.0f} bytes (JSON de objetos: {json_size:.0f} bytes)")
+        self.stdout.write(f"codificação:   {n / encode_elapsed:10.0f} fases/s ({encode_elapsed:.2f}s)")
+        self.stdout.write(f"decodificação: {n / decode_elapsed:10.0f} fases/s ({decode_elapsed:.2f}s)")
@@ -0,0 +1,56 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import percentile
+from core.matching import FEATURES, SCALES, VagaIndex, _squared_distance, normalize
+
+
+class Command(BaseCommand):
+    help = "Mede construção e consulta top-k do índice de aderência com candidatos sintéticos"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--candidates', type=int, default=100000)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--updates', type=int, default=2000, help="Submissões incrementais antes das consultas")
+        parser.add_argument('-k', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def _candidate(self, rng):
+        return normalize([rng.uniform(20, 100) for _ in FEATURES[:4]] + [rng.uniform(15, 90), rng.uniform(70, 100)])
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        points = {pid: self._candidate(rng) for pid in range(options['candidates'])}
+
+        start = time.perf_counter()
+        index = VagaIndex(points.items())
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(options['updates']):
+            pid = rng.randrange(len(points) * 2)
+            points[pid] = self._candidate(rng)
+            index.upsert(pid, points[pid])
+        updates = time.perf_counter() - start
+
+        latencies = []
+        k = options['k']
+        for i in range(options['queries']):
+            target = self._candidate(rng)
+            start = time.perf_counter()
+            heap = []
+            index.query(target, k, heap)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if i < 3:
+                expected = sorted(points, key=lambda pid: _squared_distance(points[pid], target))[:k]
+                if sorted(pid for _, pid in heap) != sorted(expected):
+                    self.stderr.write(self.style.ERROR("Resultado diverge da busca exaustiva"))
+
+        self.stdout.write(f"{len(index)} candidatos, {len(SCALES)} dimensões, k={k}")
+        self.stdout.write(f"construção: {build:.2f}s | {options['updates']} atualizações incrementais: {updates:.2f}s")
+        self.stdout.write(
+            f"consulta: p50 {percentile(latencies, 50):.2f} ms | p95 {percentile(latencies, 95):.2f} ms | "
+            f"p99 {percentile(latencies, 99):.2f} ms"
+        )
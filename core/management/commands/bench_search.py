@@ -0,0 +1,82 @@
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import percentile
+from core.models import BehavioralProfile
+from core.search import _create_table_sql, _search_sql, match_expression, rank_rows
+
+FIRST_NAMES = [
+    'João', 'José', 'Antônio', 'Francisco', 'Carlos', 'Paulo', 'Pedro', 'Lucas', 'Luiz', 'Marcos',
+    'Maria', 'Ana', 'Francisca', 'Antônia', 'Adriana', 'Juliana', 'Márcia', 'Fernanda', 'Patrícia', 'Aline',
+    'Conceição', 'Sebastião', 'Inês', 'Cecília', 'Estêvão', 'Vitória', 'Caetano', 'Letícia', 'Mônica', 'Cláudio',
+]
+LAST_NAMES = [
+    'Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves', 'Pereira', 'Lima', 'Gomes',
+    'Ribeiro', 'Carvalho', 'Araújo', 'Magalhães', 'Simões', 'Conceição', 'Brandão', 'Gonçalves', 'Falcão', 'Guimarães',
+]
+VAGAS = [
+    'Analista de Dados', 'Desenvolvedor Backend', 'Atendimento ao Cliente', 'Suporte Técnico',
+    'Gerente de Projetos', 'Assistente Administrativo', 'Designer de Produto', 'Engenheiro de Qualidade',
+]
+DOMAINS = ['gmail.com', 'outlook.com', 'empresa.com.br', 'yahoo.com.br']
+QUERIES = [
+    'joao silva', 'conceicao', 'maria ara', 'ana', 'sebastiao magalhaes', 'analista dados',
+    'suporte', 'inovador', 'gu', 'leticia falcao gmail', 'fernanda souza designer', 'xyzw',
+]
+
+
+class Command(BaseCommand):
+    help = "Mede a busca FTS5 de candidatos (consulta e ordenação da primeira página) sobre um índice sintético"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000)
+        parser.add_argument('--repeat', type=int, default=20, help="Execuções de cada consulta")
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def _rows(self, count, rng):
+        quadrants = [f'{code} {label}' for code, label in BehavioralProfile.QUADRANT_CHOICES] + ['']
+        for rowid in range(1, count + 1):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            email = f'{first}.{last}{rowid}@{rng.choice(DOMAINS)}'.lower()
+            yield rowid, f'{first} {rng.choice(LAST_NAMES)} {last}', email, rng.choice(VAGAS), rng.choice(quadrants)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with tempfile.TemporaryDirectory() as directory:
+            db = sqlite3.connect(os.path.join(directory, 'busca.sqlite3'))
+            db.execute(_create_table_sql())
+
+            start = time.perf_counter()
+            db.executemany(
+                f"INSERT INTO core_candidatesearch(rowid, nome, email, vaga, perfil) VALUES (?, ?, ?, ?, ?)",
+                self._rows(options['rows'], rng),
+            )
+            db.execute("INSERT INTO core_candidatesearch(core_candidatesearch) VALUES ('optimize')")
+            db.commit()
+            self.stdout.write(f"{options['rows']} linhas indexadas em {time.perf_counter() - start:.1f}s")
+
+            sql = _search_sql().replace('%s', '?')
+            for text in QUERIES:
+                match = match_expression(text)
+                latencies = []
+                for _ in range(options['repeat']):
+                    start = time.perf_counter()
+                    ranked = rank_rows(db.execute(sql, [match]).fetchall(), text)
+                    found = ranked[:options['page_size']]
+                    latencies.append(time.perf_counter() - start)
+                total = db.execute(
+                    "SELECT COUNT(*) FROM core_candidatesearch WHERE core_candidatesearch MATCH ?", [match],
+                ).fetchone()[0]
+                self.stdout.write(
+                    f"{text!r:28} {total:>8} resultados | "
+                    f"p50 {percentile(latencies, 50) * 1000:7.2f} ms | "
+                    f"p95 {percentile(latencies, 95) * 1000:7.2f} ms | "
+                    f"{len(found)} na página"
+                )
+            db.close()
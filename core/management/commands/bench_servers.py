@@ -0,0 +1,121 @@
+import asyncio
+import json
+import os
+import secrets
+import socket
+import subprocess
+import sys
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.urls import reverse
+
+from core.benchmarks import (
+    http_request, login_sessions, percentile, sample_behavioral_payload, sample_typing_payload,
+    temporary_candidates,
+)
+
+HOST = '127.0.0.1'
+
+SERVERS = {
+    # Workers síncronos: cada requisição ocupa um processo do início ao fim
+    'wsgi': lambda port, workers: [
+        sys.executable, '-m', 'gunicorn', 'fitcultural.wsgi:application',
+        '--workers', str(workers), '--worker-class', 'sync', '--bind', f'{HOST}:{port}',
+        '--backlog', '2048', '--log-level', 'warning',
+    ],
+    # Views assíncronas: as requisições esperando o banco não ocupam o worker
+    'asgi': lambda port, workers: [
+        sys.executable, '-m', 'uvicorn', 'fitcultural.asgi:application',
+        '--workers', str(workers), '--host', HOST, '--port', str(port),
+        '--backlog', '2048', '--log-level', 'warning', '--no-access-log',
+    ],
+}
+
+
+def _wait_for_port(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise CommandError(f"O servidor terminou com código {process.returncode}")
+        with socket.socket() as sock:
+            if sock.connect_ex((HOST, port)) == 0:
+                return
+        time.sleep(0.1)
+    raise CommandError(f"O servidor não respondeu na porta {port}")
+
+
+async def _candidate(port, session_key, user_id, paths, latencies, errors):
+    """Fluxo de um candidato: abre a página do teste e envia os dois testes"""
+    csrf = secrets.token_hex(16)
+    cookies = {'sessionid': session_key, 'csrftoken': csrf}
+    headers = {'X-CSRFToken': csrf, 'Content-Type': 'application/json'}
+    steps = [
+        ('GET', paths['digitacao'], b''),
+        ('POST', paths['save_typing_test'], json.dumps(sample_typing_payload(user_id)).encode()),
+        ('POST', paths['save_behavioral_test'], json.dumps(sample_behavioral_payload()).encode()),
+    ]
+    for method, path, body in steps:
+        start = time.perf_counter()
+        try:
+            status, _, content = await http_request(HOST, port, method, path, cookies, headers, body)
+        except OSError as e:
+            errors.append(f'{method} {path}: {e}')
+            continue
+        latencies.append(time.perf_counter() - start)
+        # 202: submissão aceita pela fila (SUBMISSION_QUEUE_ENABLED)
+        if status not in (200, 202) or (method == 'POST' and b'"success"' not in content):
+            errors.append(f'{method} {path}: HTTP {status} {content[:120]!r}')
+
+
+async def _run_clients(port, candidates, paths):
+    """``candidates``: pares ``(chave da sessão, id do usuário)``"""
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(_candidate(port, key, user_id, paths, latencies, errors) for key, user_id in candidates))
+    return time.perf_counter() - start, latencies, errors
+
+
+class Command(BaseCommand):
+    help = "Compara WSGI (gunicorn, workers síncronos) e ASGI (uvicorn) com candidatos simultâneos"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--candidates', type=int, default=1000, help="Candidatos simultâneos")
+        parser.add_argument('--workers', type=int, default=4, help="Processos de cada servidor")
+        parser.add_argument('--server', choices=[*SERVERS, 'all'], default='all')
+        parser.add_argument('--port', type=int, default=8765)
+
+    def handle(self, *args, **options):
+        names = list(SERVERS) if options['server'] == 'all' else [options['server']]
+        paths = {name: reverse(name) for name in ('digitacao', 'save_typing_test', 'save_behavioral_test')}
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'fitcultural.settings')}
+
+        self.stdout.write(f"{options['candidates']} candidatos simultâneos, {options['workers']} processos por servidor")
+        for offset, name in enumerate(names):
+            port = options['port'] + offset
+            with temporary_candidates(options['candidates'], prefix=name) as users:
+                session_keys = login_sessions(users)
+                connections.close_all()
+                process = subprocess.Popen(SERVERS[name](port, options['workers']), env=env, stdout=subprocess.DEVNULL)
+                try:
+                    _wait_for_port(port, process)
+                    elapsed, latencies, errors = asyncio.run(_run_clients(
+                        port, list(zip(session_keys, [user.pk for user in users])), paths,
+                    ))
+                finally:
+                    process.terminate()
+                    process.wait(timeout=30)
+                Session.objects.filter(session_key__in=session_keys).delete()
+
+            completed = len(latencies)
+            self.stdout.write(
+                f"{name}: {completed / elapsed:7.1f} req/s | "
+                f"p50 {percentile(latencies, 50) * 1000:7.0f} ms | "
+                f"p95 {percentile(latencies, 95) * 1000:7.0f} ms | "
+                f"p99 {percentile(latencies, 99) * 1000:7.0f} ms | "
+                f"{len(errors)} erros em {elapsed:.1f}s"
+            )
+            if errors:
+                self.stdout.write(self.style.WARNING(f"      primeiro erro: {errors[0]}"))
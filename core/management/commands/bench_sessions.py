@@ -0,0 +1,80 @@
+import threading
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core import sessions
+from core.benchmarks import temporary_candidates
+
+ENGINES = {
+    'banco': 'django.contrib.sessions.backends.db',
+    'lru': 'core.sessions',
+}
+PAGES = ['index', 'digitacao', 'personalidade', 'bancos']
+
+
+class SessionQueryCounter:
+    """``execute_wrapper`` que separa as consultas a ``django_session``"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.statements = self.reads = self.writes = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.statements += 1
+            if 'django_session' in sql:
+                if sql.lstrip().upper().startswith('SELECT'):
+                    self.reads += 1
+                else:
+                    self.writes += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = "Mede as consultas a django_session por requisição com o backend de banco padrão e com core.sessions"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--candidates', type=int, default=20)
+        parser.add_argument('--rounds', type=int, default=10, help="Vezes que cada candidato percorre as páginas")
+        parser.add_argument(
+            '--save-every-request', action='store_true',
+            help="Ligar SESSION_SAVE_EVERY_REQUEST (expiração deslizante)",
+        )
+
+    def _run(self, users, rounds):
+        clients = []
+        for user in users:
+            client = Client()
+            client.force_login(user)
+            clients.append(client)
+
+        counter = SessionQueryCounter()
+        requests = 0
+        with connection.execute_wrapper(counter):
+            start = time.perf_counter()
+            for _ in range(rounds):
+                for client in clients:
+                    for page in PAGES:
+                        client.get(reverse(page))
+                        requests += 1
+            elapsed = time.perf_counter() - start
+
+        Session.objects.filter(session_key__in=[client.session.session_key for client in clients]).delete()
+        return requests, elapsed, counter
+
+    def handle(self, *args, **options):
+        for label, engine in ENGINES.items():
+            with override_settings(SESSION_ENGINE=engine, SESSION_SAVE_EVERY_REQUEST=options['save_every_request']):
+                sessions.cache.clear()
+                with temporary_candidates(options['candidates'], prefix='sessions') as users:
+                    requests, elapsed, counter = self._run(users, options['rounds'])
+            self.stdout.write(
+                f"{label:>6}: {counter.reads / requests:.2f} SELECTs e {counter.writes / requests:.2f} escritas "
+                f"em django_session por requisição | {counter.statements / requests:.1f} comandos SQL | "
+                f"{elapsed / requests * 1000:.2f} ms por requisição ({requests} requisições)"
+            )
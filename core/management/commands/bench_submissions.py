@@ -0,0 +1,147 @@
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+from django.utils import timezone
+
+from core.benchmarks import (
+    StatementCounter, sample_behavioral_payload, sample_typing_payload, temporary_candidates,
+)
+from core.models import TypingTest, TypingTestPhase, BehavioralProfile, TestProgress
+from core.submission_queue import drain, enqueue_submission, journal
+from core.submissions import save_typing_submission, save_behavioral_submission
+from core.summary import refresh_candidate_summary
+
+
+def legacy_save(user, typing_data, behavioral_data):
+    """Caminho de escrita anterior: um autocommit por comando, sem transação.
+
+    Inclui o recálculo do ``CandidateSummary`` para que as duas estratégias
+    mantenham o mesmo modelo de leitura.
+    """
+    wpm_values = [float(phase['wpm']) for phase in typing_data]
+    accuracy_values = [float(phase['accuracy']) for phase in typing_data]
+    typing_test = TypingTest.objects.create(
+        user=user,
+        wpm_average=sum(wpm_values) / len(wpm_values),
+        accuracy_average=sum(accuracy_values) / len(accuracy_values),
+    )
+    for phase_data in typing_data:
+        TypingTestPhase.objects.create(
+            typing_test=typing_test,
+            phase_number=phase_data['phase'],
+            original_phrase=phase_data['originalPhrase'],
+            typed_text=phase_data['typedText'],
+            time_seconds=float(phase_data['timeSeconds']),
+            wpm=float(phase_data['wpm']),
+            accuracy=float(phase_data['accuracy']),
+        )
+    progress, created = TestProgress.objects.get_or_create(user=user)
+    progress.typing_test_completed = True
+    progress.typing_test_completed_at = timezone.now()
+    progress.save()
+    refresh_candidate_summary(user.pk)
+
+    scores = behavioral_data['scores']
+    BehavioralProfile.objects.create(
+        user=user,
+        quadrant_a_score=scores['A'],
+        quadrant_b_score=scores['B'],
+        quadrant_c_score=scores['C'],
+        quadrant_d_score=scores['D'],
+        dominant_quadrant=scores['dominant'],
+        answers=behavioral_data['answers'],
+    )
+    progress, created = TestProgress.objects.get_or_create(user=user)
+    progress.behavioral_test_completed = True
+    progress.behavioral_test_completed_at = timezone.now()
+    progress.save()
+    refresh_candidate_summary(user.pk)
+
+
+def atomic_save(user, typing_data, behavioral_data):
+    save_typing_submission(user, typing_data)
+    save_behavioral_submission(user, behavioral_data['answers'])
+
+
+def queued_save(user, typing_data, behavioral_data):
+    """Caminho da fila: só a validação e o diário; a gravação é medida à parte"""
+    enqueue_submission('typing', user, typing_data)
+    enqueue_submission('behavioral', user, behavioral_data['answers'])
+
+
+STRATEGIES = {
+    'legacy': legacy_save,
+    'atomic': atomic_save,
+    'fila': queued_save,
+}
+
+
+class Command(BaseCommand):
+    help = "Mede submissões e escritas por segundo dos endpoints de salvamento (antes/depois)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--candidates', type=int, default=200, help="Candidatos por estratégia")
+        parser.add_argument('--threads', type=int, default=1, help="Candidatos submetendo simultaneamente")
+        parser.add_argument('--strategy', choices=[*STRATEGIES, 'all'], default='all')
+
+    def handle(self, *args, **options):
+        names = list(STRATEGIES) if options['strategy'] == 'all' else [options['strategy']]
+        behavioral_data = sample_behavioral_payload()
+
+        for name in names:
+            strategy = STRATEGIES[name]
+            counter = StatementCounter()
+            errors = []
+
+            def submit(user):
+                try:
+                    with connection.execute_wrapper(counter):
+                        strategy(user, sample_typing_payload(user.pk), behavioral_data)
+                except Exception as e:
+                    errors.append(e)
+                finally:
+                    if options['threads'] > 1:
+                        connection.close()
+
+            with tempfile.TemporaryDirectory() as directory, override_settings(
+                SUBMISSION_QUEUE_PATH=str(Path(directory) / 'fila.sqlite3'), SUBMISSION_QUEUE_WORKER='external',
+            ), temporary_candidates(options['candidates']) as users:
+                start = time.perf_counter()
+                if options['threads'] > 1:
+                    with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+                        list(pool.map(submit, users))
+                else:
+                    for user in users:
+                        submit(user)
+                elapsed = time.perf_counter() - start
+
+                if name == 'fila':
+                    # As respostas já foram dadas; falta gravar o diário no banco
+                    drain_counter = StatementCounter()
+                    drain_start = time.perf_counter()
+                    with connection.execute_wrapper(drain_counter):
+                        while drain():
+                            pass
+                    drain_elapsed = time.perf_counter() - drain_start
+                    journal().close()
+
+            done = len(users) - len(errors)
+            self.stdout.write(
+                f"{name:>7}: {done / elapsed:8.1f} candidatos/s | "
+                f"{counter.writes / elapsed:8.1f} escritas/s | "
+                f"{counter.writes / max(len(users), 1):4.1f} escritas e "
+                f"{counter.statements / max(len(users), 1):4.1f} comandos por candidato | "
+                f"{len(errors)} erros em {elapsed:.2f}s"
+            )
+            if name == 'fila':
+                self.stdout.write(
+                    f"         drenagem: {done / drain_elapsed:8.1f} candidatos/s | "
+                    f"{drain_counter.writes / max(len(users), 1):4.1f} escritas por candidato no banco em {drain_elapsed:.2f}s"
+                )
+            if errors:
+                self.stdout.write(self.style.WARNING(f"         primeiro erro: {errors[0]}"))
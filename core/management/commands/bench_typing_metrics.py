@@ -0,0 +1,69 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import SAMPLE_PHRASES
+from core.typing_metrics import edit_distance, phase_metrics
+
+
+def naive_edit_distance(a, b):
+    """Programação dinâmica O(n·m) clássica, usada como referência"""
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        current = [i] + [0] * len(b)
+        for j, cb in enumerate(b, start=1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+        previous = current
+    return previous[-1]
+
+
+def _typo(phrase, rng, rate):
+    chars = list(phrase)
+    for i in range(len(chars)):
+        if rng.random() < rate:
+            chars[i] = rng.choice('abcdefghijklmnopqrstuvwxyzáéç ')
+    if rng.random() < rate * 5:
+        del chars[rng.randrange(len(chars))]
+    return ''.join(chars)
+
+
+class Command(BaseCommand):
+    help = "Mede a vazão do motor de métricas de digitação (Myers bit-paralelo vs. DP ingênua)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--phases', type=int, default=20000, help="Quantidade de fases sintéticas")
+        parser.add_argument('--repeat', type=int, default=1, help="Repete cada frase N vezes (textos mais longos)")
+        parser.add_argument('--typo-rate', type=float, default=0.05)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        phrases = [' '.join([phrase] * options['repeat']) for phrase in SAMPLE_PHRASES]
+        pairs = []
+        for i in range(options['phases']):
+            original = phrases[i % len(phrases)]
+            pairs.append((original, _typo(original, rng, options['typo_rate'])))
+
+        start = time.perf_counter()
+        fast = [edit_distance(original, typed) for original, typed in pairs]
+        myers_elapsed = time.perf_counter() - start
+
+        sample = pairs[:max(1, len(pairs) // 20)]
+        start = time.perf_counter()
+        slow = [naive_edit_distance(original, typed) for original, typed in sample]
+        naive_elapsed = (time.perf_counter() - start) * len(pairs) / len(sample)
+
+        if fast[:len(slow)] != slow:
+            self.stderr.write(self.style.ERROR("Divergência entre Myers e a DP de referência"))
+
+        start = time.perf_counter()
+        for original, typed in pairs:
+            phase_metrics(original, typed, 12.5)
+        metrics_elapsed = time.perf_counter() - start
+
+        n = len(pairs)
+        self.stdout.write(f"frase média: {sum(len(p) for p in phrases) / len(phrases):.0f} caracteres, {n} fases")
+        self.stdout.write(f"distância (Myers):        {n / myers_elapsed:10.0f} fases/s")
+        self.stdout.write(f"distância (DP ingênua):   {n / naive_elapsed:10.0f} fases/s (estimado com {len(sample)} fases)")
+        self.stdout.write(f"métricas completas:       {n / metrics_elapsed:10.0f} fases/s")
@@ -0,0 +1,70 @@
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from core.submission_queue import drain, journal
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Grava no banco as submissões da fila (SUBMISSION_QUEUE_PATH) em lotes; "
+        "com SUBMISSION_QUEUE_WORKER=external, roda como processo dedicado"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.SUBMISSION_QUEUE_BATCH_SIZE,
+            help="Submissões gravadas por transação",
+        )
+        parser.add_argument('--once', action='store_true', help="Esvaziar a fila e sair, em vez de aguardar novas entradas")
+        parser.add_argument('--status', action='store_true', help="Apenas mostrar profundidade e atraso da fila")
+        parser.add_argument(
+            '--purge', action='store_true',
+            help="Apagar do diário as entradas aplicadas há mais de SUBMISSION_QUEUE_RETENTION_DAYS",
+        )
+
+    def _drain_all(self, batch_size):
+        total = 0
+        while True:
+            processed = drain(batch_size)
+            total += processed
+            if processed < batch_size:
+                return total
+
+    def handle(self, *args, **options):
+        queue = journal()
+        if queue is None:
+            raise CommandError("A fila de submissões está desligada (SUBMISSION_QUEUE_ENABLED) e não há diário")
+        if options['status']:
+            self.stdout.write(json.dumps(queue.metrics(), indent=2))
+            return
+        if options['purge']:
+            deleted = queue.purge(settings.SUBMISSION_QUEUE_RETENTION_DAYS)
+            self.stdout.write(f"{deleted} entradas aplicadas apagadas do diário")
+            return
+
+        batch_size = options['batch_size']
+        while True:
+            start = time.perf_counter()
+            try:
+                processed = self._drain_all(batch_size)
+            except Exception:
+                if options['once']:
+                    raise
+                # Ex.: bloqueio do banco esgotado; o lote já voltou para a fila
+                # (``drain``) e é tentado de novo após o intervalo
+                logger.exception("Falha ao drenar a fila de submissões")
+                processed = 0
+            if processed:
+                elapsed = time.perf_counter() - start
+                self.stdout.write(f"{processed} submissões processadas em {elapsed:.2f}s (lotes de {batch_size})")
+            if options['once']:
+                return
+            close_old_connections()
+            time.sleep(settings.SUBMISSION_QUEUE_POLL_SECONDS)
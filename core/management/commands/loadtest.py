@@ -0,0 +1,61 @@
+import asyncio
+import json
+import secrets
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.benchmarks import temporary_candidates
+from core.loadtest import parse_stages, run
+from users.models import Users as User
+
+
+class Command(BaseCommand):
+    help = (
+        "Simula uma onda de candidatos e recrutadores contra um servidor em execução "
+        "e gera um relatório JSON por endpoint"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help="Servidor testado (mesmo banco deste comando)")
+        parser.add_argument(
+            '--stage', action='append', dest='stages', metavar='CANDIDATOS:SEGUNDOS',
+            help="Rampa linear até CANDIDATOS simultâneos em SEGUNDOS (repetível; padrão 10:20 50:40 50:30 0:10)",
+        )
+        parser.add_argument('--recruiters', type=int, default=2, help="Recrutadores simultâneos")
+        parser.add_argument('--think', type=float, default=0.0, help="Pausa máxima (s) entre as ações de cada usuário")
+        parser.add_argument('--output', help="Arquivo para o relatório JSON (padrão: saída padrão)")
+
+    def handle(self, *args, **options):
+        stages = parse_stages(options['stages'] or ['10:20', '50:40', '50:30', '0:10'])
+        peak = max(users for users, _ in stages)
+        password = secrets.token_urlsafe(12)
+
+        with temporary_candidates(peak, prefix='carga') as candidates, \
+                temporary_candidates(options['recruiters'], prefix='recrutador') as recruiters:
+            # Um único hash para todos: o custo do PBKDF2 fica no servidor, no login
+            User.objects.filter(pk__in=[user.pk for user in [*candidates, *recruiters]]).update(
+                password=make_password(password),
+            )
+            started_at = timezone.now()
+            report = asyncio.run(run(
+                options['url'],
+                stages,
+                [user.email for user in candidates],
+                [user.email for user in recruiters],
+                password,
+                think_time=options['think'],
+            ))
+
+        report = {'started_at': started_at.isoformat(), **report}
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.stdout.write(
+                f"{report['requests']} requisições, {report['throughput']} req/s, "
+                f"{report['error_rate']:.2%} de erros; relatório em {options['output']}"
+            )
+        else:
+            self.stdout.write(output)
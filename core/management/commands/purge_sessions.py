@@ -0,0 +1,22 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.sessions import SessionStore
+
+
+class Command(BaseCommand):
+    help = "Apaga as sessões vencidas de django_session em lotes curtos, sem segurar a trava de escrita do SQLite"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.SESSION_PURGE_BATCH_SIZE, help="Sessões apagadas por DELETE",
+        )
+        parser.add_argument('--pause', type=float, default=0.05, help="Pausa (segundos) entre os lotes")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        deleted = SessionStore.clear_expired(options['batch_size'], options['pause'])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f"{deleted} sessões vencidas apagadas em {elapsed:.2f}s (lotes de {options['batch_size']})")
@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.search import install_search_triggers, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Reindexa a busca textual de candidatos (FTS5) e recria os gatilhos que faltarem"
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        install_search_triggers()
+        total = rebuild_search_index()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f"{total} usuários indexados em {elapsed:.2f}s"))
@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.summary import rebuild_candidate_summaries
+
+
+class Command(BaseCommand):
+    help = "Reconstrói do zero a tabela de resumo dos candidatos (CandidateSummary)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Quantidade de linhas por lote de inserção")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        total = rebuild_candidate_summaries(batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f"{total} resumos reconstruídos em {elapsed:.2f}s"))
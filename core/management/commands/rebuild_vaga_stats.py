@@ -0,0 +1,15 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.vaga_stats import rebuild_vaga_statistics
+
+
+class Command(BaseCommand):
+    help = "Recalcula do zero as estatísticas e histogramas por vaga a partir do CandidateSummary"
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        total = rebuild_vaga_statistics()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f"{total} estatísticas (vaga, métrica) recalculadas em {elapsed:.2f}s"))
@@ -0,0 +1,93 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Avg, OuterRef, Subquery
+
+from core.models import TypingTest, TypingTestPhase
+from core.page_cache import invalidate_all_pages
+from core.phrases import normalized_wpm
+from core.summary import rebuild_candidate_summaries
+from core.typing_metrics import phase_metrics
+
+METRIC_FIELDS = ['wpm', 'accuracy', 'word_accuracy', 'normalized_wpm']
+
+
+def _phase_average(field):
+    return Subquery(
+        TypingTestPhase.objects.filter(typing_test=OuterRef('pk'))
+        .values('typing_test')
+        .annotate(value=Avg(field))
+        .values('value')
+    )
+
+
+class Command(BaseCommand):
+    help = "Recalcula no servidor WPM (bruto e normalizado) e acurácia de todas as fases e as médias dos testes de digitação"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help="Fases processadas por lote")
+        parser.add_argument('--skip-summary', action='store_true', help="Não reconstruir o CandidateSummary ao final")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        start = time.perf_counter()
+        last_id = 0
+        processed = changed = 0
+        tests = set()
+
+        while True:
+            # Paginação por id: cada lote é uma busca por faixa na chave primária
+            batch = list(
+                TypingTestPhase.objects.filter(pk__gt=last_id)
+                .order_by('pk')
+                # Fases arquivadas leem frase e texto do frame sem uma consulta por fase
+                .select_related('archive')
+                .only(
+                    'id', 'typing_test_id', 'original_phrase', 'typed_text', 'time_seconds',
+                    'phrase_id', 'phrase_version', 'archive__frame', *METRIC_FIELDS,
+                )
+                [:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1].pk
+
+            dirty = []
+            for phase in batch:
+                metrics = phase_metrics(phase.original_phrase, phase.typed_text, phase.time_seconds)
+                normalized = (
+                    normalized_wpm(metrics.wpm, phase.phrase_version, phase.phrase_id)
+                    if phase.phrase_id is not None else None
+                )
+                current = (phase.wpm, phase.accuracy, phase.word_accuracy, phase.normalized_wpm)
+                if current != (metrics.wpm, metrics.accuracy, metrics.word_accuracy, normalized):
+                    phase.wpm, phase.accuracy, phase.word_accuracy = metrics.wpm, metrics.accuracy, metrics.word_accuracy
+                    phase.normalized_wpm = normalized
+                    dirty.append(phase)
+
+            if dirty:
+                test_ids = {phase.typing_test_id for phase in dirty}
+                with transaction.atomic():
+                    TypingTestPhase.objects.bulk_update(dirty, METRIC_FIELDS, batch_size=500)
+                    TypingTest.objects.filter(pk__in=test_ids).update(
+                        wpm_average=_phase_average('wpm'),
+                        accuracy_average=_phase_average('accuracy'),
+                    )
+                    invalidate_all_pages()
+                tests.update(test_ids)
+
+            processed += len(batch)
+            changed += len(dirty)
+
+        elapsed = time.perf_counter() - start
+        rate = processed / elapsed if elapsed else 0
+        self.stdout.write(
+            f"{processed} fases processadas em {elapsed:.2f}s ({rate:.0f} fases/s); "
+            f"{changed} fases e {len(tests)} testes alterados"
+        )
+
+        if tests and not options['skip_summary']:
+            total = rebuild_candidate_summaries()
+            self.stdout.write(f"{total} resumos de candidatos reconstruídos")
+        self.stdout.write(self.style.SUCCESS("Recálculo concluído"))
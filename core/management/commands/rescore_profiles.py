@@ -0,0 +1,91 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.answers import packed_version, unpack_answers
+from core.models import BehavioralProfile
+from core.page_cache import invalidate_all_pages
+from core.scoring import QUESTION_BANK_VERSION, InvalidAnswers, score_matrix
+from core.summary import rebuild_candidate_summaries
+
+SCORE_FIELDS = ['quadrant_a_score', 'quadrant_b_score', 'quadrant_c_score', 'quadrant_d_score', 'dominant_quadrant']
+
+
+class Command(BaseCommand):
+    help = "Repontua todos os perfis comportamentais a partir das respostas gravadas"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000, help="Perfis pontuados por lote")
+        parser.add_argument('--dry-run', action='store_true', help="Apenas contar as alterações")
+        parser.add_argument('--skip-summary', action='store_true', help="Não reconstruir o CandidateSummary ao final")
+
+    def _flush(self, chunk, dry_run):
+        """Pontua um lote inteiro de uma vez e grava apenas as linhas alteradas.
+
+        Retorna ``(alterados, inválidos, de outra versão)``.
+        """
+        vectors, rows, invalid, other_version = [], [], 0, 0
+        for row in chunk:
+            # As questões e os quadrantes são os da versão atual; respostas de
+            # outra versão do banco (byte 0) não se pontuam com eles, mesmo
+            # que o número de questões seja o mesmo
+            if packed_version(row[-1]) != QUESTION_BANK_VERSION:
+                other_version += 1
+                continue
+            try:
+                vector = unpack_answers(row[-1])
+            except InvalidAnswers:
+                invalid += 1
+                continue
+            # Perfis anteriores à validação podem ter questões sem resposta (0)
+            if 0 in vector:
+                invalid += 1
+                continue
+            vectors.append(vector)
+            rows.append(row)
+
+        changed = []
+        for (pk, *current, _packed), scores in zip(rows, score_matrix(vectors)):
+            new = [scores.A, scores.B, scores.C, scores.D, scores.dominant]
+            if current != new:
+                changed.append(BehavioralProfile(pk=pk, **dict(zip(SCORE_FIELDS, new))))
+
+        if changed and not dry_run:
+            with transaction.atomic():
+                BehavioralProfile.objects.bulk_update(changed, SCORE_FIELDS, batch_size=500)
+                invalidate_all_pages()
+        return len(changed), invalid, other_version
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        chunk_size = options['chunk_size']
+        processed = changed = invalid = other_version = 0
+
+        rows = BehavioralProfile.objects.order_by('pk').values_list('pk', *SCORE_FIELDS, 'packed_answers')
+        chunk = []
+        for row in rows.iterator(chunk_size=chunk_size):
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                c, i, o = self._flush(chunk, options['dry_run'])
+                processed, changed, invalid, other_version = (
+                    processed + len(chunk), changed + c, invalid + i, other_version + o
+                )
+                chunk = []
+        if chunk:
+            c, i, o = self._flush(chunk, options['dry_run'])
+            processed, changed, invalid, other_version = (
+                processed + len(chunk), changed + c, invalid + i, other_version + o
+            )
+
+        elapsed = time.perf_counter() - start
+        verb = "seriam alterados" if options['dry_run'] else "alterados"
+        self.stdout.write(
+            f"{processed} perfis processados em {elapsed:.2f}s; {changed} {verb}; "
+            f"{invalid} com respostas inválidas ignorados; "
+            f"{other_version} de outra versão do banco de questões ignorados"
+        )
+
+        if changed and not options['dry_run'] and not options['skip_summary']:
+            total = rebuild_candidate_summaries()
+            self.stdout.write(f"{total} resumos de candidatos reconstruídos")
@@ -0,0 +1,265 @@
+"""Índice de vizinhos mais próximos para busca de candidatos por aderência.
+
+Cada candidato é um ponto em seis dimensões: os quatro scores de quadrante e
+as médias de WPM e acurácia do último teste, todos lidos do
+``CandidateSummary`` e normalizados para a faixa 0–1. Há uma KD-tree por vaga
+para responder "os k candidatos mais próximos deste perfil ideal" sem varrer
+todos os perfis.
+
+O índice vive na memória de cada processo. A cada consulta ele aplica
+incrementalmente os resumos alterados desde a última sincronização (pela
+coluna indexada ``updated_at``): novos pontos entram em um buffer varrido
+linearmente, pontos substituídos viram lápides na árvore, e a árvore da vaga
+é reconstruída quando o buffer cresce. Resumos removidos não deixam linha para
+a sincronização ler: quando a contagem de resumos fica abaixo da conhecida, os
+ids ausentes saem do índice. Uma reconstrução completa periódica refaz tudo.
+"""
+import heapq
+import math
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+
+from .models import CandidateSummary
+
+FEATURES = (
+    'quadrant_a_score',
+    'quadrant_b_score',
+    'quadrant_c_score',
+    'quadrant_d_score',
+    'wpm_average',
+    'accuracy_average',
+)
+# Divisores que levam cada dimensão para ~0–1 (WPM acima de 100 é raro)
+SCALES = (100.0, 100.0, 100.0, 100.0, 100.0, 100.0)
+LEAF_SIZE = 16
+# Janela de sobreposição da sincronização, para transações que gravaram
+# updated_at antes do watermark mas fizeram commit depois
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+def normalize(values):
+    return tuple(float(value) / scale for value, scale in zip(values, SCALES))
+
+
+def _squared_distance(a, b):
+    return sum((x - y) * (x - y) for x, y in zip(a, b))
+
+
+class KDTree:
+    """KD-tree estática sobre pontos de dimensão fixa"""
+
+    def __init__(self, points, ids):
+        self.points = points
+        self.ids = ids
+        # Nós: (início, fim, dimensão, valor de corte, esquerdo, direito); folhas têm dimensão -1
+        self.nodes = []
+        self.order = list(range(len(points)))
+        if points:
+            self._build()
+
+    def _build(self):
+        dims = len(self.points[0])
+        columns = list(zip(*self.points))
+        stack = [(0, len(self.order), None, None)]
+        while stack:
+            lo, hi, parent, side = stack.pop()
+            node_id = len(self.nodes)
+            if parent is not None:
+                start, end, dim, split, left, right = self.nodes[parent]
+                self.nodes[parent] = (start, end, dim, split, node_id, right) if side == 0 else (start, end, dim, split, left, node_id)
+
+            if hi - lo <= LEAF_SIZE:
+                self.nodes.append((lo, hi, -1, 0.0, -1, -1))
+                continue
+
+            # Corta na dimensão de maior amplitude, pela mediana
+            segment = self.order[lo:hi]
+            best_spread = -1.0
+            for d in range(dims):
+                column = columns[d]
+                values = [column[i] for i in segment]
+                spread = max(values) - min(values)
+                if spread > best_spread:
+                    best_spread, dim = spread, d
+            segment.sort(key=columns[dim].__getitem__)
+            self.order[lo:hi] = segment
+            mid = (lo + hi) // 2
+            self.nodes.append((lo, hi, dim, columns[dim][self.order[mid]], -1, -1))
+            stack.append((mid, hi, node_id, 1))
+            stack.append((lo, mid, node_id, 0))
+
+    def query(self, target, k, heap, skip):
+        """Acrescenta ao max-heap ``heap`` (distâncias negadas) os k mais próximos"""
+        if not self.nodes:
+            return
+        points, ids, order, nodes = self.points, self.ids, self.order, self.nodes
+        stack = [(0, 0.0)]
+        while stack:
+            node_id, bound = stack.pop()
+            if len(heap) >= k and bound > -heap[0][0]:
+                continue
+            lo, hi, dim, split, left, right = nodes[node_id]
+            if dim < 0:
+                for i in order[lo:hi]:
+                    pid = ids[i]
+                    if pid in skip:
+                        continue
+                    d = _squared_distance(points[i], target)
+                    if len(heap) < k:
+                        heapq.heappush(heap, (-d, pid))
+                    elif d < -heap[0][0]:
+                        heapq.heapreplace(heap, (-d, pid))
+                continue
+            diff = target[dim] - split
+            near, far = (left, right) if diff < 0 else (right, left)
+            # O lado distante entra primeiro na pilha para ser visitado por último
+            stack.append((far, max(bound, diff * diff)))
+            stack.append((near, bound))
+
+
+class VagaIndex:
+    """Árvore estática + buffer de alterações recentes de uma vaga"""
+
+    def __init__(self, entries=()):
+        self.rebuild(dict(entries))
+
+    def rebuild(self, entries):
+        ids = list(entries)
+        self.tree = KDTree([entries[pid] for pid in ids], ids)
+        self.in_tree = set(ids)
+        self.stale = set()
+        self.pending = {}
+
+    def __len__(self):
+        return len(self.in_tree) - len(self.stale) + len(self.pending)
+
+    def live_entries(self):
+        entries = {
+            pid: point for pid, point in zip(self.tree.ids, self.tree.points) if pid not in self.stale
+        }
+        entries.update(self.pending)
+        return entries
+
+    def remove(self, pid):
+        self.pending.pop(pid, None)
+        if pid in self.in_tree:
+            self.stale.add(pid)
+
+    def upsert(self, pid, point):
+        self.remove(pid)
+        self.pending[pid] = point
+        # Reconstruir quando varrer o buffer passar a custar mais que a árvore amortizada
+        if len(self.pending) + len(self.stale) > max(512, 8 * math.isqrt(len(self.in_tree))):
+            self.rebuild(self.live_entries())
+
+    def query(self, target, k, heap):
+        self.tree.query(target, k, heap, self.stale)
+        for pid, point in self.pending.items():
+            d = _squared_distance(point, target)
+            if len(heap) < k:
+                heapq.heappush(heap, (-d, pid))
+            elif d < -heap[0][0]:
+                heapq.heapreplace(heap, (-d, pid))
+
+
+class CandidateMatcher:
+    """Conjunto de índices por vaga sincronizado com o ``CandidateSummary``"""
+
+    def __init__(self, rebuild_seconds=None):
+        self.rebuild_seconds = rebuild_seconds
+        self.lock = threading.Lock()
+        self.indexes = {}
+        self.location = {}
+        # Todos os resumos vistos, inclusive os sem ponto (scores incompletos)
+        self.known = set()
+        self.watermark = None
+        self.built_at = None
+
+    def _rows(self, queryset):
+        return queryset.values_list('user_id', 'vaga', 'updated_at', *FEATURES)
+
+    def _point(self, row):
+        values = row[3:]
+        if any(value is None for value in values):
+            return None
+        return normalize(values)
+
+    def rebuild(self):
+        """Reconstrói todos os índices a partir do banco"""
+        grouped = {}
+        location = {}
+        known = set()
+        watermark = None
+        for row in self._rows(CandidateSummary.objects.all()).iterator(chunk_size=5000):
+            watermark = row[2] if watermark is None or row[2] > watermark else watermark
+            known.add(row[0])
+            point = self._point(row)
+            if point is not None:
+                grouped.setdefault(row[1], {})[row[0]] = point
+                location[row[0]] = row[1]
+        self.indexes = {vaga: VagaIndex(entries.items()) for vaga, entries in grouped.items()}
+        self.location = location
+        self.known = known
+        self.watermark = watermark
+        self.built_at = time.monotonic()
+
+    def _remove(self, pid):
+        if pid in self.location:
+            index = self.indexes.get(self.location.pop(pid))
+            if index is not None:
+                index.remove(pid)
+
+    def apply(self, row):
+        """Aplica um resumo alterado ao índice"""
+        pid, vaga = row[0], row[1]
+        self.known.add(pid)
+        self._remove(pid)
+        point = self._point(row)
+        if point is not None:
+            self.indexes.setdefault(vaga, VagaIndex()).upsert(pid, point)
+            self.location[pid] = vaga
+
+    def sync(self):
+        rebuild_seconds = self.rebuild_seconds
+        if rebuild_seconds is None:
+            rebuild_seconds = getattr(settings, 'MATCH_INDEX_REBUILD_SECONDS', 900)
+        with self.lock:
+            if self.built_at is None or time.monotonic() - self.built_at > rebuild_seconds:
+                self.rebuild()
+                return
+            if self.watermark is None:
+                changed = CandidateSummary.objects.all()
+            else:
+                changed = CandidateSummary.objects.filter(updated_at__gte=self.watermark - SYNC_OVERLAP)
+            for row in self._rows(changed.order_by('updated_at')):
+                self.apply(row)
+                if self.watermark is None or row[2] > self.watermark:
+                    self.watermark = row[2]
+            # A contagem usa um índice; os ids só são lidos quando algo saiu
+            if CandidateSummary.objects.count() < len(self.known):
+                existing = set(CandidateSummary.objects.values_list('user_id', flat=True))
+                for pid in self.known - existing:
+                    self._remove(pid)
+                self.known &= existing
+
+    def top_k(self, ideal, vaga=None, k=10):
+        """Retorna ``[(distância, user_id), ...]`` dos k candidatos mais próximos.
+
+        ``ideal`` tem os seis valores de ``FEATURES`` nas unidades originais.
+        Sem ``vaga``, considera candidatos de todas as vagas.
+        """
+        self.sync()
+        target = normalize(ideal)
+        heap = []
+        with self.lock:
+            indexes = self.indexes.values() if vaga is None else [self.indexes.get(vaga)]
+            for index in indexes:
+                if index is not None:
+                    index.query(target, k, heap)
+        return [(math.sqrt(-d), pid) for d, pid in sorted(heap, reverse=True)]
+
+
+candidate_matcher = CandidateMatcher()
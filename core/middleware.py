@@ -0,0 +1,88 @@
+import random
+import time
+from functools import partial
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.utils.functional import SimpleLazyObject
+
+from django.conf import settings
+
+from .profiling import finish_profile, record_request, start_profile
+from .progress import atest_progress, get_test_progress
+
+
+class ProfilingMiddleware:
+    """Mede cada requisição e anota o cabeçalho ``Server-Timing``.
+
+    Uma amostra (``PROFILING_SAMPLE_RATE``) recebe o perfil completo de SQL e
+    templates; nas demais só o tempo total é medido. Deve vir logo depois do
+    WhiteNoise, para medir toda requisição que chega às views.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _sampled(self):
+        return random.random() < settings.PROFILING_SAMPLE_RATE
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        if not self._sampled():
+            response = self.get_response(request)
+            record_request(request, response, time.perf_counter() - start)
+            return response
+        profile, token = start_profile()
+        try:
+            response = self.get_response(request)
+        finally:
+            finish_profile(token)
+        record_request(request, response, time.perf_counter() - start, profile)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        if not self._sampled():
+            response = await self.get_response(request)
+            record_request(request, response, time.perf_counter() - start)
+            return response
+        profile, token = start_profile()
+        try:
+            response = await self.get_response(request)
+        finally:
+            finish_profile(token)
+        record_request(request, response, time.perf_counter() - start, profile)
+        return response
+
+
+class TestProgressMiddleware:
+    """Expõe ``request.test_progress``, carregado apenas quando usado.
+
+    Em views assíncronas, use ``await request.atest_progress()``.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _attach(self, request):
+        request.test_progress = SimpleLazyObject(lambda: get_test_progress(request))
+        request.atest_progress = partial(atest_progress, request)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        self._attach(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        self._attach(request)
+        return await self.get_response(request)
@@ -0,0 +1,79 @@
+# Generated by Django 6.0.1 on 2026-10-18 10:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_summaries(apps, schema_editor):
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    TypingTest = apps.get_model('core', 'TypingTest')
+    BehavioralProfile = apps.get_model('core', 'BehavioralProfile')
+    TestProgress = apps.get_model('core', 'TestProgress')
+    CandidateSummary = apps.get_model('core', 'CandidateSummary')
+
+    summaries = []
+    for user in User.objects.all().iterator():
+        typing_test = TypingTest.objects.filter(user=user).order_by('-created_at', '-id').first()
+        profile = BehavioralProfile.objects.filter(user=user).order_by('-created_at', '-id').first()
+        progress = TestProgress.objects.filter(user=user).first()
+        summaries.append(CandidateSummary(
+            user=user,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            vaga=user.vaga,
+            typing_test_created_at=typing_test.created_at if typing_test else None,
+            wpm_average=typing_test.wpm_average if typing_test else None,
+            accuracy_average=typing_test.accuracy_average if typing_test else None,
+            behavioral_profile_created_at=profile.created_at if profile else None,
+            quadrant_a_score=profile.quadrant_a_score if profile else None,
+            quadrant_b_score=profile.quadrant_b_score if profile else None,
+            quadrant_c_score=profile.quadrant_c_score if profile else None,
+            quadrant_d_score=profile.quadrant_d_score if profile else None,
+            dominant_quadrant=profile.dominant_quadrant if profile else None,
+            typing_test_completed=progress.typing_test_completed if progress else False,
+            typing_test_completed_at=progress.typing_test_completed_at if progress else None,
+            behavioral_test_completed=progress.behavioral_test_completed if progress else False,
+            behavioral_test_completed_at=progress.behavioral_test_completed_at if progress else None,
+        ))
+    CandidateSummary.objects.bulk_create(summaries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_behavioralprofile_testprogress'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CandidateSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_name', models.CharField(blank=True, max_length=150)),
+                ('last_name', models.CharField(blank=True, max_length=150)),
+                ('vaga', models.CharField(blank=True, max_length=100, null=True)),
+                ('typing_test_created_at', models.DateTimeField(blank=True, help_text='Data do último teste de digitação', null=True)),
+                ('wpm_average', models.FloatField(blank=True, help_text='Velocidade média do último teste', null=True)),
+                ('accuracy_average', models.FloatField(blank=True, help_text='Acurácia média do último teste', null=True)),
+                ('behavioral_profile_created_at', models.DateTimeField(blank=True, help_text='Data do último perfil comportamental', null=True)),
+                ('quadrant_a_score', models.IntegerField(blank=True, null=True)),
+                ('quadrant_b_score', models.IntegerField(blank=True, null=True)),
+                ('quadrant_c_score', models.IntegerField(blank=True, null=True)),
+                ('quadrant_d_score', models.IntegerField(blank=True, null=True)),
+                ('dominant_quadrant', models.CharField(blank=True, choices=[('A', 'Pensador Analítico'), ('B', 'Pensador Prático'), ('C', 'Pensador Relacional'), ('D', 'Pensador Inovador')], max_length=1, null=True)),
+                ('typing_test_completed', models.BooleanField(default=False)),
+                ('typing_test_completed_at', models.DateTimeField(blank=True, null=True)),
+                ('behavioral_test_completed', models.BooleanField(default=False)),
+                ('behavioral_test_completed_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='candidate_summary', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Resumo do Candidato',
+                'verbose_name_plural': 'Resumos dos Candidatos',
+            },
+        ),
+        migrations.RunPython(populate_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0.1 on 2026-10-18 10:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_candidatesummary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='candidatesummary',
+            index=models.Index(fields=['typing_test_completed_at', 'id'], name='summary_completed_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='candidatesummary',
+            index=models.Index(fields=['wpm_average', 'id'], name='summary_wpm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='candidatesummary',
+            index=models.Index(fields=['accuracy_average', 'id'], name='summary_accuracy_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 10:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_candidatesummary_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='typingtestphase',
+            name='word_accuracy',
+            field=models.FloatField(blank=True, help_text='Acurácia por palavra em percentual', null=True),
+        ),
+    ]
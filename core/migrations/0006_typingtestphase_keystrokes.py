@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 10:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_typingtestphase_word_accuracy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='typingtestphase',
+            name='keystrokes',
+            field=models.BinaryField(blank=True, help_text='Fluxo de teclas codificado (core.keystrokes)', null=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.1 on 2026-10-18 10:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_typingtestphase_keystrokes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='candidatesummary',
+            index=models.Index(fields=['updated_at'], name='summary_updated_at_idx'),
+        ),
+    ]
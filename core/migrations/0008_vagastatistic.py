@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-18 10:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_candidatesummary_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VagaStatistic',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('vaga', models.CharField(blank=True, default='', help_text='Vaga (vazio para candidatos sem vaga)', max_length=100)),
+                ('metric', models.CharField(choices=[('wpm', 'Velocidade (WPM)'), ('accuracy', 'Acurácia'), ('quadrant_a', 'Quadrante A'), ('quadrant_b', 'Quadrante B'), ('quadrant_c', 'Quadrante C'), ('quadrant_d', 'Quadrante D')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('mean', models.FloatField(default=0)),
+                ('m2', models.FloatField(default=0, help_text='Soma dos quadrados dos desvios (Welford)')),
+                ('histogram', models.BinaryField(help_text='Histograma de largura fixa (core.vaga_stats)')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Estatística da Vaga',
+                'verbose_name_plural': 'Estatísticas das Vagas',
+                'unique_together': {('vaga', 'metric')},
+            },
+        ),
+    ]
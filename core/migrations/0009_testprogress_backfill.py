@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.db import migrations
+
+
+def create_missing_progress(apps, schema_editor):
+    """Cria o progresso dos usuários existentes que ainda não têm um"""
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    TestProgress = apps.get_model('core', 'TestProgress')
+    missing = User.objects.filter(test_progress__isnull=True).values_list('pk', flat=True)
+    TestProgress.objects.bulk_create(
+        [TestProgress(user_id=pk) for pk in missing.iterator()],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_vagastatistic'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(create_missing_progress, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_testprogress_backfill'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='behavioralprofile',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='behavioral_user_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='candidatesummary',
+            index=models.Index(fields=['vaga', 'typing_test_completed_at', 'id'], name='summary_vaga_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='candidatesummary',
+            index=models.Index(fields=['dominant_quadrant', 'typing_test_completed_at', 'id'], name='summary_quadrant_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testprogress',
+            index=models.Index(condition=models.Q(('typing_test_completed', True)), fields=['typing_test_completed_at'], name='progress_typing_done_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='typingtest',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='typingtest_user_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    from core.search import create_search_index
+    create_search_index(schema_editor.connection)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    from core.search import drop_search_index
+    drop_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+    """Tabela FTS5 da busca de candidatos (core.search), fora dos modelos do Django"""
+
+    dependencies = [
+        ('core', '0010_hot_path_indexes'),
+        # Os gatilhos e a carga inicial leem users_users.vaga
+        ('users', '0005_alter_users_perfil'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:31
+
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import Round
+
+
+def link_bank_phrases(apps, schema_editor):
+    """Liga as fases já gravadas às frases da versão 1, que eram as fixas do navegador"""
+    from core.phrases import FEATURES, PHRASE_BANKS
+    TypingTestPhase = apps.get_model('core', 'TypingTestPhase')
+    for phrase_id, text in PHRASE_BANKS[1].items():
+        TypingTestPhase.objects.filter(original_phrase=text, phrase_id__isnull=True).update(
+            phrase_id=phrase_id,
+            phrase_version=1,
+            normalized_wpm=Round(F('wpm') * FEATURES[1, phrase_id].difficulty, 1),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_candidatesearch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='typingtestphase',
+            name='normalized_wpm',
+            field=models.FloatField(blank=True, help_text='WPM ajustado pela dificuldade da frase', null=True),
+        ),
+        migrations.AddField(
+            model_name='typingtestphase',
+            name='phrase_id',
+            field=models.PositiveSmallIntegerField(blank=True, help_text='Id da frase no banco', null=True),
+        ),
+        migrations.AddField(
+            model_name='typingtestphase',
+            name='phrase_version',
+            field=models.PositiveSmallIntegerField(blank=True, help_text='Versão do banco de frases', null=True),
+        ),
+        migrations.RunPython(link_bank_phrases, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:36
+
+import core.archive
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_typingtestphase_phrase'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BehavioralProfileArchive',
+            fields=[
+                ('profile', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='archive', serialize=False, to='core.behavioralprofile')),
+                ('frame', models.BinaryField(help_text='Frame comprimido (core.archive)')),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Perfil Arquivado',
+                'verbose_name_plural': 'Perfis Arquivados',
+            },
+        ),
+        migrations.CreateModel(
+            name='TypingTestPhaseArchive',
+            fields=[
+                ('phase', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='archive', serialize=False, to='core.typingtestphase')),
+                ('frame', models.BinaryField(help_text='Frame comprimido (core.archive)')),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Fase Arquivada',
+                'verbose_name_plural': 'Fases Arquivadas',
+            },
+        ),
+        migrations.AlterField(
+            model_name='behavioralprofile',
+            name='answers',
+            field=core.archive.ArchivedJSONField(help_text='Respostas completas do teste', null=True),
+        ),
+        migrations.AlterField(
+            model_name='typingtestphase',
+            name='original_phrase',
+            field=core.archive.ArchivedTextField(help_text='Frase original a ser digitada', null=True),
+        ),
+        migrations.AlterField(
+            model_name='typingtestphase',
+            name='typed_text',
+            field=core.archive.ArchivedTextField(help_text='Texto digitado pelo usuário', null=True),
+        ),
+    ]
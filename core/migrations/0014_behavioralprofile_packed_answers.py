@@ -0,0 +1,91 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:10
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def _legacy_vector(answers):
+    """Vetor de respostas de uma lista JSON antiga; questões ausentes ou fora da
+    escala viram 0 (sem resposta) em vez de interromper a migração"""
+    from core.scoring import QUESTION_IDS, SCALE_MAX, SCALE_MIN
+    values = {}
+    for item in answers if isinstance(answers, list) else []:
+        try:
+            question_id, value = int(item['questionId']), item['answer']
+        except (KeyError, TypeError, ValueError):
+            continue
+        if isinstance(value, int) and not isinstance(value, bool) and SCALE_MIN <= value <= SCALE_MAX:
+            values.setdefault(question_id, value)
+    return [values.get(qid, 0) for qid in QUESTION_IDS]
+
+
+def pack_answers(apps, schema_editor):
+    """Codifica as respostas de todos os perfis, em lotes por id, inclusive as
+    que estavam no arquivo frio"""
+    from core.answers import pack_answers as pack
+    from core.archive import decompress_frame
+    BehavioralProfile = apps.get_model('core', 'BehavioralProfile')
+    last_id = 0
+    while True:
+        batch = list(
+            BehavioralProfile.objects.filter(pk__gt=last_id).order_by('pk')
+            .values_list('pk', 'answers', 'archive__frame')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        last_id = batch[-1][0]
+        profiles = []
+        for pk, answers, frame in batch:
+            if answers is None and frame is not None:
+                answers = decompress_frame(frame).get('answers')
+            profiles.append(BehavioralProfile(pk=pk, packed_answers=pack(_legacy_vector(answers))))
+        BehavioralProfile.objects.bulk_update(profiles, ['packed_answers'], batch_size=500)
+
+
+def unpack_answers(apps, schema_editor):
+    from core.answers import unpack_answers as unpack
+    from core.scoring import normalized_answers
+    BehavioralProfile = apps.get_model('core', 'BehavioralProfile')
+    last_id = 0
+    while True:
+        batch = list(
+            BehavioralProfile.objects.filter(pk__gt=last_id).order_by('pk')
+            .values_list('pk', 'packed_answers')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        last_id = batch[-1][0]
+        profiles = [
+            BehavioralProfile(pk=pk, answers=normalized_answers(unpack(packed)))
+            for pk, packed in batch
+        ]
+        BehavioralProfile.objects.bulk_update(profiles, ['answers'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_cold_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='behavioralprofile',
+            name='packed_answers',
+            field=models.BinaryField(null=True, help_text='Versão do banco de questões e respostas de 3 bits (core.answers)'),
+        ),
+        migrations.RunPython(pack_answers, unpack_answers),
+        migrations.AlterField(
+            model_name='behavioralprofile',
+            name='packed_answers',
+            field=models.BinaryField(help_text='Versão do banco de questões e respostas de 3 bits (core.answers)'),
+        ),
+        migrations.RemoveField(
+            model_name='behavioralprofile',
+            name='answers',
+        ),
+        migrations.DeleteModel(
+            name='BehavioralProfileArchive',
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_behavioralprofile_packed_answers'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AppliedSubmission',
+            fields=[
+                ('receipt', models.CharField(help_text='Recibo entregue ao navegador', max_length=32, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('typing', 'Teste de Digitação'), ('behavioral', 'Teste de Perfil Comportamental')], max_length=20)),
+                ('object_id', models.BigIntegerField(help_text='Id do TypingTest ou do BehavioralProfile criado')),
+                ('enqueued_at', models.DateTimeField(help_text='Quando o candidato enviou o teste')),
+                ('applied_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='applied_submissions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Submissão Aplicada',
+                'verbose_name_plural': 'Submissões Aplicadas',
+            },
+        ),
+    ]
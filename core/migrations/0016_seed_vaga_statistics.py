@@ -0,0 +1,81 @@
+# Generated by Django 6.0.1 on 2026-10-18 13:20
+
+from array import array
+
+from django.db import migrations
+
+# Cópia congelada de core.vaga_stats na época desta migração: o código atual
+# pode mudar de métricas ou de buckets, e a migração deve reproduzir sempre o
+# mesmo resultado. métrica -> (campo do resumo, mínimo, máximo, largura do bucket)
+METRICS = {
+    'wpm': ('wpm_average', 0.0, 200.0, 0.5),
+    'accuracy': ('accuracy_average', 0.0, 100.0, 0.1),
+    'quadrant_a': ('quadrant_a_score', 0.0, 100.0, 1.0),
+    'quadrant_b': ('quadrant_b_score', 0.0, 100.0, 1.0),
+    'quadrant_c': ('quadrant_c_score', 0.0, 100.0, 1.0),
+    'quadrant_d': ('quadrant_d_score', 0.0, 100.0, 1.0),
+}
+
+
+class Accumulator:
+    """Contagem, média e M2 de Welford e histograma de largura fixa"""
+
+    def __init__(self, low, high, step):
+        self.low, self.step = low, step
+        self.count, self.mean, self.m2 = 0, 0.0, 0.0
+        self.histogram = array('I', [0] * (int(round((high - low) / step)) + 1))
+
+    def add(self, value):
+        value = float(value)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        index = int((value - self.low) / self.step)
+        self.histogram[min(max(index, 0), len(self.histogram) - 1)] += 1
+
+
+def seed_vaga_statistics(apps, schema_editor):
+    """Distribuições por vaga a partir dos resumos existentes.
+
+    As gravações aplicam apenas diferenças sobre o que está em
+    ``VagaStatistic``; sem esta base, os percentis partiriam de tabelas vazias.
+    Mesmo cálculo de ``rebuild_vaga_statistics``, com os modelos históricos.
+    """
+    CandidateSummary = apps.get_model('core', 'CandidateSummary')
+    VagaStatistic = apps.get_model('core', 'VagaStatistic')
+
+    fields = [field for field, *_ in METRICS.values()]
+    accumulators = {}
+    rows = CandidateSummary.objects.values_list('vaga', *fields)
+    for vaga, *values in rows.iterator(chunk_size=5000):
+        for (name, (_, *bounds)), value in zip(METRICS.items(), values):
+            if value is None:
+                continue
+            key = (vaga or '', name)
+            if key not in accumulators:
+                accumulators[key] = Accumulator(*bounds)
+            accumulators[key].add(value)
+
+    VagaStatistic.objects.all().delete()
+    VagaStatistic.objects.bulk_create(
+        [
+            VagaStatistic(
+                vaga=vaga, metric=name, count=accumulator.count, mean=accumulator.mean, m2=accumulator.m2,
+                histogram=accumulator.histogram.tobytes(),
+            )
+            for (vaga, name), accumulator in accumulators.items()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_applied_submission'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_vaga_statistics, migrations.RunPython.noop),
+    ]
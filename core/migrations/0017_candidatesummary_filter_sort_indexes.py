@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_seed_vaga_statistics'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='candidatesummary',
+            index=models.Index(fields=['vaga', 'wpm_average', 'id'], name='summary_vaga_wpm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='candidatesummary',
+            index=models.Index(fields=['vaga', 'accuracy_average', 'id'], name='summary_vaga_accuracy_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='candidatesummary',
+            index=models.Index(fields=['dominant_quadrant', 'wpm_average', 'id'], name='summary_quadrant_wpm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='candidatesummary',
+            index=models.Index(fields=['dominant_quadrant', 'accuracy_average', 'id'], name='summary_quadrant_accuracy_idx'),
+        ),
+    ]
@@ -1,5 +1,11 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
+
+from .answers import pack_answers, unpack_answers
+from .archive import ArchivedTextField
+from .keystrokes import decode_keystrokes
+from .scoring import answers_vector, normalized_answers
 
 User = get_user_model()
 
@@ -14,6 +20,10 @@ class TypingTest(models.Model):
         verbose_name = "Teste de Digitação"
         verbose_name_plural = "Testes de Digitação"
         ordering = ['-created_at']
+        # Último teste de cada candidato (páginas, resumo e exportação)
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='typingtest_user_recent_idx'),
+        ]
 
     def __str__(self):
         return f"Teste de {self.user.get_full_name() or self.user.username} - {self.created_at.strftime('%d/%m/%Y %H:%M')}"
@@ -23,11 +33,18 @@ class TypingTestPhase(models.Model):
     """Modelo para armazenar dados de cada fase do teste de digitação"""
     typing_test = models.ForeignKey(TypingTest, on_delete=models.CASCADE, related_name='phases')
     phase_number = models.IntegerField(choices=[(1, 'Fase 1'), (2, 'Fase 2'), (3, 'Fase 3')])
-    original_phrase = models.TextField(help_text="Frase original a ser digitada")
-    typed_text = models.TextField(help_text="Texto digitado pelo usuário")
+    # Nulos depois de arquivados: lidos do frame em TypingTestPhaseArchive (core.archive)
+    original_phrase = ArchivedTextField(null=True, help_text="Frase original a ser digitada")
+    typed_text = ArchivedTextField(null=True, help_text="Texto digitado pelo usuário")
     time_seconds = models.FloatField(help_text="Tempo gasto em segundos")
     wpm = models.FloatField(help_text="Velocidade em palavras por minuto")
     accuracy = models.FloatField(help_text="Acurácia em percentual")
+    word_accuracy = models.FloatField(null=True, blank=True, help_text="Acurácia por palavra em percentual")
+    keystrokes = models.BinaryField(null=True, blank=True, help_text="Fluxo de teclas codificado (core.keystrokes)")
+    # Frase do banco (core.phrases); nulos em fases anteriores ao banco versionado
+    phrase_id = models.PositiveSmallIntegerField(null=True, blank=True, help_text="Id da frase no banco")
+    phrase_version = models.PositiveSmallIntegerField(null=True, blank=True, help_text="Versão do banco de frases")
+    normalized_wpm = models.FloatField(null=True, blank=True, help_text="WPM ajustado pela dificuldade da frase")
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -37,7 +54,12 @@ class TypingTestPhase(models.Model):
         unique_together = ['typing_test', 'phase_number']
 
     def __str__(self):
-        return f"Fase {self.phase_number} - Teste {self.typing_test.id}"
+        return f"Fase {self.phase_number} - Teste {self.typing_test_id}"
+
+    @cached_property
+    def keystroke_stream(self):
+        """Fluxo de teclas decodificado apenas quando acessado"""
+        return decode_keystrokes(self.keystrokes)
 
 
 class BehavioralProfile(models.Model):
@@ -61,13 +83,16 @@ class BehavioralProfile(models.Model):
     # Quadrante dominante
     dominant_quadrant = models.CharField(max_length=1, choices=QUADRANT_CHOICES, help_text="Quadrante com maior score")
     
-    # Respostas brutas para referência
-    answers = models.JSONField(help_text="Respostas completas do teste")
+    # Respostas brutas para referência, 3 bits por questão (core.answers)
+    packed_answers = models.BinaryField(help_text="Versão do banco de questões e respostas de 3 bits (core.answers)")
 
     class Meta:
         verbose_name = "Perfil Comportamental"
         verbose_name_plural = "Perfis Comportamentais"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='behavioral_user_recent_idx'),
+        ]
 
     def __str__(self):
         return f"Perfil de {self.user.get_full_name() or self.user.username} - {self.dominant_quadrant} - {self.created_at.strftime('%d/%m/%Y %H:%M')}"
@@ -81,11 +106,34 @@ class BehavioralProfile(models.Model):
             'D': self.quadrant_d_score,
         }
     
+    @property
+    def answers(self):
+        """Respostas no formato enviado pelo navegador, decodificadas apenas quando acessadas"""
+        return normalized_answers(unpack_answers(self.packed_answers))
+
+    @answers.setter
+    def answers(self, answers):
+        self.packed_answers = pack_answers(answers_vector(answers))
+
     @property
     def get_dominant_quadrant_display(self):
         return dict(self.QUADRANT_CHOICES).get(self.dominant_quadrant)
 
 
+class TypingTestPhaseArchive(models.Model):
+    """Frase e texto digitado de uma fase antiga, comprimidos (core.archive)"""
+    phase = models.OneToOneField(TypingTestPhase, on_delete=models.CASCADE, primary_key=True, related_name='archive')
+    frame = models.BinaryField(help_text="Frame comprimido (core.archive)")
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Fase Arquivada"
+        verbose_name_plural = "Fases Arquivadas"
+
+    def __str__(self):
+        return f"Arquivo da fase {self.phase_id}"
+
+
 class TestProgress(models.Model):
     """Modelo para rastrear o progresso do usuário nos testes"""
     TEST_CHOICES = [
@@ -106,6 +154,16 @@ class TestProgress(models.Model):
     class Meta:
         verbose_name = "Progresso do Teste"
         verbose_name_plural = "Progresso dos Testes"
+        # Candidatos que concluíram a digitação, por data de conclusão. Índice
+        # parcial: o filtro booleano vira ``WHERE "typing_test_completed"``, que
+        # o SQLite só casa com a condição do índice, não com uma coluna indexada
+        indexes = [
+            models.Index(
+                fields=['typing_test_completed_at'],
+                condition=models.Q(typing_test_completed=True),
+                name='progress_typing_done_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"Progresso de {self.user.get_full_name() or self.user.username}"
@@ -118,3 +176,122 @@ class TestProgress(models.Model):
     def progress_percentage(self):
         completed = sum([self.typing_test_completed, self.behavioral_test_completed])
         return int((completed / 2) * 100)
+
+
+class AppliedSubmission(models.Model):
+    """Recibo de uma submissão da fila já gravada (core.submission_queue).
+
+    Gravado na mesma transação que o teste, garante que reprocessar uma
+    entrada da fila não duplique o teste.
+    """
+    receipt = models.CharField(max_length=32, primary_key=True, help_text="Recibo entregue ao navegador")
+    kind = models.CharField(max_length=20, choices=TestProgress.TEST_CHOICES)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='applied_submissions')
+    object_id = models.BigIntegerField(help_text="Id do TypingTest ou do BehavioralProfile criado")
+    enqueued_at = models.DateTimeField(help_text="Quando o candidato enviou o teste")
+    applied_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Submissão Aplicada"
+        verbose_name_plural = "Submissões Aplicadas"
+
+    def __str__(self):
+        return f"{self.get_kind_display()} de {self.user_id} ({self.receipt})"
+
+
+class CandidateSummary(models.Model):
+    """Modelo de leitura desnormalizado com o resumo mais recente de cada candidato"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='candidate_summary')
+
+    # Dados do usuário
+    first_name = models.CharField(max_length=150, blank=True)
+    last_name = models.CharField(max_length=150, blank=True)
+    vaga = models.CharField(max_length=100, blank=True, null=True)
+
+    # Último teste de digitação
+    typing_test_created_at = models.DateTimeField(null=True, blank=True, help_text="Data do último teste de digitação")
+    wpm_average = models.FloatField(null=True, blank=True, help_text="Velocidade média do último teste")
+    accuracy_average = models.FloatField(null=True, blank=True, help_text="Acurácia média do último teste")
+
+    # Último perfil comportamental
+    behavioral_profile_created_at = models.DateTimeField(null=True, blank=True, help_text="Data do último perfil comportamental")
+    quadrant_a_score = models.IntegerField(null=True, blank=True)
+    quadrant_b_score = models.IntegerField(null=True, blank=True)
+    quadrant_c_score = models.IntegerField(null=True, blank=True)
+    quadrant_d_score = models.IntegerField(null=True, blank=True)
+    dominant_quadrant = models.CharField(max_length=1, choices=BehavioralProfile.QUADRANT_CHOICES, null=True, blank=True)
+
+    # Progresso
+    typing_test_completed = models.BooleanField(default=False)
+    typing_test_completed_at = models.DateTimeField(null=True, blank=True)
+    behavioral_test_completed = models.BooleanField(default=False)
+    behavioral_test_completed_at = models.DateTimeField(null=True, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Resumo do Candidato"
+        verbose_name_plural = "Resumos dos Candidatos"
+        # Índices das chaves de paginação por cursor (campo, id)
+        indexes = [
+            models.Index(fields=['typing_test_completed_at', 'id'], name='summary_completed_at_idx'),
+            models.Index(fields=['wpm_average', 'id'], name='summary_wpm_idx'),
+            models.Index(fields=['accuracy_average', 'id'], name='summary_accuracy_idx'),
+            # Filtros exatos da listagem com a ordenação padrão (mais recentes)
+            models.Index(fields=['vaga', 'typing_test_completed_at', 'id'], name='summary_vaga_idx'),
+            models.Index(fields=['dominant_quadrant', 'typing_test_completed_at', 'id'], name='summary_quadrant_idx'),
+            # ... e com as demais ordenações, para que nenhuma página ordene em árvore temporária
+            models.Index(fields=['vaga', 'wpm_average', 'id'], name='summary_vaga_wpm_idx'),
+            models.Index(fields=['vaga', 'accuracy_average', 'id'], name='summary_vaga_accuracy_idx'),
+            models.Index(fields=['dominant_quadrant', 'wpm_average', 'id'], name='summary_quadrant_wpm_idx'),
+            models.Index(fields=['dominant_quadrant', 'accuracy_average', 'id'], name='summary_quadrant_accuracy_idx'),
+            # Sincronização incremental do índice de aderência (core.matching)
+            models.Index(fields=['updated_at'], name='summary_updated_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"Resumo de {self.full_name or self.user_id}"
+
+    @property
+    def full_name(self):
+        return f"{self.first_name} {self.last_name}".strip()
+
+    @property
+    def initials(self):
+        return f"{self.first_name[:1]}{self.last_name[:1]}".upper()
+
+
+class VagaStatistic(models.Model):
+    """Agregados incrementais de uma métrica entre os candidatos de uma vaga"""
+    METRIC_CHOICES = [
+        ('wpm', 'Velocidade (WPM)'),
+        ('accuracy', 'Acurácia'),
+        ('quadrant_a', 'Quadrante A'),
+        ('quadrant_b', 'Quadrante B'),
+        ('quadrant_c', 'Quadrante C'),
+        ('quadrant_d', 'Quadrante D'),
+    ]
+
+    vaga = models.CharField(max_length=100, blank=True, default='', help_text="Vaga (vazio para candidatos sem vaga)")
+    metric = models.CharField(max_length=20, choices=METRIC_CHOICES)
+    count = models.IntegerField(default=0)
+    mean = models.FloatField(default=0)
+    m2 = models.FloatField(default=0, help_text="Soma dos quadrados dos desvios (Welford)")
+    histogram = models.BinaryField(help_text="Histograma de largura fixa (core.vaga_stats)")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Estatística da Vaga"
+        verbose_name_plural = "Estatísticas das Vagas"
+        unique_together = ['vaga', 'metric']
+
+    def __str__(self):
+        return f"{self.get_metric_display()} - {self.vaga or 'Sem vaga'}"
+
+    @property
+    def variance(self):
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self):
+        return self.variance ** 0.5
@@ -0,0 +1,104 @@
+"""Cache versionado do contexto das páginas por candidato.
+
+Cada usuário tem um contador de versão no cache ``paginas``; o contexto de
+``dashboard`` e ``detalhes_candidato`` é guardado sob uma chave que inclui essa
+versão. Qualquer escrita em ``Users``, ``TypingTest``, ``BehavioralProfile``
+ou ``TestProgress`` troca a versão após o commit, tornando as entradas
+antigas inalcançáveis (elas expiram ou são descartadas pelo LRU). Um acerto
+não faz nenhuma consulta ao banco.
+
+O HTML renderizado não é guardado: o cabeçalho contém o token CSRF da sessão.
+"""
+import time
+
+from django.core.cache import caches
+from django.db import transaction
+
+PAGE_CACHE_ALIAS = 'paginas'
+GENERATION_KEY = 'paginas:geracao'
+
+
+def _cache():
+    return caches[PAGE_CACHE_ALIAS]
+
+
+def _version_key(user_id):
+    return f'usuario:{user_id}:versao'
+
+
+def _new_version():
+    return time.time_ns()
+
+
+def _current(cache, key, versions):
+    # Uma versão descartada pelo cache é recriada com um valor novo, então
+    # entradas gravadas sob a versão anterior nunca voltam a ser lidas
+    version = versions.get(key)
+    if version is None:
+        cache.add(key, _new_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+async def _acurrent(cache, key, versions):
+    version = versions.get(key)
+    if version is None:
+        await cache.aadd(key, _new_version(), timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+def page_version(user_id):
+    """Versão atual das páginas do usuário (geração global + versão do usuário)"""
+    cache = _cache()
+    keys = (GENERATION_KEY, _version_key(user_id))
+    versions = cache.get_many(keys)
+    return '.'.join(str(_current(cache, key, versions)) for key in keys)
+
+
+async def apage_version(user_id):
+    """Versão assíncrona de ``page_version``"""
+    cache = _cache()
+    keys = (GENERATION_KEY, _version_key(user_id))
+    versions = await cache.aget_many(keys)
+    return '.'.join([str(await _acurrent(cache, key, versions)) for key in keys])
+
+
+def bump_user_version(user_id):
+    """Invalida as páginas do usuário quando a transação atual for confirmada.
+
+    Trocar a versão antes do commit permitiria que uma leitura concorrente
+    guardasse os dados antigos sob a versão nova.
+    """
+    transaction.on_commit(lambda: _cache().set(_version_key(user_id), _new_version(), timeout=None))
+
+
+def invalidate_all_pages():
+    """Invalida as páginas de todos os usuários (ex.: após recálculos em massa)"""
+    transaction.on_commit(lambda: _cache().set(GENERATION_KEY, _new_version(), timeout=None))
+
+
+def cached_context(page, user_id, build):
+    """Contexto da página ``page`` do usuário, montado por ``build()`` em caso de falta.
+
+    A versão é lida antes de montar o contexto: se o usuário mudar durante a
+    montagem, o resultado fica sob a versão antiga e não é reaproveitado.
+    """
+    cache = _cache()
+    key = f'pagina:{page}:{user_id}:{page_version(user_id)}'
+    context = cache.get(key)
+    if context is None:
+        context = build()
+        cache.set(key, context)
+    return context
+
+
+async def acached_context(page, user_id, build):
+    """Versão assíncrona de ``cached_context``; ``build()`` retorna uma corrotina"""
+    cache = _cache()
+    key = f'pagina:{page}:{user_id}:{await apage_version(user_id)}'
+    context = await cache.aget(key)
+    if context is None:
+        context = await build()
+        await cache.aset(key, context)
+    return context
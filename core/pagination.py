@@ -0,0 +1,105 @@
+"""Paginação por cursor (keyset) para listagens grandes.
+
+Ao contrário de OFFSET, cada página é uma busca por faixa no índice
+``(campo, id)``, então o custo não cresce com a profundidade do cursor.
+"""
+import base64
+import datetime
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Datas com microssegundos: o ``DjangoJSONEncoder`` corta em milissegundos,
+    e um cursor arredondado repete ou pula as linhas do mesmo milissegundo"""
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(value, pk):
+    payload = json.dumps([value, pk], cls=CursorEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, field):
+    """Decodifica o cursor convertendo o valor para o tipo do campo ordenado"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        value, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return field.to_python(value), int(pk)
+    except Exception as e:
+        raise InvalidCursor(str(e))
+
+
+class KeysetPage:
+    def __init__(self, items, next_cursor=None, previous_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+def paginate_keyset(queryset, field_name, descending=True, after=None, before=None, page_size=25):
+    """Retorna uma ``KeysetPage`` ordenada por ``(field_name, pk)``.
+
+    ``after``/``before`` são cursores opacos vindos de uma página anterior.
+    Cada chamada executa uma única consulta de no máximo ``page_size + 1`` linhas.
+    """
+    field = queryset.model._meta.get_field(field_name)
+    queryset = queryset.filter(**{f'{field_name}__isnull': False})
+
+    cursor = after or before
+    backwards = before is not None and after is None
+    # Ao voltar uma página percorremos o índice no sentido inverso
+    scan_descending = descending != backwards
+
+    if cursor:
+        value, pk = decode_cursor(cursor, field)
+        op = 'lt' if scan_descending else 'gt'
+        # O termo ``campo <= valor`` (ou ``>=``) é a faixa que o índice busca;
+        # sem ele o SQLite resolve o OR com MULTI-INDEX OR e ordena todas as
+        # linhas após o cursor em uma B-tree temporária
+        queryset = queryset.filter(
+            Q(**{f'{field_name}__{op}e': value})
+            & (Q(**{f'{field_name}__{op}': value}) | Q(**{field_name: value, f'pk__{op}': pk}))
+        )
+
+    prefix = '-' if scan_descending else ''
+    rows = list(queryset.order_by(f'{prefix}{field_name}', f'{prefix}pk')[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backwards:
+        rows.reverse()
+
+    def cursor_for(obj):
+        return encode_cursor(getattr(obj, field_name), obj.pk)
+
+    next_cursor = previous_cursor = None
+    if rows:
+        if has_more or backwards:
+            next_cursor = cursor_for(rows[-1])
+        if (has_more and backwards) or (after is not None):
+            previous_cursor = cursor_for(rows[0])
+    return KeysetPage(rows, next_cursor, previous_cursor)
@@ -0,0 +1,140 @@
+"""Banco de frases do teste de digitação.
+
+Cada versão do banco é imutável: as fases gravadas guardam ``phrase_id`` e
+``phrase_version`` e precisam continuar resolvendo para o mesmo texto. Para
+mudar o banco, acrescente uma versão nova em ``PHRASE_BANKS``.
+
+Os atributos de dificuldade de cada frase são calculados uma vez, na
+importação, e resumidos em ``difficulty``: um fator multiplicativo com média
+1 em cada versão. ``normalized_wpm`` multiplica o WPM medido por esse fator,
+então frases mais difíceis que a média não penalizam o candidato.
+"""
+import math
+import random
+import unicodedata
+from collections import Counter, namedtuple
+
+PHRASE_BANK_VERSION = 1
+PHRASES_PER_TEST = 3
+
+PHRASE_BANKS = {
+    1: {
+        1: "A tecnologia transforma a forma como trabalhamos todos os dias.",
+        2: "A análise de dados é essencial para decisões estratégicas.",
+        3: "Velocidade e precisão são fundamentais em ambientes corporativos.",
+        4: "Uma equipe bem alinhada entrega resultados com mais consistência.",
+        5: "O atendimento ao cliente começa com uma escuta atenta e paciente.",
+        6: "Relatórios claros ajudam a gestão a priorizar os próximos passos.",
+        7: "Cada reunião deve terminar com responsáveis e prazos definidos.",
+        8: "A comunicação transparente reduz retrabalho e conflitos na equipe.",
+        9: "Organização, foco e disciplina tornam a rotina mais produtiva.",
+        10: "Na dúvida, pergunte: é melhor confirmar do que corrigir depois!",
+        11: "O sistema registra as solicitações e notifica o responsável.",
+        12: "Soluções criativas surgem quando diferentes visões se encontram.",
+    },
+}
+
+# Teclas extras de cada caractere em um teclado ABNT2: acentos usam tecla
+# morta (ç tem tecla própria); maiúsculas e estes sinais usam Shift
+SHIFTED_PUNCTUATION = set('!?:"()')
+
+# Peso de cada bit de raridade dos dígrafos acima da média da versão
+RARITY_WEIGHT = 0.05
+
+PhraseFeatures = namedtuple(
+    'PhraseFeatures', ['length', 'accent_ratio', 'punctuation_ratio', 'digraph_rarity', 'difficulty'],
+)
+
+
+class UnknownPhrase(ValueError):
+    pass
+
+
+def _is_accented(char):
+    return char != 'ç' and unicodedata.normalize('NFD', char.lower()) != char.lower()
+
+
+def _digraphs(text):
+    letters = text.lower()
+    return [letters[i:i + 2] for i in range(len(letters) - 1) if letters[i:i + 2].isalpha()]
+
+
+def _features(phrases):
+    """Atributos de dificuldade de cada frase de uma versão do banco.
+
+    A raridade dos dígrafos (média de -log2 da frequência de cada par de
+    letras, com suavização de Laplace) tem como referência o próprio banco.
+    O custo em teclas por caractere e a raridade compõem a dificuldade bruta,
+    dividida depois pela média da versão.
+    """
+    counts = Counter(digraph for text in phrases.values() for digraph in _digraphs(text))
+    total = sum(counts.values())
+    vocabulary = len(counts)
+
+    def rarity(digraph):
+        return -math.log2((counts[digraph] + 1) / (total + vocabulary))
+
+    raw = {}
+    for phrase_id, text in phrases.items():
+        digraphs = _digraphs(text)
+        accents = sum(_is_accented(char) for char in text)
+        punctuation = sum(unicodedata.category(char).startswith('P') for char in text)
+        shifts = sum(char.isupper() or char in SHIFTED_PUNCTUATION for char in text)
+        raw[phrase_id] = (
+            len(text),
+            accents / len(text),
+            punctuation / len(text),
+            sum(rarity(digraph) for digraph in digraphs) / len(digraphs) if digraphs else 0.0,
+            (len(text) + accents + shifts) / len(text),
+        )
+
+    mean_rarity = sum(values[3] for values in raw.values()) / len(raw)
+    scores = {
+        phrase_id: keystrokes * (1 + RARITY_WEIGHT * (rarity_bits - mean_rarity))
+        for phrase_id, (_, _, _, rarity_bits, keystrokes) in raw.items()
+    }
+    mean_score = sum(scores.values()) / len(scores)
+    return {
+        phrase_id: PhraseFeatures(length, round(accent, 4), round(punctuation, 4), round(rarity_bits, 3),
+                                  round(scores[phrase_id] / mean_score, 4))
+        for phrase_id, (length, accent, punctuation, rarity_bits, _) in raw.items()
+    }
+
+
+# (versão, id) -> PhraseFeatures, calculados uma única vez
+FEATURES = {
+    (version, phrase_id): features
+    for version, phrases in PHRASE_BANKS.items()
+    for phrase_id, features in _features(phrases).items()
+}
+
+# Texto -> (versão, id), para submissões que enviam só o texto da frase
+_BY_TEXT = {
+    text: (version, phrase_id)
+    for version, phrases in sorted(PHRASE_BANKS.items(), reverse=True)
+    for phrase_id, text in phrases.items()
+}
+
+
+def phrase_text(version, phrase_id):
+    try:
+        return PHRASE_BANKS[version][phrase_id]
+    except KeyError:
+        raise UnknownPhrase(f"Frase desconhecida: {phrase_id} (versão {version})")
+
+
+def find_phrase(text):
+    """``(versão, id)`` da frase com este texto, ou ``None``"""
+    return _BY_TEXT.get(text)
+
+
+def assigned_phrases(user_id, version=PHRASE_BANK_VERSION):
+    """Ids das frases de cada fase para o candidato: estáveis entre recargas da
+    página e distribuídos pelo banco entre os candidatos"""
+    ids = sorted(PHRASE_BANKS[version])
+    return random.Random(f'{version}:{user_id}').sample(ids, PHRASES_PER_TEST)
+
+
+def normalized_wpm(wpm, version, phrase_id):
+    """WPM ajustado pela dificuldade da frase (uma consulta a ``FEATURES``)"""
+    return round(wpm * FEATURES[version, phrase_id].difficulty, 1)
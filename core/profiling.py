@@ -0,0 +1,195 @@
+"""Perfil das requisições: SQL, templates e Python, com cabeçalho Server-Timing.
+
+Uma fração das requisições (``PROFILING_SAMPLE_RATE``) é perfilada por
+completo: cada comando SQL (em qualquer thread, pois o perfil vive em um
+``ContextVar`` que o ``sync_to_async`` propaga), o tempo de renderização dos
+templates (pelo backend ``ProfiledDjangoTemplates``) e as assinaturas de SQL
+repetidas, que indicam N+1. As demais só medem o tempo total. Todas entram
+nos histogramas por view, e as que passam de ``PROFILING_SLOW_MS`` são
+registradas no log (com a lista de comandos, quando perfiladas).
+"""
+import contextvars
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, deque
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar('request_profile', default=None)
+
+# Limites superiores (ms) dos baldes dos histogramas por view
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf'))
+
+
+class RequestProfile:
+    """Medições de uma requisição perfilada"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = []  # (sql, segundos)
+        self.sql_seconds = 0.0
+        self.template_seconds = 0.0
+        self.template_sql_seconds = 0.0
+        self._rendering = 0
+        self._lock = threading.Lock()
+
+    def add_query(self, sql, seconds):
+        with self._lock:
+            self.queries.append((sql, seconds))
+            self.sql_seconds += seconds
+            if self._rendering:
+                self.template_sql_seconds += seconds
+
+    def duplicates(self):
+        """Assinaturas (SQL sem parâmetros) executadas mais de uma vez"""
+        counts = Counter(sql for sql, _ in self.queries)
+        return {sql: count for sql, count in counts.most_common() if count > 1}
+
+    def server_timing(self, total):
+        # O SQL executado durante a renderização conta só em "sql"
+        template = self.template_seconds - self.template_sql_seconds
+        python = max(total - self.sql_seconds - template, 0.0)
+        duplicates = self.duplicates()
+        entries = [
+            f'sql;dur={self.sql_seconds * 1000:.1f};desc="{len(self.queries)} consultas"',
+            f'tpl;dur={template * 1000:.1f}',
+            f'view;dur={python * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ]
+        if duplicates:
+            entries.append(f'dup;desc="{sum(duplicates.values())} consultas repetidas, {len(duplicates)} assinaturas"')
+        return ', '.join(entries)
+
+
+def current_profile():
+    return _current.get()
+
+
+def start_profile():
+    """Inicia o perfil da requisição atual; retorna o token para ``finish_profile``"""
+    profile = RequestProfile()
+    return profile, _current.set(profile)
+
+
+def finish_profile(token):
+    _current.reset(token)
+
+
+def query_recorder(execute, sql, params, many, context):
+    """``execute_wrapper`` que registra os comandos da requisição perfilada"""
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.add_query(sql, time.perf_counter() - start)
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    if query_recorder not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_recorder)
+
+
+class ProfiledTemplate(Template):
+    def render(self, context=None, request=None):
+        profile = _current.get()
+        if profile is None:
+            return super().render(context, request)
+        start = time.perf_counter()
+        profile._rendering += 1
+        try:
+            return super().render(context, request)
+        finally:
+            profile._rendering -= 1
+            profile.template_seconds += time.perf_counter() - start
+
+
+class ProfiledDjangoTemplates(DjangoTemplates):
+    """Backend de templates do Django que mede a renderização nas requisições perfiladas"""
+
+    def from_string(self, template_code):
+        return ProfiledTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return ProfiledTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+class ViewHistograms:
+    """Histogramas de duração por view em janelas de tempo rotativas.
+
+    Guarda as últimas ``PROFILING_WINDOWS`` janelas de
+    ``PROFILING_WINDOW_SECONDS``; o resumo soma as janelas retidas.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._windows = deque()  # (início, {view: [contagens por balde]})
+
+    def _window(self, now):
+        length = settings.PROFILING_WINDOW_SECONDS
+        start = now - now % length
+        if not self._windows or self._windows[-1][0] != start:
+            self._windows.append((start, {}))
+            while len(self._windows) > settings.PROFILING_WINDOWS:
+                self._windows.popleft()
+        return self._windows[-1][1]
+
+    def add(self, view, seconds):
+        bucket = bisect_left(BUCKETS_MS, seconds * 1000)
+        with self._lock:
+            counts = self._window(time.time()).setdefault(view, [0] * len(BUCKETS_MS))
+            counts[bucket] += 1
+
+    def snapshot(self):
+        """``{view: {"<=5ms": n, ...}}`` somando as janelas retidas"""
+        totals = {}
+        with self._lock:
+            for _, views in self._windows:
+                for view, counts in views.items():
+                    merged = totals.setdefault(view, [0] * len(BUCKETS_MS))
+                    for i, count in enumerate(counts):
+                        merged[i] += count
+        labels = [f'<={limit}ms' if limit != float('inf') else f'>{BUCKETS_MS[-2]}ms' for limit in BUCKETS_MS]
+        return {view: dict(zip(labels, counts)) for view, counts in sorted(totals.items())}
+
+
+view_histograms = ViewHistograms()
+
+
+def record_request(request, response, total, profile=None):
+    """Atualiza o histograma da view, registra requisições lentas e anota o Server-Timing"""
+    match = getattr(request, 'resolver_match', None)
+    view = match.view_name if match else 'sem rota'
+    view_histograms.add(view, total)
+
+    if profile is not None:
+        response['Server-Timing'] = profile.server_timing(total)
+    else:
+        response['Server-Timing'] = f'total;dur={total * 1000:.1f}'
+
+    if total * 1000 < settings.PROFILING_SLOW_MS:
+        return
+    if profile is None:
+        logger.warning("Requisição lenta (sem perfil): %s %s em %.0f ms", request.method, request.path, total * 1000)
+        return
+    queries = '\n'.join(f'  {seconds * 1000:7.1f} ms  {sql[:300]}' for sql, seconds in profile.queries)
+    duplicates = profile.duplicates()
+    logger.warning(
+        "Requisição lenta: %s %s em %.0f ms (%d consultas, %.0f ms de SQL, %d assinaturas repetidas)\n%s",
+        request.method, request.path, total * 1000, len(profile.queries), profile.sql_seconds * 1000,
+        len(duplicates), queries,
+    )
@@ -0,0 +1,115 @@
+"""Progresso do usuário disponível em ``request.test_progress``.
+
+O ``TestProgress`` é criado junto com o usuário (``core.signals``), então as
+páginas apenas leem. A leitura é preguiçosa e feita no máximo uma vez por
+requisição; os valores ficam também na sessão, que já é carregada em toda
+requisição autenticada, e valem enquanto a versão das páginas do usuário
+(``core.page_cache``) não mudar. A sessão só é gravada no login e nos
+endpoints de submissão, de modo que páginas de leitura não escrevem no banco.
+"""
+from django.utils.dateparse import parse_datetime
+
+from .models import TestProgress
+from .page_cache import apage_version, page_version
+
+SESSION_KEY = '_test_progress'
+
+DATETIME_FIELDS = ('typing_test_completed_at', 'behavioral_test_completed_at', 'created_at', 'updated_at')
+FIELDS = ('id', 'typing_test_completed', 'behavioral_test_completed', *DATETIME_FIELDS)
+
+
+def _from_cached(cached, user_id, version):
+    if not cached or cached.get('versao') != version:
+        return None
+    values = {field: cached[field] for field in FIELDS}
+    for field in DATETIME_FIELDS:
+        if values[field] is not None:
+            values[field] = parse_datetime(values[field])
+    progress = TestProgress(user_id=user_id, **values)
+    progress._state.adding = False
+    progress._state.db = 'default'
+    return progress
+
+
+def _to_cached(progress, version):
+    cached = {field: getattr(progress, field) for field in FIELDS}
+    for field in DATETIME_FIELDS:
+        if cached[field] is not None:
+            cached[field] = cached[field].isoformat()
+    cached['versao'] = version
+    return cached
+
+
+def get_test_progress(request):
+    """Progresso do usuário da requisição, sem gravar no banco.
+
+    Usuários sem registro (ex.: criados em massa, sem sinais) recebem uma
+    instância não salva com os valores padrão.
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return None
+    progress = _from_cached(request.session.get(SESSION_KEY), user.pk, page_version(user.pk))
+    if progress is None:
+        progress = TestProgress.objects.filter(user_id=user.pk).first()
+    if progress is None:
+        progress = TestProgress(user_id=user.pk)
+    return progress
+
+
+async def aget_test_progress(request):
+    """Versão assíncrona de ``get_test_progress``"""
+    user = await request.auser()
+    if not user.is_authenticated:
+        return None
+    cached = await request.session.aget(SESSION_KEY)
+    progress = _from_cached(cached, user.pk, await apage_version(user.pk))
+    if progress is None:
+        progress = await TestProgress.objects.filter(user_id=user.pk).afirst()
+    if progress is None:
+        progress = TestProgress(user_id=user.pk)
+    return progress
+
+
+async def atest_progress(request):
+    """``request.atest_progress()``: carrega o progresso uma vez por requisição"""
+    if not hasattr(request, '_atest_progress'):
+        request._atest_progress = await aget_test_progress(request)
+    return request._atest_progress
+
+
+def remember_test_progress(request, user):
+    """Recarrega o progresso do banco e o guarda na sessão.
+
+    Chamado no login e após as submissões, que já gravam a sessão.
+    """
+    progress = TestProgress.objects.filter(user_id=user.pk).first()
+    if progress is None:
+        request.session.pop(SESSION_KEY, None)
+        return None
+    request.session[SESSION_KEY] = _to_cached(progress, page_version(user.pk))
+    return progress
+
+
+async def aremember_test_progress(request, user):
+    """Versão assíncrona de ``remember_test_progress``"""
+    progress = await TestProgress.objects.filter(user_id=user.pk).afirst()
+    if progress is None:
+        await request.session.apop(SESSION_KEY, None)
+        return None
+    await request.session.aset(SESSION_KEY, _to_cached(progress, await apage_version(user.pk)))
+    return progress
+
+
+async def aremember_pending_progress(request, user, **completed):
+    """Guarda na sessão um teste enfileirado (core.submission_queue) como concluído.
+
+    O ``TestProgress`` só muda quando a fila grava a submissão, o que também
+    muda a versão das páginas do usuário; até lá, a sessão evita que o
+    candidato veja o teste como pendente e o refaça.
+    """
+    progress = await aget_test_progress(request)
+    for field, value in completed.items():
+        setattr(progress, field, value)
+    await request.session.aset(SESSION_KEY, _to_cached(progress, await apage_version(user.pk)))
+    return progress
@@ -0,0 +1,134 @@
+"""Pontuação do teste de perfil comportamental (quadrantes de Ned Herrmann).
+
+Espelha ``calculateScores()`` de ``static/js/personalidade.js``: cada quadrante
+recebe a soma das respostas (escala 1–5) das suas questões, normalizada para
+0–100, e o dominante é o de maior score. O banco de questões fica aqui, e o
+navegador o recebe de ``core.banks``, para que o servidor possa validar
+submissões e repontuar o histórico quando o banco ou a normalização mudarem.
+"""
+from collections import namedtuple
+
+QUESTION_BANK_VERSION = 1
+QUADRANTS = ('A', 'B', 'C', 'D')
+SCALE_MIN, SCALE_MAX = 1, 5
+
+# id da questão -> quadrante, na ordem em que as questões são exibidas
+QUESTION_QUADRANTS = {
+    1: 'A', 2: 'A', 3: 'A', 4: 'A', 5: 'A',
+    6: 'B', 7: 'B', 8: 'B', 9: 'B', 10: 'B',
+    11: 'C', 12: 'C', 13: 'C', 14: 'C', 15: 'C',
+    16: 'D', 17: 'D', 18: 'D', 19: 'D', 20: 'D',
+    21: 'A', 22: 'B', 23: 'C', 24: 'D', 25: 'A',
+}
+QUESTION_IDS = tuple(sorted(QUESTION_QUADRANTS))
+
+# Enunciados exibidos pelo navegador (servidos por core.banks)
+QUESTION_TEXTS = {
+    1: 'Eu prefiro analisar os dados antes de tomar decisões',
+    2: 'Gosto de entender o "por quê" das coisas em profundidade',
+    3: 'Sou uma pessoa que segue a lógica e a razão',
+    4: 'Prefiro precisão e fatos ao invés de opiniões',
+    5: 'Gosto de resolver problemas complexos de forma metódica',
+    6: 'Eu sou organizado e gosto de seguir procedimentos estabelecidos',
+    7: 'Prefiro planejar e executar tarefas de forma estruturada',
+    8: 'Gosto de resultados práticos e mensuráveis',
+    9: 'Sou confiável e cumpro com as responsabilidades assumidas',
+    10: 'Prefiro trabalhar dentro de regras e regulamentações claras',
+    11: 'Eu valoro o trabalho em equipe e a colaboração',
+    12: 'Gosto de ouvir e compreender os sentimentos das pessoas',
+    13: 'Sou empático e me importo com o bem-estar dos outros',
+    14: 'Prefiro ambientes harmoniosos e cooperativos',
+    15: 'Gosto de construir relacionamentos sólidos e duradouros',
+    16: 'Eu sou criativo e gosto de explorar novas ideias',
+    17: 'Prefiro desafiar o status quo e propor mudanças',
+    18: 'Gosto de trabalhar em projetos inovadores e estimulantes',
+    19: 'Sou entusiasta com novas possibilidades e oportunidades',
+    20: 'Prefiro experimentar e aprender com a prática',
+    21: 'Gosto de questionar e analisar criticamente as informações',
+    22: 'Sou eficiente na execução de tarefas e cumpro prazos',
+    23: 'Eu sou alguém que inspira confiança nos outros',
+    24: 'Gosto de aprender coisas novas e explorar diferentes abordagens',
+    25: 'Prefiro ter informações completas antes de agir',
+}
+
+# Colunas do vetor de respostas que pertencem a cada quadrante
+_QUADRANT_COLUMNS = {
+    quadrant: tuple(i for i, qid in enumerate(QUESTION_IDS) if QUESTION_QUADRANTS[qid] == quadrant)
+    for quadrant in QUADRANTS
+}
+
+Scores = namedtuple('Scores', ['A', 'B', 'C', 'D', 'dominant'])
+
+
+class InvalidAnswers(ValueError):
+    pass
+
+
+def answers_vector(answers):
+    """Valida as respostas e as converte em um vetor ordenado por id de questão.
+
+    Aceita a lista enviada pelo navegador (``questionId``/``answer``). O
+    quadrante informado pelo cliente é ignorado em favor do banco de questões.
+    """
+    if not isinstance(answers, list):
+        raise InvalidAnswers(f"Esperado lista de respostas, recebido: {type(answers).__name__}")
+
+    values = {}
+    for item in answers:
+        try:
+            question_id = int(item['questionId'])
+            value = item['answer']
+        except (KeyError, TypeError, ValueError):
+            raise InvalidAnswers(f"Resposta malformada: {item!r}")
+        if question_id not in QUESTION_QUADRANTS:
+            raise InvalidAnswers(f"Questão desconhecida: {question_id}")
+        if question_id in values:
+            raise InvalidAnswers(f"Questão respondida mais de uma vez: {question_id}")
+        if isinstance(value, bool) or not isinstance(value, int) or not SCALE_MIN <= value <= SCALE_MAX:
+            raise InvalidAnswers(f"Resposta fora da escala {SCALE_MIN}-{SCALE_MAX} na questão {question_id}: {value!r}")
+        values[question_id] = value
+
+    missing = set(QUESTION_IDS) - set(values)
+    if missing:
+        raise InvalidAnswers(f"Questões sem resposta: {sorted(missing)}")
+    return [values[qid] for qid in QUESTION_IDS]
+
+
+def normalized_answers(vector):
+    """Reconstrói a lista de respostas exposta em ``BehavioralProfile.answers``.
+
+    Questões sem resposta (0, em perfis anteriores à validação) ficam de fora.
+    """
+    return [
+        {'questionId': qid, 'quadrant': QUESTION_QUADRANTS[qid], 'answer': value}
+        for qid, value in zip(QUESTION_IDS, vector)
+        if value
+    ]
+
+
+def _round_half_up(value):
+    # Math.round do JavaScript arredonda .5 para cima; round() do Python não
+    return int(value + 0.5)
+
+
+def score_matrix(rows):
+    """Pontua uma matriz de respostas (uma linha de 25 valores por perfil)"""
+    maxima = {quadrant: len(columns) * SCALE_MAX for quadrant, columns in _QUADRANT_COLUMNS.items()}
+    results = []
+    for row in rows:
+        scores = {
+            quadrant: _round_half_up(sum(row[i] for i in columns) / maxima[quadrant] * 100)
+            for quadrant, columns in _QUADRANT_COLUMNS.items()
+        }
+        # Empates ficam com o último quadrante, como no reduce() do navegador
+        dominant = QUADRANTS[0]
+        for quadrant in QUADRANTS[1:]:
+            if scores[quadrant] >= scores[dominant]:
+                dominant = quadrant
+        results.append(Scores(dominant=dominant, **scores))
+    return results
+
+
+def score_answers(answers):
+    """Valida e pontua as respostas de um único teste"""
+    return score_matrix([answers_vector(answers)])[0]
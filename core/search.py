@@ -0,0 +1,242 @@
+"""Busca textual de candidatos com o FTS5 do SQLite.
+
+A tabela virtual ``core_candidatesearch`` tem uma linha por usuário
+(``rowid`` = id do usuário) com nome, e-mail, vaga e o perfil dominante do
+último teste comportamental. Ela é mantida por gatilhos em ``users_users`` e
+``core_candidatesummary``, que cobrem também os upserts em lote do resumo. Os
+gatilhos são recriados após cada ``migrate``, pois o Django reconstrói as
+tabelas do SQLite em algumas alterações de esquema e os descarta.
+
+O tokenizador ``unicode61`` com ``remove_diacritics 2`` ignora acentos nos
+dois lados ("joao" encontra "João"), e o último termo da busca é um prefixo.
+"""
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .models import BehavioralProfile
+from users.models import Users as User
+
+FTS_TABLE = 'core_candidatesearch'
+
+COLUMNS = ('nome', 'email', 'vaga', 'perfil')
+
+# Peso de cada coluna na relevância, na ordem de COLUMNS
+COLUMN_WEIGHTS = (10, 4, 2, 1)
+
+# Termos mais curtos que isso casariam com boa parte da base
+MIN_TERM_LENGTH = 2
+
+# Prefixos com índice próprio no FTS5. Sem ele, um termo "abc"* junta em
+# memória a lista de todas as linhas que casam antes de devolver a primeira;
+# com ele, a lista é lida sob demanda, como a de um termo exato
+MAX_PREFIX_LENGTH = 10
+
+# Só os resultados mais recentes são ordenados por relevância (ver search_candidates)
+RANK_WINDOW = 200
+
+# Como o tokenizador (``separators`` abaixo), dígitos separam termos
+TERM = re.compile(r'[^\W\d_]+')
+
+
+def _create_table_sql(table=FTS_TABLE):
+    prefixes = ' '.join(str(length) for length in range(MIN_TERM_LENGTH, MAX_PREFIX_LENGTH + 1))
+    return (
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5({', '.join(COLUMNS)}, "
+        # Dígitos separam termos: "silva123@..." vira "silva", sem um termo
+        # distinto por e-mail a expandir em cada busca por prefixo
+        "tokenize = \"unicode61 remove_diacritics 2 separators '0123456789'\", "
+        f"prefix = '{prefixes}')"
+    )
+
+
+def _search_sql(table=FTS_TABLE):
+    # O FTS5 percorre os ids em ordem decrescente e para no limite, então um
+    # termo comum ("ana", "gmail") não custa uma linha por candidato da base
+    return (
+        f"SELECT rowid, {', '.join(COLUMNS)} FROM {table} WHERE {table} MATCH %s "
+        f"ORDER BY rowid DESC LIMIT {RANK_WINDOW}"
+    )
+
+
+def _quadrant_label(column):
+    cases = ' '.join(f"WHEN '{code}' THEN '{code} {label}'" for code, label in BehavioralProfile.QUADRANT_CHOICES)
+    return f"CASE {column} {cases} ELSE '' END"
+
+
+def _name(alias):
+    return f"TRIM({alias}.first_name || ' ' || {alias}.last_name)"
+
+
+TRIGGERS = {
+    'core_candidatesearch_user_insert': f"""
+        AFTER INSERT ON users_users BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, nome, email, vaga, perfil)
+            VALUES (new.id, {_name('new')}, new.email, COALESCE(new.vaga, ''), '');
+        END""",
+    'core_candidatesearch_user_update': f"""
+        AFTER UPDATE OF first_name, last_name, email, vaga ON users_users BEGIN
+            UPDATE {FTS_TABLE} SET nome = {_name('new')}, email = new.email, vaga = COALESCE(new.vaga, '')
+            WHERE rowid = new.id;
+        END""",
+    'core_candidatesearch_user_delete': f"""
+        AFTER DELETE ON users_users BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        END""",
+    'core_candidatesearch_summary_insert': f"""
+        AFTER INSERT ON core_candidatesummary WHEN new.dominant_quadrant IS NOT NULL BEGIN
+            UPDATE {FTS_TABLE} SET perfil = {_quadrant_label('new.dominant_quadrant')} WHERE rowid = new.user_id;
+        END""",
+    'core_candidatesearch_summary_update': f"""
+        AFTER UPDATE OF dominant_quadrant ON core_candidatesummary BEGIN
+            UPDATE {FTS_TABLE} SET perfil = {_quadrant_label('new.dominant_quadrant')} WHERE rowid = new.user_id;
+        END""",
+}
+
+
+def install_search_triggers(conn=connection):
+    """Cria os gatilhos que ainda não existem (idempotente)"""
+    with conn.cursor() as cursor:
+        for name, body in TRIGGERS.items():
+            cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+
+def search_index_exists(conn=connection):
+    with conn.cursor() as cursor:
+        return FTS_TABLE in conn.introspection.table_names(cursor)
+
+
+def create_search_index(conn=connection):
+    """Cria a tabela FTS5, os gatilhos e indexa os usuários existentes"""
+    with conn.cursor() as cursor:
+        cursor.execute(_create_table_sql())
+    install_search_triggers(conn)
+    return rebuild_search_index(conn)
+
+
+def drop_search_index(conn=connection):
+    with conn.cursor() as cursor:
+        for name in TRIGGERS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def rebuild_search_index(conn=connection):
+    """Reindexa todos os usuários a partir das tabelas de origem; retorna o total"""
+    with conn.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(f"""
+            INSERT INTO {FTS_TABLE}(rowid, nome, email, vaga, perfil)
+            SELECT u.id, {_name('u')}, u.email, COALESCE(u.vaga, ''), {_quadrant_label('s.dominant_quadrant')}
+            FROM users_users u LEFT JOIN core_candidatesummary s ON s.user_id = u.id
+        """)
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+        cursor.execute(f"SELECT COUNT(*) FROM {FTS_TABLE}")
+        return cursor.fetchone()[0]
+
+
+def fold(text):
+    """Minúsculas sem acentos, como o ``remove_diacritics`` do tokenizador"""
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def search_terms(text):
+    """Termos da busca, sem acentos; os curtos demais são ignorados"""
+    return [term for term in TERM.findall(fold(text)) if len(term) >= MIN_TERM_LENGTH]
+
+
+def match_expression(text):
+    """Converte o texto digitado em uma consulta FTS5 com todos os termos.
+
+    O último termo é um prefixo (o usuário ainda pode estar digitando),
+    limitado a ``MAX_PREFIX_LENGTH`` letras para usar o índice de prefixos.
+    Cada termo vai entre aspas, então operadores e aspas do usuário não chegam
+    ao FTS5. Retorna ``None`` se não sobrar termo com ``MIN_TERM_LENGTH``.
+    """
+    terms = search_terms(text)
+    if not terms:
+        return None
+    *complete, last = terms
+    return ' '.join([*(f'"{term}"' for term in complete), f'"{last[:MAX_PREFIX_LENGTH]}"*'])
+
+
+def relevance(row, terms):
+    """Soma, para cada termo, o peso da melhor coluna em que ele aparece"""
+    columns = [set(TERM.findall(fold(value or ''))) for value in row]
+    *complete, last = terms
+    score = 0
+    for term in complete:
+        score += max((weight for weight, words in zip(COLUMN_WEIGHTS, columns) if term in words), default=0)
+    score += max(
+        (weight for weight, words in zip(COLUMN_WEIGHTS, columns) if any(word.startswith(last) for word in words)),
+        default=0,
+    )
+    return score
+
+
+def rank_rows(rows, text):
+    """Ids de ``(rowid, nome, email, vaga, perfil)`` do mais ao menos relevante; empates, os mais recentes"""
+    terms = search_terms(text)
+    ranked = sorted(rows, key=lambda row: (-relevance(row[1:], terms), -row[0]))
+    return [row[0] for row in ranked]
+
+
+def matching_user_ids(text):
+    """Subconsulta com os ids dos usuários encontrados, para ``pk__in`` (ex.: no admin)"""
+    match = match_expression(text)
+    if match is None:
+        return None
+    return RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+
+
+class SearchPage:
+    def __init__(self, items, number, has_next):
+        self.items = items
+        self.number = number
+        self.has_next = has_next
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def has_previous(self):
+        return self.number > 1
+
+    @property
+    def next_page_number(self):
+        return self.number + 1
+
+    @property
+    def previous_page_number(self):
+        return self.number - 1
+
+
+def search_candidates(text, page=1, page_size=20):
+    """Usuários que casam com ``text``, do mais relevante ao menos relevante.
+
+    A relevância ordena os ``RANK_WINDOW`` candidatos mais recentes que casam
+    (todos, em uma busca específica); uma busca ampla como "ana" mostra os
+    recentes, e as páginas param no fim da janela. O ``bm25`` do FTS5 não
+    serve aqui: ele lê a lista inteira de cada termo para calcular o IDF,
+    centenas de milissegundos para um termo comum em 1M de candidatos.
+    Cada página faz uma consulta ao índice e uma para carregar os usuários.
+    """
+    match = match_expression(text)
+    if match is None:
+        return SearchPage([], page, False)
+
+    with connection.cursor() as cursor:
+        cursor.execute(_search_sql(), [match])
+        ranked = rank_rows(cursor.fetchall(), text)
+
+    start = (page - 1) * page_size
+    ids = ranked[start:start + page_size]
+    has_next = len(ranked) > start + page_size
+    users = User.objects.select_related('candidate_summary').in_bulk(ids)
+    return SearchPage([users[pk] for pk in ids if pk in users], page, has_next)
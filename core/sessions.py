@@ -0,0 +1,213 @@
+"""Engine de sessão com cache em memória sobre o banco (``SESSION_ENGINE = 'core.sessions'``).
+
+Com o backend de banco padrão, toda requisição autenticada faz um SELECT em
+``django_session`` e toda sessão marcada como alterada faz um UPDATE, mesmo
+quando os dados gravados são os mesmos. Aqui:
+
+* as sessões lidas ou gravadas ficam em um LRU limitado do processo
+  (``SESSION_LRU_MAX_ENTRIES``) por até ``SESSION_LRU_TTL`` segundos, então
+  as requisições seguintes do mesmo candidato não consultam o banco;
+* ``save()`` compara os dados com os que estão no banco e não grava nada se
+  forem iguais; se só a expiração avançou, o UPDATE de ``expire_date``
+  acontece no máximo uma vez a cada ``SESSION_EXPIRY_REFRESH_SECONDS``;
+* ``clear_expired()`` (``clearsessions`` e ``purge_sessions``) apaga as
+  sessões vencidas em lotes curtos, sem segurar a trava de escrita do SQLite
+  durante um DELETE da tabela inteira.
+
+O banco continua sendo a fonte da verdade. Com vários workers, um logout em
+um deles chega aos demais em até ``SESSION_LRU_TTL`` segundos; a troca de
+senha vale na hora, porque o hash da senha é conferido contra o usuário.
+"""
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.sessions.backends import db
+from django.contrib.sessions.backends.base import UpdateError
+from django.utils import timezone
+
+# session_data como está no banco (assinado), para não compartilhar dicionários mutáveis
+Entry = namedtuple('Entry', ['data', 'expire_date', 'cached_at'])
+
+
+class SessionLRU:
+    """Sessões recentes do processo, das menos para as mais usadas"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_key, ttl):
+        with self._lock:
+            entry = self._entries.get(session_key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry.cached_at > ttl or entry.expire_date <= timezone.now():
+                del self._entries[session_key]
+                return None
+            self._entries.move_to_end(session_key)
+            return entry
+
+    def put(self, session_key, data, expire_date):
+        with self._lock:
+            self._entries[session_key] = Entry(data, expire_date, time.monotonic())
+            self._entries.move_to_end(session_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def touch(self, session_key, expire_date):
+        with self._lock:
+            entry = self._entries.get(session_key)
+            if entry is not None:
+                self._entries[session_key] = entry._replace(expire_date=expire_date)
+
+    def discard(self, session_key):
+        with self._lock:
+            self._entries.pop(session_key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+cache = SessionLRU(settings.SESSION_LRU_MAX_ENTRIES)
+
+
+class SessionStore(db.SessionStore):
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        # (dados serializados, expire_date) como estão no banco, se conhecidos
+        self._stored = None
+
+    def _fingerprint(self, data):
+        return self.serializer().dumps(data)
+
+    def _remember(self, session_data, data, expire_date):
+        cache.put(self.session_key, session_data, expire_date)
+        self._stored = (self._fingerprint(data), expire_date)
+
+    def _from_cache(self):
+        if not self.session_key or settings.SESSION_LRU_TTL <= 0:
+            return None
+        entry = cache.get(self.session_key, settings.SESSION_LRU_TTL)
+        if entry is None:
+            return None
+        data = self.decode(entry.data)
+        self._stored = (self._fingerprint(data), entry.expire_date)
+        return data
+
+    def load(self):
+        data = self._from_cache()
+        if data is not None:
+            return data
+        s = self._get_session_from_db()
+        if s is None:
+            return {}
+        data = self.decode(s.session_data)
+        self._remember(s.session_data, data, s.expire_date)
+        return data
+
+    async def aload(self):
+        data = self._from_cache()
+        if data is not None:
+            return data
+        s = await self._aget_session_from_db()
+        if s is None:
+            return {}
+        data = self.decode(s.session_data)
+        self._remember(s.session_data, data, s.expire_date)
+        return data
+
+    def _pending_write(self, data, expire_date):
+        """``'dados'``, ``'expiracao'`` ou ``None`` (nada a gravar)"""
+        if self._stored is None:
+            return 'dados'
+        fingerprint, stored_expiry = self._stored
+        if self._fingerprint(data) != fingerprint:
+            return 'dados'
+        if expire_date - stored_expiry < timedelta(seconds=settings.SESSION_EXPIRY_REFRESH_SECONDS):
+            return None
+        return 'expiracao'
+
+    def _touched(self, updated, expire_date):
+        if not updated:
+            raise UpdateError
+        cache.touch(self.session_key, expire_date)
+        self._stored = (self._stored[0], expire_date)
+
+    def save(self, must_create=False):
+        if self.session_key is not None and not must_create:
+            expire_date = self.get_expiry_date()
+            write = self._pending_write(self._get_session(), expire_date)
+            if write is None:
+                return
+            if write == 'expiracao':
+                updated = self.model.objects.filter(session_key=self.session_key).update(expire_date=expire_date)
+                return self._touched(updated, expire_date)
+        super().save(must_create)
+        self._saved()
+
+    async def asave(self, must_create=False):
+        if self.session_key is not None and not must_create:
+            expire_date = await self.aget_expiry_date()
+            write = self._pending_write(await self._aget_session(), expire_date)
+            if write is None:
+                return
+            if write == 'expiracao':
+                updated = await self.model.objects.filter(session_key=self.session_key).aupdate(expire_date=expire_date)
+                return self._touched(updated, expire_date)
+        await super().asave(must_create)
+        self._saved()
+
+    def create_model_instance(self, data):
+        obj = super().create_model_instance(data)
+        self._written = (obj, data)
+        return obj
+
+    async def acreate_model_instance(self, data):
+        obj = await super().acreate_model_instance(data)
+        self._written = (obj, data)
+        return obj
+
+    def _saved(self):
+        written = self.__dict__.pop('_written', None)
+        if written is not None:
+            obj, data = written
+            self._remember(obj.session_data, data, obj.expire_date)
+
+    def delete(self, session_key=None):
+        cache.discard(session_key or self.session_key)
+        super().delete(session_key)
+
+    async def adelete(self, session_key=None):
+        cache.discard(session_key or self.session_key)
+        await super().adelete(session_key)
+
+    @classmethod
+    def clear_expired(cls, batch_size=None, pause=0):
+        """Apaga as sessões vencidas em lotes de ``batch_size``, com uma pausa
+        entre eles para outras escritas; retorna quantas foram apagadas"""
+        model = cls.get_model_class()
+        batch_size = batch_size or settings.SESSION_PURGE_BATCH_SIZE
+        deleted = 0
+        while True:
+            now = timezone.now()
+            keys = list(model.objects.filter(expire_date__lt=now).values_list('pk', flat=True)[:batch_size])
+            if keys:
+                deleted += model.objects.filter(pk__in=keys, expire_date__lt=now).delete()[0]
+            if len(keys) < batch_size:
+                return deleted
+            if pause:
+                time.sleep(pause)
+
+    @classmethod
+    async def aclear_expired(cls, batch_size=None, pause=0):
+        return await sync_to_async(cls.clear_expired)(batch_size, pause)
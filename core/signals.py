@@ -0,0 +1,94 @@
+from django.contrib.auth.signals import user_logged_in
+from django.db import connections
+from django.db.models.signals import post_migrate, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import TypingTest, BehavioralProfile, TestProgress, CandidateSummary
+from .page_cache import bump_user_version
+from .progress import remember_test_progress
+from .search import install_search_triggers, search_index_exists
+from .summary import current_summary_row, refresh_candidate_summary
+from .vaga_stats import SUMMARY_FIELDS, apply_changes, summary_changes
+from users.models import Users as User
+
+USER_SUMMARY_FIELDS = {'first_name', 'last_name', 'vaga'}
+
+
+@receiver(post_save, sender=User)
+def sync_user_summary(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """Mantém nome e vaga do resumo alinhados com o usuário"""
+    if raw:
+        return
+    if update_fields is not None and not USER_SUMMARY_FIELDS.intersection(update_fields):
+        # Ex.: login atualiza apenas last_login
+        return
+    previous = current_summary_row(instance.pk)
+    CandidateSummary.objects.update_or_create(
+        user=instance,
+        defaults={
+            'first_name': instance.first_name,
+            'last_name': instance.last_name,
+            'vaga': instance.vaga,
+        },
+    )
+    # Mudança de vaga move os resultados do candidato entre as estatísticas
+    apply_changes(summary_changes(previous, {'vaga': instance.vaga}))
+
+
+@receiver(post_save, sender=User)
+def create_test_progress(sender, instance, created, raw=False, **kwargs):
+    """Cria o progresso junto com o usuário, para que as páginas apenas o leiam"""
+    if created and not raw:
+        TestProgress.objects.get_or_create(user=instance)
+
+
+@receiver(user_logged_in)
+def load_test_progress_on_login(sender, request, user, **kwargs):
+    """Guarda o progresso na sessão, que já é gravada no login"""
+    remember_test_progress(request, user)
+
+
+@receiver(post_delete, sender=TypingTest)
+@receiver(post_delete, sender=BehavioralProfile)
+def refresh_summary_on_delete(sender, instance, origin=None, **kwargs):
+    """Recalcula o resumo quando um teste é removido (ex.: pelo admin)"""
+    if isinstance(origin, User) or getattr(origin, 'model', None) is User:
+        # O usuário inteiro está sendo removido; o resumo sai em cascada
+        return
+    refresh_candidate_summary(instance.user_id, create=False)
+
+
+@receiver(post_delete, sender=CandidateSummary)
+def remove_summary_statistics(sender, instance, **kwargs):
+    """Retira das estatísticas por vaga os resultados de um resumo removido"""
+    row = {'vaga': instance.vaga, **{field: getattr(instance, field) for field in SUMMARY_FIELDS}}
+    apply_changes(summary_changes(row, None))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_pages(sender, instance, update_fields=None, **kwargs):
+    """Invalida as páginas em cache do usuário alterado"""
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    bump_user_version(instance.pk)
+
+
+@receiver(post_save, sender=TypingTest)
+@receiver(post_save, sender=BehavioralProfile)
+@receiver(post_save, sender=TestProgress)
+@receiver(post_delete, sender=TypingTest)
+@receiver(post_delete, sender=BehavioralProfile)
+@receiver(post_delete, sender=TestProgress)
+def invalidate_owner_pages(sender, instance, **kwargs):
+    """Invalida as páginas em cache do dono do teste ou progresso alterado"""
+    bump_user_version(instance.user_id)
+
+
+@receiver(post_migrate)
+def restore_search_triggers(sender, using, **kwargs):
+    """Recria os gatilhos da busca descartados quando o Django reconstrói uma tabela"""
+    connection = connections[using]
+    if sender.label != 'core' or connection.vendor != 'sqlite' or not search_index_exists(connection):
+        return
+    install_search_triggers(connection)
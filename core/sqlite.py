@@ -0,0 +1,134 @@
+"""Instrumentação do bloqueio de escrita do SQLite.
+
+O SQLite aceita um único escritor por vez. Os pragmas e o ``BEGIN IMMEDIATE``
+configurados em ``fitcultural/settings.py`` fazem a espera acontecer no início
+da transação (ou no próprio comando, em autocommit). Este módulo instala em
+cada conexão um ``execute_wrapper`` que mede essa espera, tenta de novo quando
+o ``busy_timeout`` se esgota e acumula os números em ``lock_stats``.
+
+Dentro de um processo, as escritas também passam por ``serialized_write``:
+com muitas threads (ex.: views assíncronas sob ASGI), esperar em fila em um
+lock do Python é mais justo e barato que disputar o busy handler do SQLite,
+que dorme em intervalos crescentes e pode estourar o ``busy_timeout``.
+"""
+import contextlib
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+WRITE_PREFIXES = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+_write_lock = threading.RLock()
+
+
+@contextlib.contextmanager
+def serialized_write(using='default'):
+    """Executa o bloco como o único escritor do processo (apenas no SQLite)"""
+    if connections[using].vendor != 'sqlite':
+        yield
+        return
+    with _write_lock:
+        yield
+
+
+class LockStats:
+    """Contadores de espera pelo bloqueio de escrita do processo"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.acquisitions = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.retries = 0
+        self.failures = 0
+
+    def record(self, wait, retries, failed=False):
+        with self._lock:
+            self.acquisitions += 1
+            self.wait_seconds += wait
+            self.max_wait_seconds = max(self.max_wait_seconds, wait)
+            self.retries += retries
+            self.failures += failed
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'acquisitions': self.acquisitions,
+                'wait_seconds': self.wait_seconds,
+                'max_wait_seconds': self.max_wait_seconds,
+                'retries': self.retries,
+                'failures': self.failures,
+            }
+
+
+lock_stats = LockStats()
+
+
+def _is_locked(error):
+    message = str(error)
+    return 'database is locked' in message or 'database is busy' in message
+
+
+def _acquires_lock(sql, connection):
+    # Dentro de uma transação IMMEDIATE o bloqueio já foi obtido no BEGIN
+    statement = sql.lstrip().upper()
+    return statement.startswith('BEGIN') or (
+        not connection.in_atomic_block and statement.startswith(WRITE_PREFIXES)
+    )
+
+
+def lock_monitor(execute, sql, params, many, context):
+    """``execute_wrapper`` que mede a espera e repete comandos bloqueados.
+
+    Só os comandos que obtêm o bloqueio são repetidos: um ``BEGIN`` ou uma
+    escrita em autocommit ainda não alteraram nada quando falham por bloqueio.
+    """
+    if not _acquires_lock(sql, context['connection']):
+        return execute(sql, params, many, context)
+
+    if not sql.lstrip().upper().startswith('BEGIN'):
+        # Escrita em autocommit: entra na fila do processo como as transações
+        with _write_lock:
+            return _execute_with_retries(execute, sql, params, many, context)
+    return _execute_with_retries(execute, sql, params, many, context)
+
+
+def _execute_with_retries(execute, sql, params, many, context):
+    retries = 0
+    start = time.perf_counter()
+    while True:
+        try:
+            result = execute(sql, params, many, context)
+            break
+        except Exception as e:
+            if not _is_locked(e) or retries >= settings.SQLITE_LOCK_RETRIES:
+                lock_stats.record(time.perf_counter() - start, retries, failed=_is_locked(e))
+                raise
+            retries += 1
+            time.sleep(0.01 * 2 ** retries)
+
+    wait = time.perf_counter() - start
+    lock_stats.record(wait, retries)
+    if wait * 1000 >= settings.SQLITE_SLOW_LOCK_MS or retries:
+        logger.warning(
+            "Espera de %.0f ms (%d novas tentativas) pelo bloqueio do SQLite: %s",
+            wait * 1000, retries, sql[:200],
+        )
+    return result
+
+
+@receiver(connection_created)
+def install_lock_monitor(sender, connection, **kwargs):
+    """Instala o monitor nas conexões SQLite (uma vez por ``DatabaseWrapper``)"""
+    if connection.vendor == 'sqlite' and lock_monitor not in connection.execute_wrappers:
+        connection.execute_wrappers.append(lock_monitor)
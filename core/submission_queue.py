@@ -0,0 +1,414 @@
+"""Fila durável das submissões dos testes (write-behind).
+
+Quando uma sala inteira termina o teste no mesmo minuto, gravar cada
+submissão na requisição faz centenas de transações disputarem o único
+escritor do SQLite, e as últimas estouram o ``busy_timeout``. Com
+``SUBMISSION_QUEUE_ENABLED``, os endpoints de salvamento apenas:
+
+1. validam a submissão (``core.submissions.prepare_*``, sem acessar o banco);
+2. a acrescentam ao diário, um arquivo SQLite separado
+   (``SUBMISSION_QUEUE_PATH``, WAL com ``synchronous=FULL``: a entrada está
+   no disco antes da resposta), que não disputa o bloqueio do banco principal;
+3. respondem 202 com um recibo, consultável em ``api/submissoes/<recibo>/``.
+
+A drenagem (``drain``) grava as entradas em lotes de
+``SUBMISSION_QUEUE_BATCH_SIZE``, uma transação por lote e um savepoint por
+entrada, então uma entrada inválida não derruba as demais. Roda em uma thread
+do processo web (``SUBMISSION_QUEUE_WORKER = 'thread'``), acordada a cada nova
+entrada, ou no comando ``drain_submissions``. A thread é iniciada na primeira
+requisição do processo, para que as entradas deixadas por um processo anterior
+sejam gravadas sem esperar uma nova submissão.
+
+Cada entrada passa por pendente → processando → aplicada (ou falhou). O
+recibo é gravado em ``AppliedSubmission`` na mesma transação que o teste: se o
+processo cair entre o commit no banco e a baixa no diário, a entrada volta
+para a fila após ``SUBMISSION_QUEUE_CLAIM_TIMEOUT`` e é apenas marcada como
+aplicada, sem gravar o teste de novo.
+"""
+import contextlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import IntegrityError, close_old_connections, transaction
+from django.dispatch import receiver
+
+from .models import AppliedSubmission
+from .page_cache import bump_user_version
+from .sqlite import serialized_write
+from .submissions import (
+    prepare_behavioral_submission, prepare_typing_submission,
+    write_behavioral_submission, write_typing_submission,
+)
+
+logger = logging.getLogger(__name__)
+
+PENDING, CLAIMED, APPLIED, FAILED = range(4)
+STATES = {PENDING: 'pendente', CLAIMED: 'processando', APPLIED: 'aplicada', FAILED: 'falhou'}
+
+# tipo -> (validação, gravação); o mesmo tipo de AppliedSubmission.kind
+KINDS = {
+    'typing': (prepare_typing_submission, write_typing_submission),
+    'behavioral': (prepare_behavioral_submission, write_behavioral_submission),
+}
+
+# Entradas aplicadas mais recentes usadas no atraso de aplicação das métricas
+LAG_WINDOW = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    receipt TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    enqueued_at REAL NOT NULL,
+    state INTEGER NOT NULL DEFAULT 0,
+    claimed_at REAL,
+    applied_at REAL,
+    object_id INTEGER,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS submissions_state_idx ON submissions (state, seq);
+"""
+
+
+def _datetime(timestamp):
+    return None if timestamp is None else datetime.fromtimestamp(timestamp, tz=dt_timezone.utc)
+
+
+class SubmissionJournal:
+    """Diário das submissões em um arquivo SQLite próprio.
+
+    Uma conexão por diário, protegida por um lock: as operações são curtas e
+    o diário não compartilha o bloqueio de escrita do banco principal.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._connection = None
+
+    def _connect(self):
+        if self._connection is None:
+            connection = sqlite3.connect(
+                self.path, timeout=settings.SQLITE_BUSY_TIMEOUT_MS / 1000,
+                isolation_level=None, check_same_thread=False,
+            )
+            connection.execute('PRAGMA journal_mode=wal')
+            connection.execute('PRAGMA synchronous=full')
+            connection.executescript(SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """Transação com a escrita reservada desde o início; chamar com ``self._lock``"""
+        connection = self._connect()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield connection
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def enqueue(self, kind, user_id, payload):
+        """Acrescenta uma submissão já validada e retorna o recibo"""
+        receipt = uuid.uuid4().hex
+        with self._lock:
+            self._connect().execute(
+                'INSERT INTO submissions (receipt, kind, user_id, payload, enqueued_at) VALUES (?, ?, ?, ?, ?)',
+                (receipt, kind, user_id, json.dumps(payload, separators=(',', ':')), time.time()),
+            )
+        return receipt
+
+    def claim(self, limit):
+        """Reserva até ``limit`` entradas pendentes (ou abandonadas), em ordem de chegada"""
+        now = time.time()
+        with self._lock, self._transaction() as connection:
+            rows = connection.execute(
+                'SELECT seq, receipt, kind, user_id, payload, enqueued_at FROM submissions '
+                'WHERE state = ? OR (state = ? AND claimed_at < ?) ORDER BY seq LIMIT ?',
+                (PENDING, CLAIMED, now - settings.SUBMISSION_QUEUE_CLAIM_TIMEOUT, limit),
+            ).fetchall()
+            connection.executemany(
+                'UPDATE submissions SET state = ?, claimed_at = ? WHERE seq = ?',
+                [(CLAIMED, now, row[0]) for row in rows],
+            )
+        return rows
+
+    def finish(self, applied, failed):
+        """Baixa das entradas: ``applied`` como ``{seq: object_id}``, ``failed`` como ``{seq: erro}``"""
+        now = time.time()
+        with self._lock, self._transaction() as connection:
+            connection.executemany(
+                'UPDATE submissions SET state = ?, applied_at = ?, object_id = ?, error = NULL WHERE seq = ?',
+                [(APPLIED, now, object_id, seq) for seq, object_id in applied.items()],
+            )
+            connection.executemany(
+                'UPDATE submissions SET state = ?, error = ? WHERE seq = ?',
+                [(FAILED, error, seq) for seq, error in failed.items()],
+            )
+
+    def release(self, seqs):
+        """Devolve entradas reservadas para a fila (ex.: o lote falhou por bloqueio)"""
+        with self._lock:
+            self._connect().execute(
+                f'UPDATE submissions SET state = ?, claimed_at = NULL '
+                f'WHERE state = ? AND seq IN ({",".join("?" * len(seqs))})',
+                (PENDING, CLAIMED, *seqs),
+            )
+
+    def status(self, receipt):
+        """Situação de uma entrada, ou ``None`` se o recibo não está no diário"""
+        with self._lock:
+            row = self._connect().execute(
+                'SELECT receipt, kind, user_id, state, enqueued_at, applied_at, object_id, error '
+                'FROM submissions WHERE receipt = ?', (receipt,),
+            ).fetchone()
+        if row is None:
+            return None
+        receipt, kind, user_id, state, enqueued_at, applied_at, object_id, error = row
+        return {
+            'receipt': receipt,
+            'kind': kind,
+            'user_id': user_id,
+            'state': STATES[state],
+            'enqueued_at': _datetime(enqueued_at),
+            'applied_at': _datetime(applied_at),
+            'object_id': object_id,
+            'error': error,
+        }
+
+    def metrics(self):
+        """Profundidade da fila e atraso de aplicação (segundos)"""
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            counts = dict(connection.execute('SELECT state, COUNT(*) FROM submissions GROUP BY state'))
+            oldest = connection.execute(
+                'SELECT MIN(enqueued_at) FROM submissions WHERE state IN (?, ?)', (PENDING, CLAIMED),
+            ).fetchone()[0]
+            lags = sorted(row[0] for row in connection.execute(
+                'SELECT applied_at - enqueued_at FROM submissions WHERE state = ? ORDER BY seq DESC LIMIT ?',
+                (APPLIED, LAG_WINDOW),
+            ))
+        return {
+            'depth': counts.get(PENDING, 0) + counts.get(CLAIMED, 0),
+            'states': {name: counts.get(state, 0) for state, name in STATES.items()},
+            'oldest_pending_seconds': None if oldest is None else now - oldest,
+            'apply_lag_seconds': {
+                'window': len(lags),
+                'mean': sum(lags) / len(lags) if lags else None,
+                'p95': lags[int(0.95 * (len(lags) - 1))] if lags else None,
+                'max': lags[-1] if lags else None,
+            },
+        }
+
+    def purge(self, older_than_days):
+        """Apaga as entradas aplicadas há mais de ``older_than_days``; as que falharam ficam"""
+        with self._lock:
+            cursor = self._connect().execute(
+                'DELETE FROM submissions WHERE state = ? AND applied_at < ?',
+                (APPLIED, time.time() - older_than_days * 86400),
+            )
+        return cursor.rowcount
+
+
+_journals = {}
+_journals_lock = threading.Lock()
+
+
+def journal():
+    """Diário de ``SUBMISSION_QUEUE_PATH`` (um por caminho e processo).
+
+    Com a fila desligada, ``None`` se o arquivo não existe: consultas de
+    situação e métricas não criam o diário. Um diário que sobrou de quando a
+    fila estava ligada continua legível e drenável.
+    """
+    path = settings.SUBMISSION_QUEUE_PATH
+    if not settings.SUBMISSION_QUEUE_ENABLED and not os.path.exists(path):
+        return None
+    with _journals_lock:
+        if path not in _journals:
+            _journals[path] = SubmissionJournal(path)
+        return _journals[path]
+
+
+def enqueue_submission(kind, user, payload):
+    """Valida a submissão, a grava no diário e retorna o recibo.
+
+    Erros de validação (``ValueError``) sobem antes de qualquer escrita, para
+    que o navegador receba o 400 na hora, como no caminho síncrono.
+    """
+    prepare, _ = KINDS[kind]
+    prepare(user, payload)
+    receipt = journal().enqueue(kind, user.pk, payload)
+    notify_worker()
+    return receipt
+
+
+def submission_status(receipt):
+    """Situação de um recibo, no diário ou, depois da limpeza, em ``AppliedSubmission``"""
+    queue = journal()
+    status = queue.status(receipt) if queue is not None else None
+    if status is not None:
+        return status
+    applied = AppliedSubmission.objects.filter(receipt=receipt).first()
+    if applied is None:
+        return None
+    return {
+        'receipt': applied.receipt,
+        'kind': applied.kind,
+        'user_id': applied.user_id,
+        'state': STATES[APPLIED],
+        'enqueued_at': applied.enqueued_at,
+        'applied_at': applied.applied_at,
+        'object_id': applied.object_id,
+        'error': None,
+    }
+
+
+def _applied_receipts(receipts):
+    """``{recibo: object_id}`` das entradas já gravadas no banco"""
+    return dict(AppliedSubmission.objects.filter(receipt__in=receipts).values_list('receipt', 'object_id'))
+
+
+def _apply(entries, users):
+    """Grava as entradas em uma transação; retorna ``(aplicadas, falhas)`` por seq"""
+    applied, failed = {}, {}
+    done = _applied_receipts([entry[1] for entry in entries])
+
+    # Validação e métricas fora do bloqueio de escrita
+    pending = []
+    for seq, receipt, kind, user_id, payload, enqueued_at in entries:
+        if receipt in done:
+            # Já gravada antes de uma queda do processo: só falta a baixa
+            applied[seq] = done[receipt]
+        elif user_id not in users:
+            failed[seq] = f"Usuário {user_id} não existe"
+        else:
+            prepare, write = KINDS[kind]
+            try:
+                prepared = prepare(users[user_id], json.loads(payload))
+            except ValueError as error:
+                failed[seq] = str(error)
+            else:
+                pending.append((seq, receipt, kind, users[user_id], write, prepared, _datetime(enqueued_at)))
+
+    with serialized_write(), transaction.atomic():
+        for seq, receipt, kind, user, write, prepared, completed_at in pending:
+            try:
+                # Um savepoint por entrada: uma falha não desfaz as outras do lote
+                with transaction.atomic():
+                    instance = write(user, prepared, completed_at)
+                    AppliedSubmission.objects.create(
+                        receipt=receipt, kind=kind, user=user, object_id=instance.pk, enqueued_at=completed_at,
+                    )
+            except IntegrityError as error:
+                # A reserva expirou durante a gravação e outra drenagem aplicou
+                # a mesma entrada; o savepoint desfez esta cópia
+                done = _applied_receipts([receipt])
+                if receipt in done:
+                    applied[seq] = done[receipt]
+                else:
+                    failed[seq] = str(error)
+            else:
+                applied[seq] = instance.pk
+    return applied, failed
+
+
+def drain(batch_size=None):
+    """Grava um lote da fila no banco; retorna quantas entradas foram processadas"""
+    from users.models import Users as User
+
+    queue = journal()
+    if queue is None:
+        return 0
+    entries = queue.claim(batch_size or settings.SUBMISSION_QUEUE_BATCH_SIZE)
+    if not entries:
+        return 0
+    try:
+        users = User.objects.in_bulk({entry[3] for entry in entries})
+        applied, failed = _apply(entries, users)
+    except Exception:
+        # Ex.: bloqueio do banco esgotado; o lote inteiro volta para a fila
+        queue.release([entry[0] for entry in entries])
+        raise
+    queue.finish(applied, failed)
+    user_ids = {entry[0]: entry[3] for entry in entries}
+    for seq, error in failed.items():
+        logger.error("Submissão %s da fila falhou: %s", seq, error)
+        # A sessão marcou o teste como concluído ao enfileirar
+        # (aremember_pending_progress); a nova versão faz o progresso ser
+        # relido do banco, e o candidato pode refazer o teste
+        bump_user_version(user_ids[seq])
+    return len(entries)
+
+
+class SubmissionWorker(threading.Thread):
+    """Thread que drena a fila do processo web, acordada a cada entrada nova"""
+
+    def __init__(self):
+        super().__init__(name='submission-queue', daemon=True)
+        self.wake = threading.Event()
+
+    def run(self):
+        while True:
+            self.wake.wait(settings.SUBMISSION_QUEUE_POLL_SECONDS)
+            self.wake.clear()
+            # Espera um pouco para juntar as submissões que chegam em rajada
+            time.sleep(settings.SUBMISSION_QUEUE_LINGER_MS / 1000)
+            close_old_connections()
+            try:
+                while drain() >= settings.SUBMISSION_QUEUE_BATCH_SIZE:
+                    pass
+            except Exception:
+                logger.exception("Falha ao drenar a fila de submissões")
+            finally:
+                close_old_connections()
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def notify_worker():
+    """Acorda (e, na primeira vez, inicia) a thread de drenagem do processo"""
+    global _worker
+    if settings.SUBMISSION_QUEUE_WORKER != 'thread':
+        return
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = SubmissionWorker()
+            _worker.start()
+    _worker.wake.set()
+
+
+def worker_alive():
+    return _worker is not None and _worker.is_alive()
+
+
+@receiver(request_started)
+def start_worker(sender, **kwargs):
+    """Inicia a drenagem na primeira requisição, e de novo se a thread morrer.
+
+    Não roda no ``AppConfig.ready``: lá a thread também subiria em ``migrate``
+    e nos demais comandos, inclusive no próprio ``drain_submissions``.
+    """
+    if settings.SUBMISSION_QUEUE_ENABLED and not worker_alive():
+        notify_worker()
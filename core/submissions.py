@@ -0,0 +1,176 @@
+"""Persistência das submissões dos testes.
+
+Cada submissão é gravada em uma única transação: o teste, as fases em um
+único INSERT (``bulk_create``), e o progresso e o resumo do candidato por
+upsert. No SQLite isso significa um único commit (e fsync) por submissão,
+e uma falha no meio não deixa testes órfãos.
+
+A validação (``prepare_*``) não acessa o banco e fica separada da gravação
+(``write_*``), para que a fila de submissões (``core.submission_queue``)
+valide na requisição e grave depois, várias submissões por transação.
+"""
+import math
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import TypingTest, TypingTestPhase, BehavioralProfile, TestProgress
+from .keystrokes import encode_keystrokes
+from .phrases import PHRASES_PER_TEST, UnknownPhrase, assigned_phrases, find_phrase, normalized_wpm, phrase_text
+from .answers import pack_answers
+from .scoring import answers_vector, score_matrix
+from .typing_metrics import phase_metrics, averages
+from .summary import record_typing_test, record_behavioral_profile
+from .page_cache import bump_user_version
+from .sqlite import serialized_write
+
+TYPING_PHASES = PHRASES_PER_TEST
+
+
+def _mark_progress(user, **flags):
+    """Marca um teste como concluído com um único upsert no ``TestProgress``"""
+    TestProgress.objects.bulk_create(
+        [TestProgress(user=user, **flags)],
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=[*flags, 'updated_at'],
+    )
+    # O upsert não dispara sinais; as páginas do usuário são invalidadas aqui
+    bump_user_version(user.pk)
+
+
+def _phrase(phase_data, user_id, index):
+    """``(versão, id)`` da frase da fase, ou ``None`` para um texto fora do banco.
+
+    O texto vem do banco de frases quando o navegador informa o id; o
+    ``originalPhrase`` enviado só é usado por clientes antigos, sem id. A frase
+    precisa ser a atribuída ao candidato para a fase (``assigned_phrases``):
+    sem isso, bastaria enviar as frases mais fáceis do banco para inflar o WPM
+    normalizado. Um texto antigo que não é o atribuído fica fora do banco.
+    """
+    if phase_data.get('phraseId') is None:
+        phrase = find_phrase(str(phase_data['originalPhrase']))
+        if phrase and assigned_phrases(user_id, phrase[0])[index] != phrase[1]:
+            return None
+        return phrase
+    phrase = (int(phase_data['phraseVersion']), int(phase_data['phraseId']))
+    phrase_text(*phrase)  # UnknownPhrase (ValueError) se não existir
+    if assigned_phrases(user_id, phrase[0])[index] != phrase[1]:
+        raise UnknownPhrase(f"Frase {phrase[1]} não atribuída ao candidato na fase {index + 1}")
+    return phrase
+
+
+def prepare_typing_submission(user, data):
+    """Valida as fases enviadas pelo navegador e calcula as métricas, sem acessar o banco.
+
+    Retorna ``(fases não salvas, wpm médio, acurácia média)``.
+    """
+    # Validar se data é uma lista
+    if not isinstance(data, list):
+        raise ValueError(f"Esperado lista de fases, recebido: {type(data)}")
+
+    if len(data) != TYPING_PHASES:
+        raise ValueError(f"Esperado {TYPING_PHASES} fases, recebidas: {len(data)}")
+    # Uma fase de cada número: repetidas só falhariam no índice único da
+    # gravação, depois que a fila já respondeu 202
+    numbers = [int(phase_data['phase']) for phase_data in data]
+    if sorted(numbers) != list(range(1, TYPING_PHASES + 1)):
+        raise ValueError(f"Fases inválidas: {numbers}")
+
+    phases = []
+    for number, phase_data in zip(numbers, data):
+        phrase = _phrase(phase_data, user.pk, number - 1)
+        original_phrase = phrase_text(*phrase) if phrase else str(phase_data['originalPhrase'])
+        typed_text = str(phase_data['typedText'])
+        time_seconds = float(phase_data['timeSeconds'])
+        if not math.isfinite(time_seconds) or time_seconds <= 0:
+            raise ValueError(f"Tempo inválido na fase {number}: {time_seconds}")
+
+        # WPM e acurácia são recalculados no servidor; os valores do navegador são ignorados
+        metrics = phase_metrics(original_phrase, typed_text, time_seconds)
+        phases.append(TypingTestPhase(
+            phase_number=number,
+            original_phrase=original_phrase,
+            typed_text=typed_text,
+            time_seconds=time_seconds,
+            wpm=metrics.wpm,
+            accuracy=metrics.accuracy,
+            word_accuracy=metrics.word_accuracy,
+            phrase_version=phrase[0] if phrase else None,
+            phrase_id=phrase[1] if phrase else None,
+            normalized_wpm=normalized_wpm(metrics.wpm, *phrase) if phrase else None,
+            keystrokes=encode_keystrokes(phase_data['keystrokes']) if phase_data.get('keystrokes') else None,
+        ))
+
+    # Calcular médias
+    wpm_average, accuracy_average = averages(phases)
+    return phases, wpm_average, accuracy_average
+
+
+def write_typing_submission(user, prepared, completed_at):
+    """Grava um teste preparado por ``prepare_typing_submission``.
+
+    Deve rodar dentro de ``serialized_write()`` e de uma transação.
+    """
+    phases, wpm_average, accuracy_average = prepared
+    typing_test = TypingTest.objects.create(
+        user=user,
+        wpm_average=wpm_average,
+        accuracy_average=accuracy_average
+    )
+    for phase in phases:
+        phase.typing_test = typing_test
+    TypingTestPhase.objects.bulk_create(phases)
+
+    _mark_progress(user, typing_test_completed=True, typing_test_completed_at=completed_at)
+
+    # Atualizar resumo do candidato na mesma transação
+    record_typing_test(typing_test, completed_at)
+    return typing_test
+
+
+def save_typing_submission(user, data):
+    """Valida e grava as fases do teste de digitação enviadas pelo navegador"""
+    prepared = prepare_typing_submission(user, data)
+    with serialized_write(), transaction.atomic():
+        return write_typing_submission(user, prepared, timezone.now())
+
+
+def prepare_behavioral_submission(user, answers):
+    """Valida e pontua as respostas do teste comportamental: ``(vetor, scores)``.
+
+    Os scores são sempre calculados no servidor a partir das respostas; o
+    ``user`` não é usado, e está aqui pela mesma assinatura de ``prepare_typing_submission``.
+    """
+    vector = answers_vector(answers)
+    return vector, score_matrix([vector])[0]
+
+
+def write_behavioral_submission(user, prepared, completed_at):
+    """Grava um perfil preparado por ``prepare_behavioral_submission``.
+
+    Deve rodar dentro de ``serialized_write()`` e de uma transação.
+    """
+    vector, scores = prepared
+    behavioral_profile = BehavioralProfile.objects.create(
+        user=user,
+        quadrant_a_score=scores.A,
+        quadrant_b_score=scores.B,
+        quadrant_c_score=scores.C,
+        quadrant_d_score=scores.D,
+        dominant_quadrant=scores.dominant,
+        packed_answers=pack_answers(vector),
+    )
+
+    _mark_progress(user, behavioral_test_completed=True, behavioral_test_completed_at=completed_at)
+
+    # Atualizar resumo do candidato na mesma transação
+    record_behavioral_profile(behavioral_profile, completed_at)
+    return behavioral_profile
+
+
+def save_behavioral_submission(user, answers):
+    """Valida, pontua e grava as respostas do teste comportamental"""
+    prepared = prepare_behavioral_submission(user, answers)
+    with serialized_write(), transaction.atomic():
+        return write_behavioral_submission(user, prepared, timezone.now())
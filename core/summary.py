@@ -0,0 +1,173 @@
+"""Manutenção do modelo de leitura ``CandidateSummary``.
+
+O resumo guarda, em uma única linha por usuário, os dados exibidos na listagem
+de candidatos: o último teste de digitação, o último perfil comportamental e o
+progresso. Ele deve ser atualizado na mesma transação das escritas de origem,
+e cada alteração é repassada às estatísticas por vaga (``core.vaga_stats``).
+"""
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+from django.utils import timezone
+
+from .models import TypingTest, BehavioralProfile, CandidateSummary
+from .page_cache import invalidate_all_pages
+from .vaga_stats import SUMMARY_FIELDS, apply_changes, rebuild_vaga_statistics, summary_changes
+from users.models import Users as User
+
+# Colunas recalculadas a partir das tabelas de origem
+SUMMARY_COLUMNS = [
+    field.name for field in CandidateSummary._meta.concrete_fields
+    if field.name not in ('id', 'user', 'updated_at')
+]
+
+
+def _latest(model, field):
+    """Subquery com o campo do registro mais recente do usuário"""
+    return Subquery(
+        model.objects.filter(user=OuterRef('pk')).order_by('-created_at', '-id').values(field)[:1]
+    )
+
+
+def summary_rows(users):
+    """Projeta um queryset de usuários nos valores do ``CandidateSummary``"""
+    return users.values(
+        'id',
+        'first_name',
+        'last_name',
+        'vaga',
+        typing_test_created_at=_latest(TypingTest, 'created_at'),
+        wpm_average=_latest(TypingTest, 'wpm_average'),
+        accuracy_average=_latest(TypingTest, 'accuracy_average'),
+        behavioral_profile_created_at=_latest(BehavioralProfile, 'created_at'),
+        quadrant_a_score=_latest(BehavioralProfile, 'quadrant_a_score'),
+        quadrant_b_score=_latest(BehavioralProfile, 'quadrant_b_score'),
+        quadrant_c_score=_latest(BehavioralProfile, 'quadrant_c_score'),
+        quadrant_d_score=_latest(BehavioralProfile, 'quadrant_d_score'),
+        dominant_quadrant=_latest(BehavioralProfile, 'dominant_quadrant'),
+        typing_test_completed=F('test_progress__typing_test_completed'),
+        typing_test_completed_at=F('test_progress__typing_test_completed_at'),
+        behavioral_test_completed=F('test_progress__behavioral_test_completed'),
+        behavioral_test_completed_at=F('test_progress__behavioral_test_completed_at'),
+    )
+
+
+def _defaults(row):
+    values = dict(row)
+    values.pop('id')
+    # Usuários sem TestProgress vêm do LEFT JOIN com NULL
+    values['typing_test_completed'] = bool(values['typing_test_completed'])
+    values['behavioral_test_completed'] = bool(values['behavioral_test_completed'])
+    return values
+
+
+def current_summary_row(user_id):
+    """Valores do resumo usados pelas estatísticas por vaga, ou ``None``"""
+    return CandidateSummary.objects.filter(user_id=user_id).values('vaga', *SUMMARY_FIELDS).first()
+
+
+def refresh_candidate_summary(user_id, create=True):
+    """Recalcula o resumo de um usuário.
+
+    Com ``create=False`` apenas atualiza um resumo existente, o que é seguro
+    durante a exclusão em cascata do próprio usuário.
+    """
+    previous = current_summary_row(user_id)
+    row = summary_rows(User.objects.filter(pk=user_id)).first()
+    if row is None:
+        # O post_delete (remove_summary_statistics) retira o resumo das estatísticas
+        CandidateSummary.objects.filter(user_id=user_id).delete()
+        return None
+
+    defaults = _defaults(row)
+    if not create:
+        if previous is not None:
+            # update() não preenche o auto_now; sem o updated_at novo, a
+            # sincronização incremental de core.matching não vê a alteração
+            CandidateSummary.objects.filter(user_id=user_id).update(**defaults, updated_at=timezone.now())
+            apply_changes(summary_changes(previous, defaults))
+        return None
+
+    # Upsert em um único comando em vez de SELECT + UPDATE/INSERT
+    summary = CandidateSummary(user_id=user_id, **defaults)
+    CandidateSummary.objects.bulk_create(
+        [summary],
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=[*defaults, 'updated_at'],
+    )
+    apply_changes(summary_changes(previous, defaults))
+    return summary
+
+
+def _upsert(user, **values):
+    """Grava apenas os campos informados, criando o resumo se necessário"""
+    previous = current_summary_row(user.pk)
+    CandidateSummary.objects.bulk_create(
+        [CandidateSummary(user=user, first_name=user.first_name, last_name=user.last_name, vaga=user.vaga, **values)],
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=[*values, 'updated_at'],
+    )
+    # Resumos existentes mantêm a própria vaga, que não é alterada aqui
+    vaga = previous['vaga'] if previous is not None else user.vaga
+    apply_changes(summary_changes(previous, {'vaga': vaga, **values}))
+
+
+def record_typing_test(typing_test, completed_at):
+    """Atualiza o resumo com um teste de digitação recém-criado.
+
+    Evita a consulta de recálculo: o teste acabou de ser gravado e é o mais recente.
+    """
+    _upsert(
+        typing_test.user,
+        typing_test_created_at=typing_test.created_at,
+        wpm_average=typing_test.wpm_average,
+        accuracy_average=typing_test.accuracy_average,
+        typing_test_completed=True,
+        typing_test_completed_at=completed_at,
+    )
+
+
+def record_behavioral_profile(profile, completed_at):
+    """Atualiza o resumo com um perfil comportamental recém-criado"""
+    _upsert(
+        profile.user,
+        behavioral_profile_created_at=profile.created_at,
+        quadrant_a_score=profile.quadrant_a_score,
+        quadrant_b_score=profile.quadrant_b_score,
+        quadrant_c_score=profile.quadrant_c_score,
+        quadrant_d_score=profile.quadrant_d_score,
+        dominant_quadrant=profile.dominant_quadrant,
+        behavioral_test_completed=True,
+        behavioral_test_completed_at=completed_at,
+    )
+
+
+def rebuild_candidate_summaries(batch_size=1000):
+    """Reconstrói todos os resumos (e as estatísticas por vaga) a partir das tabelas de origem.
+
+    Os resumos saem em cascata com o usuário, então não há linhas órfãs:
+    basta sobrescrever todas por upsert.
+    """
+    def flush(batch):
+        CandidateSummary.objects.bulk_create(
+            batch,
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=[*SUMMARY_COLUMNS, 'updated_at'],
+        )
+        return len(batch)
+
+    total = 0
+    with transaction.atomic():
+        batch = []
+        for row in summary_rows(User.objects.order_by('pk')).iterator(chunk_size=batch_size):
+            batch.append(CandidateSummary(user_id=row['id'], **_defaults(row)))
+            if len(batch) >= batch_size:
+                total += flush(batch)
+                batch = []
+        if batch:
+            total += flush(batch)
+        rebuild_vaga_statistics()
+        invalidate_all_pages()
+    return total
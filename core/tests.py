@@ -1,19 +1,1416 @@
-from django.test import TestCase
-
-# # Create your tests here.
-# import sqlite3
-
-# def test_database_connection():
-#     try:
-#         # Tenta conectar ao banco de dados SQLite padrão do Django
-#         conn = sqlite3.connect('db.sqlite3')
-#         conn.close()
-#         print("Conexão com o banco de dados bem-sucedida.")
-#     except sqlite3.Error as e:
-#         print(f"Erro ao conectar ao banco de dados: {e}")
-
-# conn = sqlite3.connect('db.sqlite3')
-# cur = conn.cursor()
-# conn.execute("UPDATE core_testprogress SET behavioral_test_completed = 0, typing_test_completed = 0 WHERE user_id = 1")
-# conn.commit()
-# conn.close()
\ No newline at end of file
+import csv
+import io
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import unittest
+import zipfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib import admin
+from django.core.management import call_command
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.templatetags.static import static
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rolepermissions.roles import assign_role
+
+from .answers import LAYOUTS, PACKED_SIZE, Layout, pack_answers, unpack_answers
+from .archive import CorruptFrame, compress_frame, decompress_frame
+from .assets import minify_css, minify_js
+from .checks import _hardcoded_static, check_page_cache_shared, check_static_build, check_static_references
+from .export import HEADER, export_rows
+from .forms import CandidatoFiltroForm
+from .keystrokes import MAX_EVENTS, MAX_VALUE, KeystrokeError, decode_keystrokes, encode_keystrokes
+from .matching import FEATURES as MATCH_FEATURES, CandidateMatcher, VagaIndex, _squared_distance
+from .models import (
+    AppliedSubmission, BehavioralProfile, CandidateSummary, TestProgress, TypingTest, TypingTestPhase,
+    TypingTestPhaseArchive, VagaStatistic,
+)
+from .page_cache import bump_user_version, cached_context, page_version
+from .pagination import encode_cursor, paginate_keyset
+from .phrases import FEATURES, PHRASE_BANK_VERSION, PHRASE_BANKS, PHRASES_PER_TEST, UnknownPhrase, assigned_phrases
+from .profiling import view_histograms
+from .scoring import (
+    QUESTION_BANK_VERSION, QUESTION_IDS, QUESTION_QUADRANTS, InvalidAnswers, _round_half_up, normalized_answers,
+    score_matrix,
+)
+from .search import search_candidates
+from .sessions import SessionStore, cache as session_cache
+from .sqlite import lock_monitor, lock_stats, serialized_write
+from .submission_queue import PENDING, drain, enqueue_submission, journal
+from .submissions import prepare_typing_submission, save_behavioral_submission, save_typing_submission
+from .summary import record_behavioral_profile, refresh_candidate_summary, summary_rows
+from .typing_metrics import edit_distance, phase_metrics
+from .vaga_stats import rebuild_vaga_statistics
+from .views import _detalhes_candidato_context
+from users.models import Users as User
+
+
+class HotQueryPlanTests(TestCase):
+    """Os caminhos de acesso mais usados devem seguir um índice.
+
+    Cada consulta passa por ``EXPLAIN QUERY PLAN``; o teste falha se o plano
+    varrer uma tabela inteira sem índice ou ordenar em uma árvore temporária.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='candidato@example.com', username='candidato', password='senha', vaga='Suporte',
+        )
+
+    def query_plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertUsesIndexes(self, queryset):
+        plan = self.query_plan(queryset)
+        for step in plan:
+            self.assertNotIn('TEMP B-TREE', step, f"ordenação sem índice: {plan}")
+            if step.startswith('SCAN ') and ' USING ' not in step:
+                self.fail(f"varredura completa: {plan}")
+
+    def listing(self, **params):
+        # Mesmo queryset da view relatorios
+        form = CandidatoFiltroForm(params)
+        self.assertTrue(form.is_valid(), form.errors)
+        candidatos = form.filter(CandidateSummary.objects.filter(
+            typing_test_completed=True,
+            typing_test_created_at__isnull=False,
+        ))
+        prefix = '-' if form.descending else ''
+        return candidatos.order_by(f'{prefix}{form.sort_field}', f'{prefix}pk')[:form.page_size + 1]
+
+    def test_latest_typing_test(self):
+        self.assertUsesIndexes(TypingTest.objects.filter(user=self.user).order_by('-created_at')[:1])
+        self.assertUsesIndexes(TypingTest.objects.filter(user=self.user).order_by('-created_at', '-id')[:1])
+
+    def test_latest_behavioral_profile(self):
+        self.assertUsesIndexes(BehavioralProfile.objects.filter(user=self.user).order_by('-created_at')[:1])
+
+    def test_typing_phases(self):
+        test = TypingTest.objects.create(user=self.user, wpm_average=40, accuracy_average=95)
+        self.assertUsesIndexes(TypingTestPhase.objects.filter(typing_test=test).order_by('phase_number'))
+        self.assertUsesIndexes(TypingTestPhase.objects.filter(typing_test_id__in=[test.pk, test.pk + 1]).order_by())
+
+    def test_completed_candidates_by_completion_date(self):
+        users = User.objects.filter(test_progress__typing_test_completed=True)
+        self.assertUsesIndexes(users.order_by('test_progress__typing_test_completed_at'))
+        self.assertUsesIndexes(users.order_by('-test_progress__typing_test_completed_at')[:25])
+
+    def test_summary_refresh(self):
+        self.assertUsesIndexes(summary_rows(User.objects.filter(pk=self.user.pk)))
+
+    def test_candidate_listing(self):
+        self.assertUsesIndexes(self.listing())
+        self.assertUsesIndexes(self.listing(direcao='asc'))
+        self.assertUsesIndexes(self.listing(ordenar='wpm'))
+        self.assertUsesIndexes(self.listing(ordenar='precisao', direcao='asc'))
+
+    def test_candidate_listing_filters(self):
+        self.assertUsesIndexes(self.listing(vaga='Suporte'))
+        self.assertUsesIndexes(self.listing(perfil='A'))
+        self.assertUsesIndexes(self.listing(vaga='Suporte', ordenar='wpm'))
+        self.assertUsesIndexes(self.listing(perfil='A', ordenar='precisao', direcao='asc'))
+
+    def assertCursorPagesUseIndexes(self, **params):
+        """Páginas seguintes e anteriores (``apos``/``antes``), como na view relatorios"""
+        form = CandidatoFiltroForm(params)
+        self.assertTrue(form.is_valid(), form.errors)
+        candidatos = form.filter(CandidateSummary.objects.filter(
+            typing_test_completed=True,
+            typing_test_created_at__isnull=False,
+        ))
+        value = timezone.now() if form.sort_field == 'typing_test_completed_at' else 50.0
+        for direction in ('after', 'before'):
+            with CaptureQueriesContext(connection) as queries:
+                paginate_keyset(
+                    candidatos, form.sort_field, descending=form.descending, page_size=form.page_size,
+                    **{direction: encode_cursor(value, 10)},
+                )
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN QUERY PLAN {queries[-1]['sql']}")
+                plan = [row[-1] for row in cursor.fetchall()]
+            with self.subTest(direction=direction, **params):
+                self.assertFalse([step for step in plan if 'TEMP B-TREE' in step or 'MULTI-INDEX OR' in step], plan)
+                self.assertTrue(all(' USING ' in step for step in plan if step.startswith('SCAN ')), plan)
+
+    def test_candidate_listing_cursor_pages(self):
+        for ordenar in ('recentes', 'wpm', 'precisao'):
+            for direcao in ('desc', 'asc'):
+                self.assertCursorPagesUseIndexes(ordenar=ordenar, direcao=direcao)
+                self.assertCursorPagesUseIndexes(ordenar=ordenar, direcao=direcao, vaga='Suporte')
+                self.assertCursorPagesUseIndexes(ordenar=ordenar, direcao=direcao, perfil='A')
+
+
+class KeysetPaginationTests(TestCase):
+    """Percorrer todas as páginas, nos dois sentidos, devolve cada linha uma vez"""
+
+    @classmethod
+    def setUpTestData(cls):
+        base = timezone.now().replace(microsecond=0)
+        for i in range(11):
+            User.objects.create_user(email=f'c{i}@example.com', username=f'cur{i}', password='senha')
+        # Vários valores no mesmo milissegundo, e dois empates exatos
+        offsets = [0, 100, 200, 300, 300, 900, 1000, 1001, 1500, 2000, 2000]
+        for summary, offset in zip(CandidateSummary.objects.order_by('pk'), offsets):
+            summary.typing_test_completed_at = base + timedelta(microseconds=offset)
+            summary.save(update_fields=['typing_test_completed_at'])
+
+    def walk(self, descending, page_size=3):
+        queryset = CandidateSummary.objects.all()
+        field = 'typing_test_completed_at'
+        pages = [paginate_keyset(queryset, field, descending=descending, page_size=page_size)]
+        # Limite de páginas: um cursor que repete linhas poderia não sair do lugar
+        while pages[-1].has_next and len(pages) <= CandidateSummary.objects.count():
+            pages.append(paginate_keyset(
+                queryset, field, descending=descending, after=pages[-1].next_cursor, page_size=page_size,
+            ))
+        forward = [summary.pk for page in pages for summary in page]
+        # De volta a partir da última página, pelos cursores "antes"
+        backward = [summary.pk for summary in pages[-1]]
+        page = pages[-1]
+        while page.has_previous and len(backward) <= 2 * len(forward):
+            page = paginate_keyset(
+                queryset, field, descending=descending, before=page.previous_cursor, page_size=page_size,
+            )
+            backward[:0] = [summary.pk for summary in page]
+        return forward, backward
+
+    def test_pages_have_no_duplicates_or_gaps(self):
+        for descending in (True, False):
+            prefix = '-' if descending else ''
+            expected = list(CandidateSummary.objects.order_by(
+                f'{prefix}typing_test_completed_at', f'{prefix}pk',
+            ).values_list('pk', flat=True))
+            forward, backward = self.walk(descending)
+            with self.subTest(descending=descending):
+                self.assertEqual(forward, expected)
+                self.assertEqual(backward, expected)
+
+
+class AdminChangelistQueryTests(TestCase):
+    """O número de consultas de cada página do changelist não depende do número de linhas"""
+
+    # Usuário, linhas da página e a estimativa do total (duas consultas); a
+    # sessão gravada pelo login vem do LRU de core.sessions
+    CHANGELIST_QUERIES = 4
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            email='admin@example.com', username='admin', password='senha', is_staff=True, is_superuser=True,
+        )
+        cls.candidates = [
+            User.objects.create_user(email=f'candidato{i}@example.com', username=f'candidato-{i}', password='senha')
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def create_rows(self, count):
+        for i in range(count):
+            user = self.candidates[i % len(self.candidates)]
+            test = TypingTest.objects.create(user=user, wpm_average=40, accuracy_average=95)
+            for number in (1, 2, 3):
+                TypingTestPhase.objects.create(
+                    typing_test=test, phase_number=number, original_phrase='a', typed_text='a',
+                    time_seconds=1, wpm=40, accuracy=95,
+                )
+            BehavioralProfile.objects.create(
+                user=user, quadrant_a_score=25, quadrant_b_score=25, quadrant_c_score=25,
+                quadrant_d_score=25, dominant_quadrant='A', answers=normalized_answers([1] * len(QUESTION_IDS)),
+            )
+
+    def assertChangelistQueries(self, model, count, params=''):
+        url = reverse(f'admin:core_{model._meta.model_name}_changelist') + params
+        with self.assertNumQueries(count):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_query_count_is_constant(self):
+        for rows in (2, 20):
+            self.create_rows(rows)
+            for model in (TypingTest, TypingTestPhase, BehavioralProfile, TestProgress):
+                with self.subTest(model=model.__name__, rows=rows):
+                    self.assertChangelistQueries(model, self.CHANGELIST_QUERIES)
+
+    def test_user_filter(self):
+        self.create_rows(6)
+        user = self.candidates[0]
+        # Contagem limitada no lugar da estimativa, mais o usuário escolhido no filtro
+        response = self.assertChangelistQueries(TypingTest, 4, f'?user__id__exact={user.pk}')
+        self.assertEqual(len(response.context['cl'].result_list), 2)
+        self.assertChangelistQueries(TypingTestPhase, 4, f'?typing_test__user__id__exact={user.pk}')
+
+    def test_user_filter_does_not_list_users(self):
+        response = self.assertChangelistQueries(TypingTest, self.CHANGELIST_QUERIES)
+        self.assertNotContains(response, self.candidates[0].username)
+
+    def test_sorted_by_column(self):
+        self.create_rows(4)
+        self.assertChangelistQueries(TypingTest, self.CHANGELIST_QUERIES, '?o=3')
+
+    def test_keyset_navigation(self):
+        self.create_rows(5)
+        model_admin = admin.site._registry[TypingTest]
+        seen = []
+        url = reverse('admin:core_typingtest_changelist')
+        with mock.patch.object(model_admin, 'list_per_page', 2):
+            while url:
+                response = self.client.get(url)
+                seen.extend(obj.pk for obj in response.context['cl'].result_list)
+                match = re.search(r'href="(\?[^"]*apos=[^"]*)"', response.content.decode())
+                url = reverse('admin:core_typingtest_changelist') + match.group(1).replace('&amp;', '&') if match else None
+        self.assertEqual(seen, list(TypingTest.objects.order_by('-pk').values_list('pk', flat=True)))
+
+
+class CandidateSearchTests(TestCase):
+    """Busca FTS5: acentos, prefixos, relevância e sincronia pelos gatilhos"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.joao = User.objects.create_user(
+            email='jconceicao@example.com', username='joao', password='senha',
+            first_name='João', last_name='Conceição', vaga='Analista de Dados',
+        )
+        cls.maria = User.objects.create_user(
+            email='maria.joao@example.com', username='maria', password='senha',
+            first_name='Maria', last_name='Araújo', vaga='Suporte Técnico',
+        )
+
+    def ids(self, text, **kwargs):
+        return [user.pk for user in search_candidates(text, **kwargs)]
+
+    def test_accents_and_prefix(self):
+        self.assertEqual(self.ids('conceicao'), [self.joao.pk])
+        self.assertEqual(self.ids('JOAO conc'), [self.joao.pk])
+        self.assertEqual(self.ids('maria araú'), [self.maria.pk])
+        self.assertEqual(self.ids('tecn'), [self.maria.pk])
+
+    def test_name_ranks_above_email(self):
+        # "joao" está no nome de um e no e-mail da outra, mais recente
+        self.assertEqual(self.ids('joao'), [self.joao.pk, self.maria.pk])
+
+    def test_operators_and_short_terms_are_ignored(self):
+        self.assertEqual(self.ids('a'), [])
+        self.assertEqual(self.ids('"conceicao" OR NEAR(*'), [])
+        self.assertEqual(self.ids('conceição -'), [self.joao.pk])
+
+    def test_pagination(self):
+        self.assertEqual(self.ids('example', page_size=1), [self.maria.pk])
+        page = search_candidates('example', page=2, page_size=1)
+        self.assertEqual([user.pk for user in page], [self.joao.pk])
+        self.assertFalse(page.has_next)
+
+    def test_triggers_follow_users_and_summary(self):
+        self.joao.first_name = 'Sebastião'
+        self.joao.save()
+        self.assertEqual(self.ids('sebastiao'), [self.joao.pk])
+        self.assertEqual(self.ids('joao conceicao'), [])
+
+        profile = BehavioralProfile.objects.create(
+            user=self.maria, quadrant_a_score=10, quadrant_b_score=10, quadrant_c_score=10,
+            quadrant_d_score=70, dominant_quadrant='D', answers=normalized_answers([3] * len(QUESTION_IDS)),
+        )
+        # Upsert em lote do resumo, como na gravação do teste
+        record_behavioral_profile(profile, timezone.now())
+        self.assertEqual(self.ids('inovador'), [self.maria.pk])
+
+        self.maria.delete()
+        self.assertEqual(self.ids('inovador'), [])
+
+    def test_view(self):
+        self.client.force_login(self.joao)
+        self.assertEqual(self.client.get(reverse('busca_candidatos'), {'q': 'araujo'}).status_code, 403)
+        recruiter = User.objects.create_user(email='rh@example.com', username='rh', password='senha')
+        assign_role(recruiter, 'Full')
+        self.client.force_login(recruiter)
+        response = self.client.get(reverse('busca_candidatos'), {'q': 'araujo'})
+        self.assertContains(response, 'maria.joao@example.com')
+        response = self.client.get(reverse('busca_candidatos'), {'q': 'araujo', 'formato': 'json'})
+        self.assertEqual([row['user_id'] for row in response.json()['resultados']], [self.maria.pk])
+
+    def test_admin_search_uses_index(self):
+        admin_user = User.objects.create_user(
+            email='admin@example.com', username='admin', password='senha', is_staff=True, is_superuser=True,
+        )
+        self.client.force_login(admin_user)
+        response = self.client.get(reverse('admin:users_users_changelist'), {'q': 'conceicao'})
+        self.assertEqual([user.pk for user in response.context['cl'].result_list], [self.joao.pk])
+        # O username não está no índice, mas continua pesquisável
+        User.objects.filter(pk=self.maria.pk).update(username='mdaraujo42')
+        response = self.client.get(reverse('admin:users_users_changelist'), {'q': 'mdaraujo42'})
+        self.assertEqual([user.pk for user in response.context['cl'].result_list], [self.maria.pk])
+
+
+class ExportTests(TestCase):
+    """Exportação CSV/XLSX: conteúdo, fórmulas neutralizadas e consultas por lote"""
+
+    @classmethod
+    def setUpTestData(cls):
+        names = ['=HYPERLINK("x")', 'Ana', '+Bia']
+        cls.users = [
+            User.objects.create_user(
+                email=f'c{i}@example.com', username=f'candidato{i}', password='senha', first_name=name, vaga='-Suporte',
+            )
+            for i, name in enumerate(names)
+        ]
+        for i, user in enumerate(cls.users):
+            payload = [
+                {'phase': number, 'phraseId': phrase_id, 'phraseVersion': 1, 'typedText': PHRASE_BANKS[1][phrase_id],
+                 'timeSeconds': str(10 + i)}
+                for number, phrase_id in enumerate(assigned_phrases(user.pk), start=1)
+            ]
+            save_typing_submission(user, payload)
+        cls.recruiter = User.objects.create_user(email='rh@example.com', username='rh', password='senha')
+        assign_role(cls.recruiter, 'Full')
+
+    def queryset(self):
+        return CandidateSummary.objects.filter(typing_test_completed=True).order_by('pk')
+
+    def test_csv(self):
+        self.client.force_login(self.recruiter)
+        response = self.client.get(reverse('exportar_candidatos'), {'formato': 'csv', 'ordenar': 'recentes', 'direcao': 'asc'})
+        self.assertEqual(response.status_code, 200)
+        text = b''.join(response.streaming_content).decode('utf-8-sig')
+        header, *rows = list(csv.reader(StringIO(text)))
+        self.assertEqual(header, HEADER)
+        self.assertEqual([row[0] for row in rows], ["'=HYPERLINK(\"x\")", 'Ana', "'+Bia"])
+        self.assertEqual({row[3] for row in rows}, {"'-Suporte"})
+        self.assertEqual(rows[1][2], 'c1@example.com')
+        test = TypingTest.objects.get(user=self.users[1])
+        phase = test.phases.get(phase_number=2)
+        column = HEADER.index('Fase 2 - Tempo (s)')
+        self.assertEqual(float(rows[1][column]), phase.time_seconds)
+        self.assertEqual(float(rows[1][HEADER.index('WPM médio')]), round(test.wpm_average, 2))
+
+    def test_xlsx(self):
+        self.client.force_login(self.recruiter)
+        response = self.client.get(reverse('exportar_candidatos'), {'formato': 'xlsx'})
+        self.assertEqual(response.status_code, 200)
+        with zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))) as archive:
+            self.assertIsNone(archive.testzip())
+            sheet = archive.read('xl/worksheets/sheet1.xml').decode()
+        self.assertEqual(sheet.count('<row>'), 1 + len(self.users))
+        self.assertIn('<t xml:space="preserve">Fase 1 - WPM</t>', sheet)
+        # Textos são inlineStr, nunca fórmulas: o nome vai sem prefixo
+        self.assertIn('<t xml:space="preserve">=HYPERLINK("x")</t>', sheet)
+        self.assertNotIn('<f>', sheet)
+
+    def test_one_phase_query_per_chunk(self):
+        # Resumos (uma consulta lida em lotes) + fases de cada lote de 2 candidatos
+        with self.assertNumQueries(3):
+            rows = list(export_rows(self.queryset(), chunk_size=2))
+        self.assertEqual(len(rows), 1 + len(self.users))
+
+    def test_requires_full_role(self):
+        self.client.force_login(self.users[0])
+        self.assertEqual(self.client.get(reverse('exportar_candidatos')).status_code, 403)
+
+
+class MinifyTests(SimpleTestCase):
+    def test_js_keeps_strings_regex_and_line_breaks(self):
+        source = (
+            "// comentário\n"
+            "const url = 'http://exemplo.com/*nao*/';  /* bloco */\n"
+            "let total = a  /  b, padrao = /\\/\\/[a-z]+/g;\n"
+            "const texto = `${ x }  //  ${'y'}`\n"
+            "let c = a - -b\n"
+            "return c\n"
+        )
+        self.assertEqual(minify_js(source), (
+            "const url='http://exemplo.com/*nao*/';\n"
+            "let total=a/b,padrao=/\\/\\/[a-z]+/g;\n"
+            "const texto=`${ x }  //  ${'y'}`\n"
+            "let c=a- -b\n"
+            "return c\n"
+        ))
+
+    def test_css_keeps_strings_and_selectors(self):
+        source = "/* cabeçalho */\na :hover ,\n.b {\n  font-family: 'Segoe UI', sans-serif;\n  width: calc(100% - 2px);\n}\n"
+        self.assertEqual(minify_css(source), "a :hover,.b{font-family:'Segoe UI',sans-serif;width:calc(100% - 2px)}\n")
+
+    def test_hardcoded_static_paths_are_reported(self):
+        self.assertTrue(_hardcoded_static('<script src="/static/js/digitacao.js"></script>'))
+        self.assertTrue(_hardcoded_static('<link href="{{ STATIC_URL }}css/digitacao.css">'))
+        self.assertFalse(_hardcoded_static('<script src="{% static \'js/digitacao.js\' %}"></script>'))
+
+
+class StaticBuildTests(SimpleTestCase):
+    """collectstatic gera arquivos minificados, com hash e pré-comprimidos, servidos como imutáveis"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, cls.static_root)
+        cls.enterClassContext(override_settings(STATIC_ROOT=cls.static_root))
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    def test_templates_reference_hashed_assets(self):
+        url = static('js/digitacao.js')
+        self.assertRegex(url, r'^/static/js/digitacao\.[0-9a-f]{12}\.js$')
+        self.assertEqual(check_static_references(), [])
+        self.assertEqual(check_static_build(), [])
+        # Os originais sem hash não são publicados
+        self.assertFalse(os.path.exists(os.path.join(self.static_root, 'js', 'digitacao.js')))
+
+    def test_served_compressed_and_immutable(self):
+        url = static('js/digitacao.js')
+        for encoding in ('br', 'gzip'):
+            with self.subTest(encoding=encoding):
+                response = self.client.get(url, headers={'accept-encoding': encoding})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response['Content-Encoding'], encoding)
+                self.assertIn('immutable', response['Cache-Control'])
+                response.close()
+
+        response = self.client.get(url)
+        body = b''.join(response.streaming_content).decode()
+        response.close()
+        self.assertNotIn('// Dados do teste', body)
+        self.assertIn('function init(){', body)
+
+
+class BankTests(TestCase):
+    """Bancos de frases e questões: entrega com ETag e uso na gravação das fases"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='c@example.com', username='candidato', password='senha')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_document_with_strong_etag(self):
+        response = self.client.get(reverse('bancos'))
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertRegex(etag, r'^"[0-9a-f]{32}"$')
+        self.assertIn('no-cache', response['Cache-Control'])
+        document = response.json()
+        self.assertEqual(len(document['frases']['itens']), len(PHRASE_BANKS[PHRASE_BANK_VERSION]))
+        self.assertEqual([item['id'] for item in document['questoes']['itens']], list(QUESTION_IDS))
+
+        response = self.client.get(reverse('bancos'), headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_difficulty_is_relative_to_the_version(self):
+        factors = [FEATURES[PHRASE_BANK_VERSION, phrase_id].difficulty for phrase_id in PHRASE_BANKS[PHRASE_BANK_VERSION]]
+        self.assertAlmostEqual(sum(factors) / len(factors), 1.0, places=3)
+        # Acentos e pontuação com Shift custam teclas extras
+        self.assertGreater(FEATURES[1, 10].difficulty, FEATURES[1, 5].difficulty)
+
+    def test_page_embeds_assigned_phrases(self):
+        response = self.client.get(reverse('digitacao'))
+        ids = assigned_phrases(self.user.pk)
+        self.assertContains(response, f'"ids": {ids}'.replace("'", '"'))
+        self.assertEqual(assigned_phrases(self.user.pk), ids)
+        self.assertEqual(len(set(ids)), PHRASES_PER_TEST)
+
+    def payload(self, **changes):
+        payload = [
+            {'phase': number, 'phraseId': phrase_id, 'phraseVersion': 1, 'originalPhrase': 'qualquer',
+             'typedText': PHRASE_BANKS[1][phrase_id], 'timeSeconds': '12'}
+            for number, phrase_id in enumerate(assigned_phrases(self.user.pk), start=1)
+        ]
+        payload[0].update(changes)
+        return payload
+
+    def test_phase_records_phrase_and_normalized_wpm(self):
+        phrase_id = assigned_phrases(self.user.pk)[1]
+        test = save_typing_submission(self.user, self.payload())
+        phase = test.phases.get(phase_number=2)
+        self.assertEqual((phase.phrase_id, phase.phrase_version), (phrase_id, 1))
+        # O texto vem do banco, não do navegador
+        self.assertEqual(phase.original_phrase, PHRASE_BANKS[1][phrase_id])
+        self.assertEqual(phase.accuracy, 100.0)
+        self.assertEqual(phase.normalized_wpm, round(phase.wpm * FEATURES[1, phrase_id].difficulty, 1))
+
+    def test_unknown_phrase_is_rejected(self):
+        with self.assertRaises(UnknownPhrase):
+            save_typing_submission(self.user, self.payload(phraseId=99))
+
+    def test_only_assigned_phrases_are_accepted(self):
+        ids = assigned_phrases(self.user.pk)
+        other = next(phrase_id for phrase_id in sorted(PHRASE_BANKS[1]) if phrase_id not in ids)
+        for changes in ({'phraseId': other}, {'phraseId': ids[1]}):
+            with self.subTest(**changes), self.assertRaises(UnknownPhrase):
+                save_typing_submission(self.user, self.payload(**changes))
+        self.assertFalse(TypingTest.objects.exists())
+
+    def test_text_only_payload_is_linked_to_the_bank(self):
+        ids = assigned_phrases(self.user.pk)
+        payload = self.payload(phraseId=None, originalPhrase=PHRASE_BANKS[1][ids[0]])
+        test = save_typing_submission(self.user, payload)
+        phase = test.phases.get(phase_number=1)
+        self.assertEqual((phase.phrase_id, phase.phrase_version), (ids[0], 1))
+
+        # Uma frase do banco que não é a atribuída não ganha o WPM normalizado
+        other = next(phrase_id for phrase_id in sorted(PHRASE_BANKS[1]) if phrase_id not in ids)
+        payload = self.payload(phraseId=None, originalPhrase=PHRASE_BANKS[1][other])
+        phase = save_typing_submission(self.user, payload).phases.get(phase_number=1)
+        self.assertIsNone(phase.normalized_wpm)
+
+        payload = self.payload(phraseId=None, originalPhrase='Texto fora do banco.')
+        phase = save_typing_submission(self.user, payload).phases.get(phase_number=1)
+        self.assertIsNone(phase.phrase_id)
+        self.assertIsNone(phase.normalized_wpm)
+
+
+class ColdArchiveTests(TestCase):
+    """Arquivo frio: frames comprimidos e leitura transparente das colunas arquivadas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='c@example.com', username='candidato', password='senha')
+        payload = [
+            {'phase': number, 'phraseId': phrase_id, 'phraseVersion': 1, 'typedText': PHRASE_BANKS[1][phrase_id][:-1],
+             'timeSeconds': '12'}
+            for number, phrase_id in enumerate(assigned_phrases(cls.user.pk), start=1)
+        ]
+        cls.test = save_typing_submission(cls.user, payload)
+        # Fases de um processo seletivo encerrado há mais de um ano
+        cls.test.phases.update(created_at=timezone.now() - timedelta(days=400))
+
+    def test_frames_round_trip(self):
+        values = {'original_phrase': PHRASE_BANKS[1][3], 'typed_text': 'Velocidade e precisão'}
+        for codec in ('zlib', 'lzma'):
+            with self.subTest(codec=codec):
+                self.assertEqual(decompress_frame(compress_frame(values, codec)), values)
+        # O dicionário de frases reduz a frase do banco a poucos bytes
+        self.assertLess(len(compress_frame({'original_phrase': PHRASE_BANKS[1][3]})), 16)
+        with self.assertRaises(CorruptFrame):
+            decompress_frame(b'\x01\x07garbage')
+
+    def test_archives_only_old_rows_and_reads_transparently(self):
+        out = StringIO()
+        call_command('archive_cold_data', older_than_days=365, stdout=out)
+        self.assertIn('3 fases', out.getvalue())
+        self.assertEqual(TypingTestPhase.objects.filter(original_phrase__isnull=True, typed_text__isnull=True).count(), 3)
+        # Linhas já arquivadas não são processadas de novo
+        out = StringIO()
+        call_command('archive_cold_data', older_than_days=0, codec='lzma', stdout=out)
+        self.assertIn('0 fases', out.getvalue())
+        self.assertEqual(TypingTestPhaseArchive.objects.count(), 3)
+
+        phrase = PHRASE_BANKS[1][assigned_phrases(self.user.pk)[2]]
+        phase = TypingTestPhase.objects.get(typing_test=self.test, phase_number=3)
+        self.assertEqual(phase.original_phrase, phrase)
+        self.assertEqual(phase.typed_text, phrase[:-1])
+        # Salvar a fase não devolve o texto às colunas
+        phase.save()
+        phase = TypingTestPhase.objects.select_related('archive').get(pk=phase.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(phase.original_phrase, phrase)
+        self.assertIsNone(TypingTestPhase.objects.values_list('original_phrase', flat=True).get(pk=phase.pk))
+
+        call_command('recompute_typing_metrics', skip_summary=True, stdout=StringIO())
+        self.assertEqual(TypingTestPhase.objects.get(pk=phase.pk).accuracy, phase.accuracy)
+
+    def test_detail_page_with_archived_phases(self):
+        call_command('archive_cold_data', older_than_days=0, stdout=StringIO())
+        admin_user = User.objects.create_user(
+            email='a@example.com', username='admin', password='senha', is_staff=True, is_superuser=True,
+        )
+        self.client.force_login(admin_user)
+        response = self.client.get(reverse('detalhes_candidato', args=[self.user.pk]))
+        self.assertEqual(response.status_code, 200)
+        phases = response.context['typing_phases']
+        self.assertEqual([phase.typed_text for phase in phases], [PHRASE_BANKS[1][i][:-1] for i in assigned_phrases(self.user.pk)])
+
+
+class PackedAnswersTests(TestCase):
+    """Respostas do perfil comportamental em 3 bits por questão"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='c@example.com', username='candidato', password='senha')
+
+    def test_round_trip(self):
+        vector = [(i % 5) + 1 for i in range(len(QUESTION_IDS))]
+        packed = pack_answers(vector)
+        self.assertEqual(len(packed), PACKED_SIZE)
+        self.assertEqual(PACKED_SIZE, 11)
+        self.assertEqual(unpack_answers(packed), vector)
+        with self.assertRaises(InvalidAnswers):
+            unpack_answers(b'\x09' + packed[1:])
+        with self.assertRaises(InvalidAnswers):
+            pack_answers(vector[:-1])
+
+    def test_each_version_decodes_with_its_own_layout(self):
+        vector = [(i % 5) + 1 for i in range(len(QUESTION_IDS))]
+        current = pack_answers(vector)
+        layouts = {**LAYOUTS, 2: Layout(questions=4, bits=3)}
+        with mock.patch('core.answers.LAYOUTS', layouts):
+            older = pack_answers([1, 2, 3, 4], version=2)
+            self.assertEqual(len(older), 3)
+            self.assertEqual(unpack_answers(older), [1, 2, 3, 4])
+            self.assertEqual(unpack_answers(current), vector)
+            with self.assertRaises(InvalidAnswers):
+                unpack_answers(older + b'\x00')
+        # Sem a entrada no layout, a versão é desconhecida
+        with self.assertRaises(InvalidAnswers):
+            unpack_answers(older)
+
+    def test_profile_exposes_answer_list(self):
+        answers = normalized_answers([4] * len(QUESTION_IDS))
+        profile = save_behavioral_submission(self.user, answers)
+        profile = BehavioralProfile.objects.get(pk=profile.pk)
+        self.assertEqual(bytes(profile.packed_answers), pack_answers([4] * len(QUESTION_IDS)))
+        self.assertEqual(profile.answers, answers)
+
+        BehavioralProfile.objects.filter(pk=profile.pk).update(quadrant_a_score=0)
+        out = StringIO()
+        call_command('rescore_profiles', skip_summary=True, stdout=out)
+        self.assertIn('0 com respostas inválidas', out.getvalue())
+        self.assertEqual(BehavioralProfile.objects.get(pk=profile.pk).quadrant_a_score, 80)
+
+    def test_rescore_skips_other_bank_versions(self):
+        answers = normalized_answers([4] * len(QUESTION_IDS))
+        profile = save_behavioral_submission(self.user, answers)
+        # Outra versão com o mesmo número de questões, mas outros quadrantes
+        layouts = {**LAYOUTS, 2: LAYOUTS[QUESTION_BANK_VERSION]}
+        with mock.patch('core.answers.LAYOUTS', layouts):
+            packed = pack_answers([4] * len(QUESTION_IDS), version=2)
+        BehavioralProfile.objects.filter(pk=profile.pk).update(packed_answers=packed, quadrant_a_score=0)
+        out = StringIO()
+        call_command('rescore_profiles', skip_summary=True, stdout=out)
+        self.assertIn('1 de outra versão', out.getvalue())
+        self.assertEqual(BehavioralProfile.objects.get(pk=profile.pk).quadrant_a_score, 0)
+
+    def test_unanswered_questions_are_left_out(self):
+        vector = [0] + [2] * (len(QUESTION_IDS) - 1)
+        profile = BehavioralProfile(packed_answers=pack_answers(vector))
+        self.assertEqual([item['questionId'] for item in profile.answers], list(QUESTION_IDS[1:]))
+
+
+class PageCacheTests(TestCase):
+    """core.page_cache: acertos sem consultas e invalidação após o commit"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.candidate = User.objects.create_user(email='c@example.com', username='candidato', password='senha')
+        cls.recruiter = User.objects.create_user(email='rh@example.com', username='rh', password='senha')
+        assign_role(cls.recruiter, 'Full')
+
+    def setUp(self):
+        caches['paginas'].clear()
+
+    def build(self):
+        return _detalhes_candidato_context(self.candidate.pk)
+
+    def test_hit_makes_no_queries(self):
+        context = cached_context('detalhes_candidato', self.candidate.pk, self.build)
+        with self.assertNumQueries(0):
+            self.assertEqual(cached_context('detalhes_candidato', self.candidate.pk, self.build), context)
+
+    def test_save_renders_the_next_page_fresh(self):
+        self.client.force_login(self.recruiter)
+        url = reverse('detalhes_candidato', args=[self.candidate.pk])
+        self.assertIsNone(self.client.get(url).context['typing_test'])
+        payload = [
+            {'phase': number, 'phraseId': phrase_id, 'phraseVersion': 1, 'typedText': PHRASE_BANKS[1][phrase_id],
+             'timeSeconds': '10'}
+            for number, phrase_id in enumerate(assigned_phrases(self.candidate.pk), start=1)
+        ]
+        version = page_version(self.candidate.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            typing_test = save_typing_submission(self.candidate, payload)
+        self.assertNotEqual(page_version(self.candidate.pk), version)
+        self.assertEqual(self.client.get(url).context['typing_test'], typing_test)
+
+    def test_invalidation_waits_for_the_commit(self):
+        version = page_version(self.candidate.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                bump_user_version(self.candidate.pk)
+                self.assertEqual(page_version(self.candidate.pk), version)
+            # Ainda dentro da transação do teste, que não foi confirmada
+            self.assertEqual(page_version(self.candidate.pk), version)
+        self.assertNotEqual(page_version(self.candidate.pk), version)
+
+        # Uma transação desfeita não invalida nada
+        version = page_version(self.candidate.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(ZeroDivisionError), transaction.atomic():
+                bump_user_version(self.candidate.pk)
+                1 / 0
+        self.assertEqual(page_version(self.candidate.pk), version)
+
+
+class SQLiteLockTests(TestCase):
+    """core.sqlite: novas tentativas em "database is locked" e contadores do bloqueio"""
+
+    def setUp(self):
+        lock_stats.reset()
+        self.addCleanup(lock_stats.reset)
+        self.context = {'connection': mock.Mock(in_atomic_block=False)}
+
+    def locked_then(self, failures):
+        # Sem as esperas entre as tentativas
+        self.enterContext(mock.patch('core.sqlite.time.sleep'))
+        return mock.Mock(side_effect=[OperationalError('database is locked')] * failures + ['ok'])
+
+    def test_monitor_is_installed(self):
+        connection.ensure_connection()
+        self.assertIn(lock_monitor, connection.execute_wrappers)
+
+    def test_locked_write_is_retried(self):
+        execute = self.locked_then(2)
+        with self.assertLogs('core.sqlite', 'WARNING'):
+            result = lock_monitor(execute, 'UPDATE core_testprogress SET id = id', (), False, self.context)
+        self.assertEqual(result, 'ok')
+        self.assertEqual(execute.call_count, 3)
+        stats = lock_stats.snapshot()
+        self.assertEqual((stats['acquisitions'], stats['retries'], stats['failures']), (1, 2, 0))
+
+    @override_settings(SQLITE_LOCK_RETRIES=2)
+    def test_gives_up_after_the_retries(self):
+        execute = self.locked_then(5)
+        with self.assertRaises(OperationalError):
+            lock_monitor(execute, 'BEGIN IMMEDIATE', (), False, self.context)
+        self.assertEqual(execute.call_count, 3)
+        stats = lock_stats.snapshot()
+        self.assertEqual((stats['acquisitions'], stats['retries'], stats['failures']), (1, 2, 1))
+
+    def test_reads_and_statements_inside_transactions_are_not_retried(self):
+        for sql, in_atomic_block in (('SELECT 1', False), ('UPDATE core_testprogress SET id = id', True)):
+            execute = self.locked_then(1)
+            context = {'connection': mock.Mock(in_atomic_block=in_atomic_block)}
+            with self.subTest(sql=sql), self.assertRaises(OperationalError):
+                lock_monitor(execute, sql, (), False, context)
+        self.assertEqual(lock_stats.snapshot()['acquisitions'], 0)
+
+    def test_writes_are_serialized_between_threads(self):
+        events = []
+        inside, release = threading.Event(), threading.Event()
+
+        def writer(name):
+            with serialized_write():
+                events.append(f'{name}:entra')
+                if name == 'a':
+                    inside.set()
+                    release.wait(5)
+                events.append(f'{name}:sai')
+
+        threads = [threading.Thread(target=writer, args=(name,)) for name in 'ab']
+        threads[0].start()
+        inside.wait(5)
+        threads[1].start()
+        threads[1].join(0.1)
+        # O segundo escritor espera o primeiro sair
+        self.assertEqual(events, ['a:entra'])
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(events, ['a:entra', 'a:sai', 'b:entra', 'b:sai'])
+
+
+class ProfilingTests(TestCase):
+    """ProfilingMiddleware: Server-Timing completo nas requisições perfiladas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.candidate = User.objects.create_user(email='c@example.com', username='candidato', password='senha')
+        cls.recruiter = User.objects.create_user(email='rh@example.com', username='rh', password='senha')
+
+    def setUp(self):
+        caches['paginas'].clear()
+        self.client.force_login(self.recruiter)
+        self.url = reverse('detalhes_candidato', args=[self.candidate.pk])
+
+    def timing(self, response):
+        # A descrição do "dup" também tem vírgula
+        entries = re.split(r', (?=\w+;)', response['Server-Timing'])
+        return {entry.split(';')[0]: entry for entry in entries}
+
+    @override_settings(PROFILING_SAMPLE_RATE=1.0, PROFILING_SLOW_MS=60_000)
+    def test_profiled_request_reports_queries_and_phases(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        timing = self.timing(response)
+        self.assertEqual(set(timing) - {'dup'}, {'sql', 'tpl', 'view', 'total'})
+        self.assertIn(f'desc="{len(queries)} consultas"', timing['sql'])
+        self.assertIn('detalhes_candidato', view_histograms.snapshot())
+
+    @override_settings(PROFILING_SAMPLE_RATE=0.0, PROFILING_SLOW_MS=60_000)
+    def test_unprofiled_request_only_reports_the_total(self):
+        response = self.client.get(self.url)
+        self.assertEqual(list(self.timing(response)), ['total'])
+        self.assertNotIn('consultas', response['Server-Timing'])
+
+    @override_settings(PROFILING_SAMPLE_RATE=1.0, PROFILING_SLOW_MS=0)
+    def test_slow_request_is_logged_with_its_queries(self):
+        with self.assertLogs('core.profiling', 'WARNING') as logs:
+            self.client.get(self.url)
+        self.assertIn('Requisição lenta: GET', logs.output[0])
+        self.assertIn('core_typingtest', logs.output[0])
+
+
+class SessionStoreTests(TestCase):
+    """core.sessions: leituras pelo LRU, gravações só quando algo muda e limpeza em lotes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='c@example.com', username='candidato', password='senha')
+
+    def setUp(self):
+        session_cache.clear()
+
+    def session_queries(self, queries):
+        return [query['sql'] for query in queries if 'django_session' in query['sql']]
+
+    def test_requests_after_login_skip_the_session_table(self):
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(3):
+                self.assertEqual(self.client.get(reverse('bancos')).status_code, 200)
+        self.assertEqual(self.session_queries(queries), [])
+
+        # Logout apaga a sessão do banco e do LRU
+        key = self.client.session.session_key
+        self.client.logout()
+        self.assertFalse(SessionStore(key).load())
+
+    @override_settings(SESSION_SAVE_EVERY_REQUEST=True)
+    def test_unchanged_session_is_not_rewritten(self):
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('bancos'))
+        self.assertEqual(self.session_queries(queries), [])
+
+        with override_settings(SESSION_EXPIRY_REFRESH_SECONDS=0), CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('bancos'))
+        [update] = self.session_queries(queries)
+        self.assertTrue(update.startswith('UPDATE'))
+        self.assertNotIn('session_data', update)
+
+    def test_changed_data_is_saved(self):
+        store = SessionStore()
+        store['etapa'] = 1
+        store.save()
+
+        store = SessionStore(store.session_key)
+        store['etapa'] = 1
+        with self.assertNumQueries(0):
+            store.save()
+        store['etapa'] = 2
+        store.save()
+
+        session_cache.clear()
+        self.assertEqual(SessionStore(store.session_key)['etapa'], 2)
+
+    def test_expired_sessions_are_purged_in_batches(self):
+        now = timezone.now()
+        Session.objects.bulk_create(
+            [Session(session_key=f'vencida{i:04d}', session_data='', expire_date=now - timedelta(days=1)) for i in range(5)]
+            + [Session(session_key=f'valida{i:04d}', session_data='', expire_date=now + timedelta(days=1)) for i in range(2)]
+        )
+        out = StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('purge_sessions', batch_size=2, pause=0, stdout=out)
+        self.assertIn('5 sessões vencidas apagadas', out.getvalue())
+        self.assertEqual(len([sql for sql in self.session_queries(queries) if sql.startswith('DELETE')]), 3)
+        self.assertEqual(Session.objects.count(), 2)
+
+
+class TestProgressTests(TransactionTestCase):
+    """Progresso lido da sessão: páginas sem escrita e sessão atualizada nas gravações.
+
+    Com commits reais: a versão das páginas só muda no ``on_commit``, antes de
+    a view guardar o progresso na sessão, como em produção.
+    """
+
+    def setUp(self):
+        caches['paginas'].clear()
+        self.user = User.objects.create_user(email='c@example.com', username='candidato', password='senha')
+        self.payload = [
+            {'phase': number, 'phraseId': phrase_id, 'phraseVersion': 1, 'typedText': PHRASE_BANKS[1][phrase_id],
+             'timeSeconds': '10'}
+            for number, phrase_id in enumerate(assigned_phrases(self.user.pk), start=1)
+        ]
+        self.client.login(username='c@example.com', password='senha')
+
+    def post(self, name, payload):
+        return self.client.post(reverse(name), payload, content_type='application/json')
+
+    def get_page(self, name):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(name))
+        self.assertEqual(response.status_code, 200)
+        return response, [query['sql'] for query in queries]
+
+    def assertNoWrites(self, statements):
+        writes = [sql for sql in statements if sql.lstrip().upper().startswith(('INSERT', 'UPDATE', 'DELETE'))]
+        self.assertEqual(writes, [])
+
+    def test_pages_do_not_write(self):
+        for name in ('index', 'digitacao', 'personalidade', 'index'):
+            with self.subTest(page=name):
+                _, statements = self.get_page(name)
+                self.assertNoWrites(statements)
+                # O progresso vem da sessão gravada no login
+                self.assertFalse([sql for sql in statements if 'core_testprogress' in sql])
+
+    def test_submission_updates_the_session(self):
+        self.assertEqual(self.post('save_typing_test', self.payload).status_code, 200)
+        response, statements = self.get_page('digitacao')
+        self.assertTemplateUsed(response, 'core/digitacao_completado.html')
+        self.assertNoWrites(statements)
+        self.assertFalse([sql for sql in statements if 'core_testprogress' in sql])
+
+        # Uma escrita fora da sessão (admin) troca a versão: a próxima página relê o banco
+        TestProgress.objects.filter(user=self.user).update(typing_test_completed=False)
+        bump_user_version(self.user.pk)
+        response, statements = self.get_page('digitacao')
+        self.assertTemplateNotUsed(response, 'core/digitacao_completado.html')
+        self.assertTrue([sql for sql in statements if 'core_testprogress' in sql])
+        self.assertNoWrites(statements)
+
+    def test_failed_drain_reopens_the_queued_test(self):
+        directory = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(
+            SUBMISSION_QUEUE_ENABLED=True, SUBMISSION_QUEUE_WORKER='external',
+            SUBMISSION_QUEUE_PATH=os.path.join(directory, 'fila.sqlite3'),
+        ))
+        self.addCleanup(lambda: journal().close())
+        self.assertEqual(self.post('save_typing_test', self.payload).status_code, 202)
+        response, _ = self.get_page('digitacao')
+        self.assertTemplateUsed(response, 'core/digitacao_completado.html')
+
+        def failing_write(user, prepared, completed_at):
+            raise IntegrityError('UNIQUE constraint failed')
+
+        with mock.patch.dict('core.submission_queue.KINDS', {'typing': (prepare_typing_submission, failing_write)}):
+            with self.assertLogs('core.submission_queue', 'ERROR'):
+                self.assertEqual(drain(), 1)
+        self.assertEqual(journal().metrics()['states']['falhou'], 1)
+        response, _ = self.get_page('digitacao')
+        self.assertTemplateNotUsed(response, 'core/digitacao_completado.html')
+
+
+class SubmissionQueueTests(TestCase):
+    """Fila de submissões: resposta imediata com recibo, drenagem em lote e idempotência"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='c@example.com', username='candidato', password='senha')
+        cls.typing_payload = cls.payload_for(cls.user)
+
+    @staticmethod
+    def payload_for(user):
+        return [
+            {'phase': number, 'phraseId': phrase_id, 'phraseVersion': 1, 'typedText': PHRASE_BANKS[1][phrase_id],
+             'timeSeconds': '10'}
+            for number, phrase_id in enumerate(assigned_phrases(user.pk), start=1)
+        ]
+
+    def setUp(self):
+        directory = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(
+            SUBMISSION_QUEUE_ENABLED=True, SUBMISSION_QUEUE_WORKER='external',
+            SUBMISSION_QUEUE_PATH=os.path.join(directory, 'fila.sqlite3'),
+        ))
+        self.addCleanup(lambda: journal().close())
+
+    def post(self, name, payload):
+        return self.client.post(reverse(name), payload, content_type='application/json')
+
+    def test_submissions_are_acknowledged_then_drained(self):
+        self.client.force_login(self.user)
+        response = self.post('save_typing_test', self.typing_payload)
+        self.assertEqual(response.status_code, 202)
+        receipt = response.json()['receipt']
+        self.assertEqual(self.client.get(response.json()['status_url']).json()['state'], 'pendente')
+        self.assertFalse(TypingTest.objects.exists())
+        # O candidato já vê o teste como concluído
+        response = self.client.get(reverse('digitacao'))
+        self.assertTemplateUsed(response, 'core/digitacao_completado.html')
+
+        response = self.post('save_behavioral_test', {'answers': normalized_answers([3] * len(QUESTION_IDS))})
+        self.assertEqual(response.status_code, 202)
+
+        self.assertEqual(drain(), 2)
+        typing_test = TypingTest.objects.get(user=self.user)
+        self.assertEqual(typing_test.phases.count(), 3)
+        self.assertTrue(BehavioralProfile.objects.filter(user=self.user).exists())
+        progress = TestProgress.objects.get(user=self.user)
+        self.assertTrue(progress.typing_test_completed and progress.behavioral_test_completed)
+        status = self.client.get(reverse('status_submissao', args=[receipt])).json()
+        self.assertEqual((status['state'], status['object_id']), ('aplicada', typing_test.pk))
+        self.assertEqual(CandidateSummary.objects.get(user=self.user).wpm_average, typing_test.wpm_average)
+
+    def test_replayed_entries_are_applied_once(self):
+        receipt = enqueue_submission('typing', self.user, self.typing_payload)
+        self.assertEqual(drain(), 1)
+        # Queda entre o commit no banco e a baixa no diário: a entrada volta à fila
+        journal()._connect().execute('UPDATE submissions SET state = ?', (PENDING,))
+        self.assertEqual(drain(), 1)
+        self.assertEqual(TypingTest.objects.count(), 1)
+        self.assertEqual(AppliedSubmission.objects.get(receipt=receipt).object_id, TypingTest.objects.get().pk)
+        self.assertEqual(journal().metrics()['states']['aplicada'], 1)
+
+    def test_entry_applied_by_an_expired_claim_is_not_failed(self):
+        receipt = enqueue_submission('typing', self.user, self.typing_payload)
+        self.assertEqual(drain(), 1)
+        # A reserva expirou e a entrada foi reservada de novo antes do commit da
+        # primeira drenagem: a consulta inicial ainda não vê o recibo
+        journal()._connect().execute('UPDATE submissions SET state = ?', (PENDING,))
+        with mock.patch('core.submission_queue._applied_receipts', side_effect=[{}, {receipt: -1}]):
+            self.assertEqual(drain(), 1)
+        self.assertEqual(TypingTest.objects.count(), 1)
+        self.assertEqual(journal().metrics()['states']['aplicada'], 1)
+        self.assertEqual(journal().status(receipt)['object_id'], -1)
+
+    def test_disabled_queue_does_not_create_the_journal(self):
+        path = settings.SUBMISSION_QUEUE_PATH
+        admin_user = User.objects.create_user(
+            email='a@example.com', username='admin', password='senha', is_staff=True, is_superuser=True,
+        )
+        self.client.force_login(admin_user)
+        with override_settings(SUBMISSION_QUEUE_ENABLED=False):
+            self.assertEqual(self.client.get(reverse('status_submissao', args=['abc'])).status_code, 404)
+            self.assertEqual(self.client.get(reverse('fila_submissoes')).json()['enabled'], False)
+            self.assertEqual(drain(), 0)
+            self.assertFalse(os.path.exists(path))
+        # Um diário que sobrou continua drenável com a fila desligada
+        enqueue_submission('typing', self.user, self.typing_payload)
+        with override_settings(SUBMISSION_QUEUE_ENABLED=False):
+            self.assertEqual(drain(), 1)
+
+    def test_failed_entry_does_not_block_the_batch(self):
+        other = User.objects.create_user(email='o@example.com', username='outro', password='senha')
+        enqueue_submission('typing', other, self.payload_for(other))
+        enqueue_submission('typing', self.user, self.typing_payload)
+        other.delete()
+        self.assertEqual(drain(), 2)
+        self.assertEqual(list(TypingTest.objects.values_list('user_id', flat=True)), [self.user.pk])
+        self.assertEqual(journal().metrics()['states'], {'pendente': 0, 'processando': 0, 'aplicada': 1, 'falhou': 1})
+
+    def test_worker_starts_on_the_first_request(self):
+        with mock.patch('core.submission_queue.notify_worker') as notify:
+            with override_settings(SUBMISSION_QUEUE_ENABLED=False):
+                self.client.get(reverse('login'))
+            notify.assert_not_called()
+            self.client.get(reverse('login'))
+            notify.assert_called_once_with()
+
+    def test_drain_command_survives_database_errors(self):
+        class Stop(Exception):
+            pass
+
+        errors = [OperationalError('database is locked'), 0]
+        with mock.patch('core.management.commands.drain_submissions.drain', side_effect=errors) as drain_mock, \
+                mock.patch('core.management.commands.drain_submissions.time.sleep', side_effect=[None, Stop]), \
+                self.assertLogs('core.management.commands.drain_submissions', 'ERROR'):
+            with self.assertRaises(Stop):
+                call_command('drain_submissions', stdout=StringIO())
+        self.assertEqual(drain_mock.call_count, 2)
+
+    def test_several_processes_require_a_shared_page_cache(self):
+        self.assertEqual([error.id for error in check_page_cache_shared()], ['core.E003'])
+        with override_settings(SUBMISSION_QUEUE_WORKER='thread'):
+            self.assertEqual(check_page_cache_shared(), [])
+        with override_settings(SUBMISSION_QUEUE_WORKER='thread', WEB_CONCURRENCY=4):
+            self.assertEqual([error.id for error in check_page_cache_shared()], ['core.W002'])
+        shared = {**settings.CACHES, 'paginas': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+        with override_settings(CACHES=shared, WEB_CONCURRENCY=4):
+            self.assertEqual(check_page_cache_shared(), [])
+
+    def test_invalid_submission_is_rejected_before_the_queue(self):
+        self.client.force_login(self.user)
+        duplicated = [dict(phase, phase=1) for phase in self.typing_payload]
+        invalid = [self.typing_payload[:2], duplicated]
+        for seconds in ('nan', 'inf', '0'):
+            invalid.append([dict(self.typing_payload[0], timeSeconds=seconds), *self.typing_payload[1:]])
+        for payload in invalid:
+            with self.subTest(payload=payload), self.assertLogs('core.views', 'ERROR'):
+                self.assertEqual(self.post('save_typing_test', payload).status_code, 400)
+        self.assertEqual(journal().metrics()['depth'], 0)
+        # Nada ficou marcado como concluído na sessão
+        response = self.client.get(reverse('digitacao'))
+        self.assertTemplateNotUsed(response, 'core/digitacao_completado.html')
+
+    def test_phases_may_arrive_in_any_order(self):
+        test = save_typing_submission(self.user, self.typing_payload[::-1])
+        phases = test.phases.order_by('phase_number')
+        self.assertEqual([phase.phrase_id for phase in phases], list(assigned_phrases(self.user.pk)))
+
+    def test_status_is_private_and_metrics_are_for_staff(self):
+        receipt = enqueue_submission('typing', self.user, self.typing_payload)
+        other = User.objects.create_user(email='o@example.com', username='outro', password='senha')
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(reverse('status_submissao', args=[receipt])).status_code, 404)
+        self.assertNotEqual(self.client.get(reverse('fila_submissoes')).status_code, 200)
+
+        admin_user = User.objects.create_user(
+            email='a@example.com', username='admin', password='senha', is_staff=True, is_superuser=True,
+        )
+        self.client.force_login(admin_user)
+        self.assertEqual(self.client.get(reverse('status_submissao', args=[receipt])).status_code, 200)
+        self.assertEqual(self.client.get(reverse('fila_submissoes')).json()['depth'], 1)
+        drain()
+        metrics = self.client.get(reverse('fila_submissoes')).json()
+        self.assertEqual((metrics['depth'], metrics['apply_lag_seconds']['window']), (0, 1))
+
+
+class SubmissionAtomicityTests(TestCase):
+    """Uma falha no meio da submissão não deixa teste, fases ou progresso pela metade"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='c@example.com', username='candidato', password='senha')
+
+    def test_typing_submission_rolls_back(self):
+        payload = [
+            {'phase': number, 'phraseId': phrase_id, 'phraseVersion': 1, 'typedText': PHRASE_BANKS[1][phrase_id],
+             'timeSeconds': '10'}
+            for number, phrase_id in enumerate(assigned_phrases(self.user.pk), start=1)
+        ]
+        with mock.patch('core.submissions.record_typing_test', side_effect=RuntimeError('falha')):
+            with self.assertRaises(RuntimeError):
+                save_typing_submission(self.user, payload)
+        self.assertFalse(TypingTest.objects.exists())
+        self.assertFalse(TypingTestPhase.objects.exists())
+        self.assertFalse(TestProgress.objects.get(user=self.user).typing_test_completed)
+        self.assertFalse(CandidateSummary.objects.filter(user=self.user, wpm_average__isnull=False).exists())
+
+    def test_behavioral_submission_rolls_back(self):
+        answers = normalized_answers([3] * len(QUESTION_IDS))
+        with mock.patch('core.submissions.record_behavioral_profile', side_effect=RuntimeError('falha')):
+            with self.assertRaises(RuntimeError):
+                save_behavioral_submission(self.user, answers)
+        self.assertFalse(BehavioralProfile.objects.exists())
+        self.assertFalse(TestProgress.objects.get(user=self.user).behavioral_test_completed)
+
+
+def naive_edit_distance(a, b):
+    """Levenshtein pela matriz completa de programação dinâmica"""
+    previous = list(range(len(b) + 1))
+    for i, x in enumerate(a, start=1):
+        current = [i]
+        for j, y in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (x != y)))
+        previous = current
+    return previous[-1]
+
+
+class TypingMetricsTests(SimpleTestCase):
+    """Distância de edição bit-paralela e métricas das fases"""
+
+    def test_edit_distance_matches_dynamic_programming(self):
+        rng = random.Random(4)
+        cases = [('', ''), ('', 'abc'), ('abc', ''), ('kitten', 'sitting'), ('ação', 'acao')]
+        for _ in range(300):
+            # Alfabeto pequeno para forçar coincidências; padrões acima de 64 símbolos
+            a = ''.join(rng.choice('abcdé ') for _ in range(rng.randint(0, 150)))
+            b = ''.join(rng.choice('abcdé ') for _ in range(rng.randint(0, 150)))
+            cases.append((a, b))
+        for a, b in cases:
+            with self.subTest(a=a, b=b):
+                self.assertEqual(edit_distance(a, b), naive_edit_distance(a, b))
+        words = (PHRASE_BANKS[1][1].split(), 'A tecnologia transforma forma como trabalhamos'.split())
+        self.assertEqual(edit_distance(*words), naive_edit_distance(*words))
+
+    def test_phase_metrics(self):
+        phrase = PHRASE_BANKS[1][1]
+        metrics = phase_metrics(phrase, phrase[:-1], 12)
+        self.assertEqual(metrics.edit_distance, 1)
+        self.assertEqual(metrics.accuracy, round((len(phrase) - 1) / len(phrase) * 100, 1))
+        self.assertEqual(metrics.wpm, round(len(phrase[:-1]) / 5 / (12 / 60), 1))
+        self.assertEqual(phase_metrics(phrase, '', 12).accuracy, 0.0)
+
+
+class KeystrokeEncodingTests(SimpleTestCase):
+    """Fluxo de teclas em vetores uint16, com e sem zlib"""
+
+    def test_round_trip(self):
+        rng = random.Random(5)
+        events = [(rng.randint(0, 255), rng.randint(0, 400)) for _ in range(300)]
+        for compress in (True, False):
+            with self.subTest(compress=compress):
+                stream = decode_keystrokes(encode_keystrokes(events, compress=compress))
+                self.assertEqual(list(stream), events)
+                self.assertEqual(stream.total_ms, sum(delta for _, delta in events))
+        # Fluxos repetitivos saem comprimidos e menores que os vetores puros
+        repetitive = [(65, 120)] * 500
+        self.assertLess(len(encode_keystrokes(repetitive)), len(encode_keystrokes(repetitive, compress=False)))
+        self.assertEqual(list(decode_keystrokes(encode_keystrokes([]))), [])
+        self.assertIsNone(decode_keystrokes(None))
+
+    def test_limits_and_errors(self):
+        stream = decode_keystrokes(encode_keystrokes([[70000, 90000]]))
+        self.assertEqual(list(stream), [(MAX_VALUE, MAX_VALUE)])
+        for events in ([(1, -1)], [('a', 1)], [(1, 1)] * (MAX_EVENTS + 1)):
+            with self.subTest(events=events[:1]), self.assertRaises(KeystrokeError):
+                encode_keystrokes(events)
+        with self.assertRaises(KeystrokeError):
+            decode_keystrokes(b'\x09\x00' + encode_keystrokes([(1, 1)])[2:])
+
+
+class ScoringTests(SimpleTestCase):
+    """A pontuação do servidor reproduz ``calculateScores()`` do navegador"""
+
+    def test_ties_go_to_the_last_quadrant(self):
+        # Todas as respostas iguais: os quatro quadrantes empatam e o reduce() fica com D
+        self.assertEqual(score_matrix([[3] * len(QUESTION_IDS)])[0].dominant, 'D')
+        vector = [5 if QUESTION_QUADRANTS[qid] in 'AB' else 1 for qid in QUESTION_IDS]
+        self.assertEqual(score_matrix([vector])[0][:5], (100, 100, 20, 20, 'B'))
+
+    def test_half_up_rounding(self):
+        # Math.round: .5 sempre para cima, ao contrário do round() do Python
+        for value, expected in ((0.5, 1), (2.5, 3), (84.5, 85), (84.49, 84)):
+            self.assertEqual(_round_half_up(value), expected)
+
+    @unittest.skipUnless(shutil.which('node'), "node não instalado")
+    def test_matches_calculate_scores_in_the_browser(self):
+        with open(os.path.join(settings.BASE_DIR, 'static', 'js', 'personalidade.js'), encoding='utf-8') as f:
+            source = re.search(r'^function calculateScores\(\) \{.*?^\}', f.read(), re.M | re.S).group(0)
+        rng = random.Random(6)
+        vectors = [[rng.randint(1, 5) for _ in QUESTION_IDS] for _ in range(200)]
+        vectors += [[value] * len(QUESTION_IDS) for value in range(1, 6)]
+        questions = [{'id': qid, 'quadrant': QUESTION_QUADRANTS[qid]} for qid in QUESTION_IDS]
+        script = (
+            f"const ALL_QUESTIONS = {json.dumps(questions)};\nlet answers;\n{source}\n"
+            f"console.log(JSON.stringify({json.dumps(vectors)}.map(row => {{"
+            f"answers = Object.fromEntries(ALL_QUESTIONS.map((q, i) => [q.id, row[i]])); return calculateScores(); }})));"
+        )
+        browser = json.loads(subprocess.run(['node', '-e', script], capture_output=True, text=True, check=True).stdout)
+        self.assertEqual([score._asdict() for score in score_matrix(vectors)], browser)
+
+
+class MatchingTests(TestCase):
+    """Índice de aderência: KD-tree igual à varredura completa e sincronização incremental"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(email=f'c{i}@example.com', username=f'candidato{i}', password='senha', vaga='Suporte')
+            for i in range(3)
+        ]
+        for i, user in enumerate(cls.users):
+            cls.submit(user, cut=i)
+            save_behavioral_submission(user, normalized_answers([(i + qid) % 5 + 1 for qid in QUESTION_IDS]))
+
+    @staticmethod
+    def submit(user, cut=0, seconds=10):
+        payload = [
+            {'phase': number, 'phraseId': phrase_id, 'phraseVersion': 1,
+             'typedText': PHRASE_BANKS[1][phrase_id][:len(PHRASE_BANKS[1][phrase_id]) - cut], 'timeSeconds': str(seconds)}
+            for number, phrase_id in enumerate(assigned_phrases(user.pk), start=1)
+        ]
+        return save_typing_submission(user, payload)
+
+    def brute_force(self, points, target, k):
+        return sorted((_squared_distance(point, target), pid) for pid, point in points.items())[:k]
+
+    def test_kd_tree_matches_brute_force(self):
+        rng = random.Random(7)
+        points = {pid: tuple(rng.random() for _ in MATCH_FEATURES) for pid in range(500)}
+        index = VagaIndex(points.items())
+        # Alterações que ficam no buffer e nas lápides
+        for pid in rng.sample(sorted(points), 60):
+            points[pid] = tuple(rng.random() for _ in MATCH_FEATURES)
+            index.upsert(pid, points[pid])
+        for pid in rng.sample(sorted(points), 30):
+            del points[pid]
+            index.remove(pid)
+        for _ in range(50):
+            target = tuple(rng.random() for _ in MATCH_FEATURES)
+            for k in (1, 10, 40):
+                heap = []
+                index.query(target, k, heap)
+                self.assertEqual(sorted((-d, pid) for d, pid in heap), self.brute_force(points, target, k))
+
+    def live_point(self, matcher, user_id):
+        return matcher.indexes['Suporte'].live_entries().get(user_id)
+
+    def test_sync_picks_up_updated_and_deleted_summaries(self):
+        user, removed = self.users[0], self.users[1].pk
+        slow = self.submit(user, seconds=60)
+        # O resumo do candidato é mais antigo que o watermark do índice
+        CandidateSummary.objects.filter(user=user).update(updated_at=timezone.now() - timedelta(hours=1))
+        matcher = CandidateMatcher(rebuild_seconds=3600)
+        matcher.sync()
+        self.assertEqual(self.live_point(matcher, user.pk)[4], slow.wpm_average / 100)
+
+        # Teste removido pelo admin: o resumo volta ao teste anterior
+        slow.delete()
+        matcher.sync()
+        summary = CandidateSummary.objects.get(user=user)
+        self.assertNotEqual(summary.wpm_average, slow.wpm_average)
+        self.assertEqual(self.live_point(matcher, user.pk)[4], summary.wpm_average / 100)
+
+        User.objects.get(pk=removed).delete()
+        matcher.sync()
+        self.assertIsNone(self.live_point(matcher, removed))
+        ideal = [getattr(summary, field) for field in MATCH_FEATURES]
+        self.assertEqual([pid for _, pid in matcher.top_k(ideal, vaga='Suporte', k=5)][0], user.pk)
+        self.assertNotIn(removed, [pid for _, pid in matcher.top_k(ideal, k=5)])
+
+
+class VagaStatisticsTests(TestCase):
+    """As estatísticas mantidas por diferenças coincidem com a reconstrução completa"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(email=f'c{i}@example.com', username=f'candidato{i}', password='senha', vaga=vaga)
+            for i, vaga in enumerate(['Suporte', 'Suporte', 'Dados', 'Suporte'])
+        ]
+        for i, user in enumerate(cls.users):
+            payload = [
+                {'phase': number, 'phraseId': phrase_id, 'phraseVersion': 1,
+                 'typedText': PHRASE_BANKS[1][phrase_id][:len(PHRASE_BANKS[1][phrase_id]) - i], 'timeSeconds': str(8 + i)}
+                for number, phrase_id in enumerate(assigned_phrases(user.pk), start=1)
+            ]
+            save_typing_submission(user, payload)
+            save_behavioral_submission(user, normalized_answers([(i + qid) % 5 + 1 for qid in QUESTION_IDS]))
+
+    def snapshot(self):
+        return {
+            (stat.vaga, stat.metric): (stat.count, round(stat.mean, 6), round(stat.m2, 6), bytes(stat.histogram))
+            for stat in VagaStatistic.objects.all()
+        }
+
+    def assertMatchesRebuild(self):
+        incremental = self.snapshot()
+        rebuild_vaga_statistics()
+        self.assertEqual(incremental, self.snapshot())
+
+    def test_incremental_updates_match_rebuild(self):
+        self.assertMatchesRebuild()
+        # Novo teste, troca de vaga, teste removido e candidato removido
+        save_behavioral_submission(self.users[0], normalized_answers([5] * len(QUESTION_IDS)))
+        self.users[1].vaga = 'Dados'
+        self.users[1].save()
+        TypingTest.objects.filter(user=self.users[2]).delete()
+        self.users[3].delete()
+        self.assertMatchesRebuild()
+
+    def test_removed_summary_leaves_statistics_once(self):
+        with mock.patch('core.summary.summary_rows', return_value=User.objects.none()):
+            refresh_candidate_summary(self.users[0].pk)
+        self.assertFalse(CandidateSummary.objects.filter(user=self.users[0]).exists())
+        self.assertEqual(VagaStatistic.objects.get(vaga='Suporte', metric='wpm').count, 2)
+        self.assertMatchesRebuild()
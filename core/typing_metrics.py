@@ -0,0 +1,93 @@
+"""Cálculo das métricas do teste de digitação no servidor.
+
+As métricas enviadas pelo navegador não são confiáveis, então WPM e acurácia
+são recalculados a partir de ``original_phrase``, ``typed_text`` e
+``time_seconds``. A acurácia usa a distância de edição (Levenshtein) calculada
+com o algoritmo bit-paralelo de Myers/Hyyrö: a coluna inteira da matriz de
+programação dinâmica cabe em um inteiro, e cada caractere do texto digitado
+custa um punhado de operações de bits em vez de O(m) células.
+"""
+from collections import namedtuple
+
+CHARS_PER_WORD = 5  # Convenção padrão de WPM: 5 caracteres por palavra
+
+PhaseMetrics = namedtuple('PhaseMetrics', ['wpm', 'accuracy', 'word_accuracy', 'edit_distance'])
+
+
+def _match_vectors(pattern):
+    """Máscara de posições de cada símbolo do padrão (Peq no artigo de Myers)"""
+    peq = {}
+    for i, symbol in enumerate(pattern):
+        peq[symbol] = peq.get(symbol, 0) | (1 << i)
+    return peq
+
+
+def edit_distance(a, b):
+    """Distância de Levenshtein entre duas sequências de símbolos hasheáveis.
+
+    Os inteiros de Python não têm limite de tamanho, então padrões maiores que
+    64 símbolos não precisam ser divididos em blocos.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    m = len(b)
+    if m == 0:
+        return len(a)
+
+    peq = _match_vectors(b)
+    full = (1 << m) - 1
+    last = 1 << (m - 1)
+    pv, mv, score = full, 0, m
+
+    for symbol in a:
+        eq = peq.get(symbol, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = ((ph << 1) | 1) & full
+        mh = (mh << 1) & full
+        pv = (mh | ~(xv | ph)) & full
+        mv = ph & xv
+    return score
+
+
+def _accuracy(original, typed):
+    """Percentual do original reproduzido corretamente, a partir da distância de edição"""
+    if not original:
+        return (100.0 if not typed else 0.0), len(typed)
+    distance = edit_distance(original, typed)
+    return max(0.0, (len(original) - distance) / len(original) * 100), distance
+
+
+def calculate_wpm(typed_text, time_seconds):
+    """WPM bruto, igual ao cálculo exibido em tempo real no navegador"""
+    minutes = time_seconds / 60
+    return (len(typed_text) / CHARS_PER_WORD) / minutes if minutes > 0 else 0.0
+
+
+def phase_metrics(original_phrase, typed_text, time_seconds):
+    """Calcula WPM e acurácia por caractere e por palavra de uma fase"""
+    accuracy, distance = _accuracy(original_phrase, typed_text)
+    word_accuracy, _ = _accuracy(original_phrase.split(), typed_text.split())
+    return PhaseMetrics(
+        wpm=round(calculate_wpm(typed_text, time_seconds), 1),
+        accuracy=round(accuracy, 1),
+        word_accuracy=round(word_accuracy, 1),
+        edit_distance=distance,
+    )
+
+
+def averages(phases):
+    """Médias de WPM e acurácia de uma lista de fases"""
+    count = len(phases)
+    if not count:
+        return 0.0, 0.0
+    return (
+        sum(phase.wpm for phase in phases) / count,
+        sum(phase.accuracy for phase in phases) / count,
+    )
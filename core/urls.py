@@ -7,7 +7,14 @@ urlpatterns = [
     path('teste-personalidade/', views.personalidade, name='personalidade'),
     path('dashboard/', views.dashboard, name='dashboard'),
     path('relatorios/', views.relatorios, name='relatorios'),
+    path('relatorios/exportar/', views.exportar_candidatos, name='exportar_candidatos'),
+    path('relatorios/aderencia/', views.aderencia, name='aderencia'),
+    path('relatorios/busca/', views.busca_candidatos, name='busca_candidatos'),
+    path('relatorios/desempenho/', views.desempenho, name='desempenho'),
+    path('relatorios/fila/', views.fila_submissoes, name='fila_submissoes'),
     path('candidato/<int:user_id>/', views.detalhes_candidato, name='detalhes_candidato'),
+    path('api/bancos/', views.bancos, name='bancos'),
     path('api/save-typing-test/', views.save_typing_test, name='save_typing_test'),
     path('api/save-behavioral-test/', views.save_behavioral_test, name='save_behavioral_test'),
+    path('api/submissoes/<str:receipt>/', views.status_submissao, name='status_submissao'),
 ]
\ No newline at end of file
@@ -0,0 +1,219 @@
+"""Estatísticas incrementais por vaga (contagem, média, variância e percentis).
+
+Para cada vaga e métrica guardamos a contagem, a média e o M2 de Welford, e um
+histograma de largura fixa. As métricas têm faixas limitadas (WPM, acurácia e
+scores 0–100), então o histograma funciona como um sketch de quantis exato na
+resolução do bucket, e o percentil de um candidato sai de uma soma acumulada
+sobre um número fixo de buckets, sem varrer os candidatos.
+
+A população de cada vaga é o resultado mais recente de cada candidato, ou seja,
+os valores do ``CandidateSummary``. Toda escrita no resumo aplica aqui a
+diferença (valor antigo sai, valor novo entra).
+"""
+from array import array
+from collections import namedtuple
+
+from django.db import transaction
+
+from .models import CandidateSummary, VagaStatistic
+
+Metric = namedtuple('Metric', ['field', 'low', 'high', 'step'])
+
+METRICS = {
+    'wpm': Metric('wpm_average', 0.0, 200.0, 0.5),
+    'accuracy': Metric('accuracy_average', 0.0, 100.0, 0.1),
+    'quadrant_a': Metric('quadrant_a_score', 0.0, 100.0, 1.0),
+    'quadrant_b': Metric('quadrant_b_score', 0.0, 100.0, 1.0),
+    'quadrant_c': Metric('quadrant_c_score', 0.0, 100.0, 1.0),
+    'quadrant_d': Metric('quadrant_d_score', 0.0, 100.0, 1.0),
+}
+SUMMARY_FIELDS = tuple(metric.field for metric in METRICS.values())
+
+
+def _vaga_key(vaga):
+    return vaga or ''
+
+
+def _buckets(metric):
+    return int(round((metric.high - metric.low) / metric.step)) + 1
+
+
+def _bucket(metric, value):
+    index = int((value - metric.low) / metric.step)
+    return min(max(index, 0), _buckets(metric) - 1)
+
+
+class Accumulator:
+    """Estado mutável de uma estatística; suporta inclusão e remoção de valores"""
+
+    def __init__(self, name, stat=None):
+        self.name = name
+        self.metric = METRICS[name]
+        self.count = stat.count if stat else 0
+        self.mean = stat.mean if stat else 0.0
+        self.m2 = stat.m2 if stat else 0.0
+        self.histogram = array('I')
+        if stat and stat.histogram:
+            self.histogram.frombytes(bytes(stat.histogram))
+        else:
+            self.histogram.extend([0] * _buckets(self.metric))
+
+    def add(self, value):
+        value = float(value)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.histogram[_bucket(self.metric, value)] += 1
+
+    def remove(self, value):
+        value = float(value)
+        if self.count <= 1:
+            self.count, self.mean, self.m2 = 0, 0.0, 0.0
+        else:
+            previous_mean = self.mean
+            self.count -= 1
+            self.mean = (previous_mean * (self.count + 1) - value) / self.count
+            self.m2 = max(0.0, self.m2 - (value - previous_mean) * (value - self.mean))
+        bucket = _bucket(self.metric, value)
+        if self.histogram[bucket]:
+            self.histogram[bucket] -= 1
+
+    def as_model(self, vaga):
+        return VagaStatistic(
+            vaga=vaga,
+            metric=self.name,
+            count=self.count,
+            mean=self.mean,
+            m2=self.m2,
+            histogram=self.histogram.tobytes(),
+        )
+
+
+def _save(accumulators):
+    VagaStatistic.objects.bulk_create(
+        [accumulator.as_model(vaga) for (vaga, _), accumulator in accumulators.items()],
+        update_conflicts=True,
+        unique_fields=['vaga', 'metric'],
+        update_fields=['count', 'mean', 'm2', 'histogram', 'updated_at'],
+    )
+
+
+def apply_changes(changes):
+    """Aplica mudanças ``[(vaga, métrica, valor_antigo, valor_novo), ...]``.
+
+    Deve rodar na mesma transação que alterou o ``CandidateSummary``.
+    """
+    changes = [
+        (_vaga_key(vaga), name, old, new)
+        for vaga, name, old, new in changes
+        if old != new
+    ]
+    if not changes:
+        return
+
+    keys = {(vaga, name) for vaga, name, _, _ in changes}
+    existing = VagaStatistic.objects.select_for_update().filter(
+        vaga__in={vaga for vaga, _ in keys},
+        metric__in={name for _, name in keys},
+    )
+    stats = {(stat.vaga, stat.metric): stat for stat in existing}
+    accumulators = {key: Accumulator(key[1], stats.get(key)) for key in keys}
+
+    for vaga, name, old, new in changes:
+        accumulator = accumulators[(vaga, name)]
+        if old is not None:
+            accumulator.remove(old)
+        if new is not None:
+            accumulator.add(new)
+    _save(accumulators)
+
+
+def summary_changes(old_row, new_row):
+    """Diferenças de estatística entre dois estados do resumo de um candidato.
+
+    Cada estado é um dict com ``vaga`` e os campos de ``SUMMARY_FIELDS``
+    (ou ``None`` quando o resumo não existe).
+    """
+    old_row = old_row or {}
+    new_row = new_row or {}
+    old_vaga, new_vaga = _vaga_key(old_row.get('vaga')), _vaga_key(new_row.get('vaga'))
+    changes = []
+    for name, metric in METRICS.items():
+        if metric.field not in new_row and new_row:
+            # Campo não alterado: mantém o valor antigo na vaga nova
+            new_value = old_row.get(metric.field)
+        else:
+            new_value = new_row.get(metric.field)
+        old_value = old_row.get(metric.field)
+        if old_vaga == new_vaga:
+            changes.append((new_vaga, name, old_value, new_value))
+        else:
+            changes.append((old_vaga, name, old_value, None))
+            changes.append((new_vaga, name, None, new_value))
+    return changes
+
+
+def rebuild_vaga_statistics():
+    """Recalcula todas as estatísticas a partir do ``CandidateSummary``"""
+    accumulators = {}
+    rows = CandidateSummary.objects.values_list('vaga', *SUMMARY_FIELDS)
+    for vaga, *values in rows.iterator(chunk_size=5000):
+        for name, value in zip(METRICS, values):
+            if value is None:
+                continue
+            key = (_vaga_key(vaga), name)
+            if key not in accumulators:
+                accumulators[key] = Accumulator(name)
+            accumulators[key].add(value)
+
+    with transaction.atomic():
+        VagaStatistic.objects.all().delete()
+        if accumulators:
+            _save(accumulators)
+    return len(accumulators)
+
+
+class PercentileTable:
+    """Percentis de uma ou mais vagas, carregados em uma única consulta.
+
+    As somas acumuladas de cada histograma são calculadas uma vez, então cada
+    consulta de percentil é O(1).
+    """
+
+    def __init__(self, vagas):
+        self.stats = {}
+        self._cumulative = {}
+        keys = {_vaga_key(vaga) for vaga in vagas}
+        for stat in VagaStatistic.objects.filter(vaga__in=keys):
+            self.stats[(stat.vaga, stat.metric)] = stat
+
+    def _cumulative_for(self, key):
+        if key not in self._cumulative:
+            histogram = array('I')
+            histogram.frombytes(bytes(self.stats[key].histogram))
+            cumulative, total = [], 0
+            for count in histogram:
+                cumulative.append(total)
+                total += count
+            self._cumulative[key] = (cumulative, histogram)
+        return self._cumulative[key]
+
+    def percentile(self, vaga, name, value):
+        """Percentual de candidatos da vaga abaixo de ``value`` (0–100)"""
+        key = (_vaga_key(vaga), name)
+        stat = self.stats.get(key)
+        if value is None or stat is None or not stat.count:
+            return None
+        cumulative, histogram = self._cumulative_for(key)
+        bucket = _bucket(METRICS[name], float(value))
+        # Metade do próprio bucket conta como abaixo (posição média entre empates)
+        below = cumulative[bucket] + histogram[bucket] / 2
+        return round(below / stat.count * 100)
+
+    def candidate_percentiles(self, summary):
+        """Percentis de todas as métricas de um ``CandidateSummary``"""
+        return {
+            name: self.percentile(summary.vaga, name, getattr(summary, metric.field))
+            for name, metric in METRICS.items()
+        }
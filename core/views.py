@@ -1,102 +1,133 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.conf import settings
-from django.http import JsonResponse
-from django.views.decorators.http import require_POST
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.middleware.gzip import re_accepts_gzip
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.text import compress_sequence
+from django.views.decorators.http import condition, require_POST
 from django.views.decorators.csrf import csrf_exempt
 from django.utils import timezone
+import logging
 import os
 import json
 from django.core.files.storage import FileSystemStorage
 from django.utils.text import get_valid_filename
-from .models import TypingTest, TypingTestPhase, BehavioralProfile, TestProgress
+from .banks import bank_document
+from .models import TypingTest, TypingTestPhase, BehavioralProfile, TestProgress, CandidateSummary
+from .submissions import save_typing_submission, save_behavioral_submission
+from .forms import CandidatoFiltroForm, AderenciaForm, BuscaCandidatosForm
+from .matching import candidate_matcher, FEATURES
+from .vaga_stats import PercentileTable
+from .pagination import paginate_keyset, InvalidCursor
+from .phrases import PHRASE_BANK_VERSION, assigned_phrases
+from .export import export_rows, stream_csv, stream_xlsx
+from .page_cache import acached_context, cached_context
+from .profiling import view_histograms
+from .progress import aremember_pending_progress, aremember_test_progress
+from .search import search_candidates
+from .submission_queue import enqueue_submission, journal, submission_status, worker_alive
+from users.access import has_role, has_role_decorator
 from users.models import Users as User
 
+logger = logging.getLogger(__name__)
+
+# As páginas dos testes e as APIs de salvamento são assíncronas: sob ASGI, a
+# requisição só ocupa uma thread durante o acesso ao banco e a renderização
+# (o cabeçalho consulta as permissões do usuário, o que é síncrono)
+arender = sync_to_async(render)
+
+
+async def _auth_user(request):
+    # Carrega o usuário de forma assíncrona e o reaproveita em request.user
+    # (usado pelos templates), evitando uma consulta síncrona
+    request.user = await request.auser()
+    return request.user
+
 @login_required(login_url='/auth/login')
-def index(request):
-    # Obter ou criar progresso do usuário
-    progress, created = TestProgress.objects.get_or_create(user=request.user)
-    
+async def index(request):
+    await _auth_user(request)
+    # Progresso carregado pelo TestProgressMiddleware (core.progress)
     context = {
-        'progress': progress,
+        'progress': await request.atest_progress(),
     }
-    return render(request, 'index.html', context)
+    return await arender(request, 'index.html', context)
 
 @login_required(login_url='/auth/login')
-def digitacao(request):
+async def digitacao(request):
+    await _auth_user(request)
     # Verificar se o usuário já completou o teste de digitação
-    progress, created = TestProgress.objects.get_or_create(user=request.user)
+    progress = await request.atest_progress()
     
     if progress.typing_test_completed:
-        return render(request, 'core/digitacao_completado.html', {
+        return await arender(request, 'core/digitacao_completado.html', {
             'progress': progress,
             'completed_at': progress.typing_test_completed_at
         })
     
-    return render(request, 'core/digitacao.html')
+    # As frases do candidato; os textos vêm do banco (api/bancos/), em cache no navegador
+    return await arender(request, 'core/digitacao.html', {
+        'frases': {'versao': PHRASE_BANK_VERSION, 'ids': assigned_phrases(request.user.pk)},
+    })
 
 @login_required(login_url='/auth/login')
-def personalidade(request):
+async def personalidade(request):
+    user = await _auth_user(request)
     # Verificar se o usuário completou o teste de digitação
-    progress, created = TestProgress.objects.get_or_create(user=request.user)
+    progress = await request.atest_progress()
     
     if progress.behavioral_test_completed:
-        print(f"DEBUG: Usuário {request.user.username} já  {progress.behavioral_test_completed_at} completou o teste de personalidade em {progress.behavioral_test_completed_at}")
-        return render(request, 'core/personalidade_completado.html', {
+        logger.debug('Usuário %s já completou o teste de personalidade em %s', user.username, progress.behavioral_test_completed_at)
+        return await arender(request, 'core/personalidade_completado.html', {
             'progress': progress,
             'completed_at': progress.behavioral_test_completed_at
         })
     
-    return render(request, 'core/personalidade.html')
+    return await arender(request, 'core/personalidade.html')
+
+@login_required(login_url='/auth/login')
+@condition(etag_func=lambda request: bank_document()[1])
+def bancos(request):
+    """Bancos de frases e questões; requisições condicionais com a ETag recebem 304"""
+    body, _ = bank_document()
+    response = HttpResponse(body, content_type='application/json; charset=utf-8')
+    # Revalida sempre, mas só baixa o documento de novo quando a versão muda
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _queued_response(receipt, message):
+    """Resposta das submissões aceitas pela fila (core.submission_queue)"""
+    return JsonResponse({
+        'status': 'success',
+        'message': message,
+        'receipt': receipt,
+        'status_url': reverse('status_submissao', args=[receipt]),
+    }, status=202)
+
 
 @login_required(login_url='/auth/login')
 @require_POST
-def save_typing_test(request):
+async def save_typing_test(request):
     """Salva os resultados do teste de digitação no banco de dados"""
+    user = await _auth_user(request)
     try:
         data = json.loads(request.body)
-        print(f"DEBUG: Dados recebidos: {data}")
-        
-        # Validar se data é uma lista
-        if not isinstance(data, list):
-            raise ValueError(f"Esperado lista de fases, recebido: {type(data)}")
-        
-        if len(data) != 3:
-            raise ValueError(f"Esperado 3 fases, recebidas: {len(data)}")
-        
-        # Calcular médias
-        wpm_values = [float(phase['wpm']) for phase in data]
-        accuracy_values = [float(phase['accuracy']) for phase in data]
-        wpm_average = sum(wpm_values) / len(wpm_values)
-        accuracy_average = sum(accuracy_values) / len(accuracy_values)
-        
-        # Criar teste de digitação
-        typing_test = TypingTest.objects.create(
-            user=request.user,
-            wpm_average=wpm_average,
-            accuracy_average=accuracy_average
-        )
-        
-        # Criar fases do teste
-        for phase_data in data:
-            TypingTestPhase.objects.create(
-                typing_test=typing_test,
-                phase_number=phase_data['phase'],
-                original_phrase=phase_data['originalPhrase'],
-                typed_text=phase_data['typedText'],
-                time_seconds=float(phase_data['timeSeconds']),
-                wpm=float(phase_data['wpm']),
-                accuracy=float(phase_data['accuracy'])
+        if settings.SUBMISSION_QUEUE_ENABLED:
+            receipt = await sync_to_async(enqueue_submission)('typing', user, data)
+            await aremember_pending_progress(
+                request, user, typing_test_completed=True, typing_test_completed_at=timezone.now(),
             )
-        
-        # Atualizar progresso do usuário
-        progress, created = TestProgress.objects.get_or_create(user=request.user)
-        progress.typing_test_completed = True
-        progress.typing_test_completed_at = timezone.now()
-        progress.save()
-        
-        print(f"DEBUG: Teste salvo com sucesso para usuário {request.user.username}")
-        
+            return _queued_response(receipt, 'Teste recebido')
+
+        # A submissão é uma transação, que o ORM assíncrono não suporta
+        typing_test = await sync_to_async(save_typing_submission)(user, data)
+        await aremember_test_progress(request, user)
+
+        logger.debug('Teste de digitação %s salvo para o usuário %s', typing_test.id, user.username)
+
         return JsonResponse({
             'status': 'success',
             'message': 'Teste salvo com sucesso',
@@ -104,16 +135,14 @@ def save_typing_test(request):
         })
     except json.JSONDecodeError as e:
         error_msg = f"Erro ao decodificar JSON: {str(e)}"
-        print(f"DEBUG: {error_msg}")
+        logger.warning('Teste de digitação com JSON inválido do usuário %s: %s', user.username, e)
         return JsonResponse({
             'status': 'error',
             'message': error_msg
         }, status=400)
     except Exception as e:
         error_msg = f"Erro ao salvar teste: {str(e)}"
-        print(f"DEBUG: {error_msg}")
-        import traceback
-        traceback.print_exc()
+        logger.exception('Erro ao salvar o teste de digitação do usuário %s', user.username)
         return JsonResponse({
             'status': 'error',
             'message': error_msg
@@ -121,34 +150,24 @@ def save_typing_test(request):
 
 @login_required(login_url='/auth/login')
 @require_POST
-def save_behavioral_test(request):
+async def save_behavioral_test(request):
     """Salva os resultados do teste de perfil comportamental"""
+    user = await _auth_user(request)
     try:
         data = json.loads(request.body)
-        scores = data.get('scores', {})
         answers = data.get('answers', [])
         
-        # Validar scores
-        if not all(key in scores for key in ['A', 'B', 'C', 'D', 'dominant']):
-            raise ValueError('Scores incompletos')
-        
-        # Criar perfil comportamental
-        behavioral_profile = BehavioralProfile.objects.create(
-            user=request.user,
-            quadrant_a_score=scores['A'],
-            quadrant_b_score=scores['B'],
-            quadrant_c_score=scores['C'],
-            quadrant_d_score=scores['D'],
-            dominant_quadrant=scores['dominant'],
-            answers=answers
-        )
-        
-        # Atualizar progresso do usuário
-        progress, created = TestProgress.objects.get_or_create(user=request.user)
-        progress.behavioral_test_completed = True
-        progress.behavioral_test_completed_at = timezone.now()
-        progress.save()
-        
+        # Os scores enviados pelo navegador são ignorados e recalculados no servidor
+        if settings.SUBMISSION_QUEUE_ENABLED:
+            receipt = await sync_to_async(enqueue_submission)('behavioral', user, answers)
+            await aremember_pending_progress(
+                request, user, behavioral_test_completed=True, behavioral_test_completed_at=timezone.now(),
+            )
+            return _queued_response(receipt, 'Perfil comportamental recebido')
+
+        behavioral_profile = await sync_to_async(save_behavioral_submission)(user, answers)
+        await aremember_test_progress(request, user)
+
         return JsonResponse({
             'status': 'success',
             'message': 'Perfil comportamental salvo com sucesso',
@@ -162,22 +181,32 @@ def save_behavioral_test(request):
 
 
 @login_required(login_url='/auth/login')
-def dashboard(request):
+async def dashboard(request):
     """Renderiza o dashboard do usuário com seus testes e perfis"""
-    typing_tests = TypingTest.objects.filter(user=request.user).order_by('-created_at')
-    behavioral_profiles = BehavioralProfile.objects.filter(user=request.user).order_by('-created_at')
-    progress, created = TestProgress.objects.get_or_create(user=request.user)
+    user = await _auth_user(request)
+    context = await acached_context('dashboard', user.pk, lambda: _dashboard_context(user))
+    context['progress'] = await request.atest_progress()
+    return await arender(request, 'core/dashboard.html', context)
+
+async def _dashboard_context(user):
+    typing_tests = [test async for test in TypingTest.objects.filter(user=user).order_by('-created_at')]
+    behavioral_profiles = [
+        profile async for profile in BehavioralProfile.objects.filter(user=user).order_by('-created_at')
+    ]
     
-    context = {
+    return {
         'typing_tests': typing_tests,
         'behavioral_profiles': behavioral_profiles,
-        'progress': progress,
     }
-    return render(request, 'core/dashboard.html', context)
 
 @login_required(login_url='/auth/login')
 def detalhes_candidato(request, user_id):
     """Renderiza a página de detalhes de um candidato específico"""
+    # O contexto fica em cache até o candidato ou seus testes mudarem (core.page_cache)
+    context = cached_context('detalhes_candidato', user_id, lambda: _detalhes_candidato_context(user_id))
+    return render(request, 'core/detalhes_candidato.html', context)
+
+def _detalhes_candidato_context(user_id):
     from django.shortcuts import get_object_or_404
     
     # Buscar o usuário pelo ID
@@ -189,7 +218,10 @@ def detalhes_candidato(request, user_id):
     # Buscar todas as fases do teste de digitação
     typing_phases = []
     if typing_test:
-        typing_phases = TypingTestPhase.objects.filter(typing_test=typing_test).order_by('phase_number')
+        # Fases arquivadas trazem o frame no mesmo SELECT; só é descomprimido se lido (core.archive)
+        typing_phases = list(
+            TypingTestPhase.objects.filter(typing_test=typing_test).select_related('archive').order_by('phase_number')
+        )
     
     # Buscar último perfil comportamental
     behavioral_profile = BehavioralProfile.objects.filter(user=candidato).order_by('-created_at').first()
@@ -197,54 +229,206 @@ def detalhes_candidato(request, user_id):
     # Buscar progresso
     progress = TestProgress.objects.filter(user=candidato).first()
     
+    # Percentis do candidato entre os candidatos da mesma vaga
+    resumo = CandidateSummary.objects.filter(user=candidato).first()
+    percentis = PercentileTable([candidato.vaga]).candidate_percentiles(resumo) if resumo else {}
+    
     # Calcular tempo total (soma das fases)
     tempo_total_segundos = sum([phase.time_seconds for phase in typing_phases]) if typing_phases else 0
     tempo_total_minutos = int(tempo_total_segundos // 60)
     tempo_total_segundos_resto = int(tempo_total_segundos % 60)
     tempo_total_formatado = f"{tempo_total_minutos:02d}:{tempo_total_segundos_resto:02d}"
     
-    context = {
+    return {
         'candidato': candidato,
         'typing_test': typing_test,
         'typing_phases': typing_phases,
         'behavioral_profile': behavioral_profile,
         'progress': progress,
         'tempo_total': tempo_total_formatado,
+        'percentis': percentis,
     }
-    
-    return render(request, 'core/detalhes_candidato.html', context)
 
 @login_required(login_url='/auth/login')
 def relatorios(request):
     """Renderiza a página de relatórios com dados dos candidatos"""
-    from django.db.models import Prefetch
-    
-    # Buscar todos os usuários que completaram testes
-    candidatos = User.objects.filter(
-        test_progress__typing_test_completed=True
-    ).select_related('test_progress').prefetch_related(
-        'typing_tests',
-        'behavioral_profiles'
-    ).order_by('-test_progress__typing_test_completed_at')
-    
-    # Preparar dados dos candidatos
-    candidatos_data = []
-    for user in candidatos:
-        # Pegar último teste de digitação
-        typing_test = user.typing_tests.order_by('-created_at').first()
-        # Pegar último perfil comportamental
-        behavioral_profile = user.behavioral_profiles.order_by('-created_at').first()
-        
-        if typing_test:  # Só incluir se tem teste de digitação
-            candidatos_data.append({
-                'user': user,
-                'typing_test': typing_test,
-                'behavioral_profile': behavioral_profile,
-                'progress': user.test_progress
-            })
-    
+    # O resumo desnormalizado já contém o último teste e perfil de cada candidato
+    candidatos = CandidateSummary.objects.filter(
+        typing_test_completed=True,
+        typing_test_created_at__isnull=False,
+    )
+
+    form = CandidatoFiltroForm(request.GET)
+    filtros = form
+    if not form.is_valid():
+        # Filtros inválidos: exibir os erros e listar sem filtro
+        filtros = CandidatoFiltroForm({})
+        filtros.is_valid()
+    candidatos = filtros.filter(candidatos)
+
+    try:
+        page = paginate_keyset(
+            candidatos,
+            filtros.sort_field,
+            descending=filtros.descending,
+            after=request.GET.get('apos') or None,
+            before=request.GET.get('antes') or None,
+            page_size=filtros.page_size,
+        )
+    except InvalidCursor:
+        page = paginate_keyset(candidatos, filtros.sort_field, descending=filtros.descending, page_size=filtros.page_size)
+
+    # Percentis de WPM e precisão dentro da vaga de cada candidato da página
+    percentis = PercentileTable({candidato.vaga for candidato in page})
+    for candidato in page:
+        candidato.percentis = percentis.candidate_percentiles(candidato)
+
     context = {
-        'candidatos': candidatos_data
+        'candidatos': page,
+        'page': page,
+        'form': form,
     }
-    
-    return render(request, 'core/listagem_candidatos.html', context)
\ No newline at end of file
+
+    return render(request, 'core/listagem_candidatos.html', context)
+
+
+@has_role_decorator('Full')
+def exportar_candidatos(request):
+    """Exporta os candidatos filtrados em CSV ou XLSX, sem carregar tudo em memória"""
+    candidatos = CandidateSummary.objects.filter(
+        typing_test_completed=True,
+        typing_test_created_at__isnull=False,
+    )
+
+    filtros = CandidatoFiltroForm(request.GET)
+    if not filtros.is_valid():
+        filtros = CandidatoFiltroForm({})
+        filtros.is_valid()
+    prefixo = '-' if filtros.descending else ''
+    candidatos = filtros.filter(candidatos).order_by(f'{prefixo}{filtros.sort_field}', f'{prefixo}pk')
+
+    rows = export_rows(candidatos)
+    data = timezone.localdate().isoformat()
+
+    if request.GET.get('formato') == 'xlsx':
+        response = StreamingHttpResponse(
+            stream_xlsx(rows),
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        )
+        response['Content-Disposition'] = f'attachment; filename="candidatos-{data}.xlsx"'
+        return response
+
+    conteudo = stream_csv(rows)
+    # O XLSX já é compactado; o CSV é comprimido durante o envio se o cliente aceitar
+    comprimir = re_accepts_gzip.search(request.headers.get('Accept-Encoding', ''))
+    if comprimir:
+        conteudo = compress_sequence(conteudo)
+    response = StreamingHttpResponse(conteudo, content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="candidatos-{data}.csv"'
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if comprimir:
+        response['Content-Encoding'] = 'gzip'
+    return response
+
+
+@has_role_decorator('Full')
+def aderencia(request):
+    """Ranqueia os candidatos mais próximos de um perfil ideal, por vaga"""
+    form = AderenciaForm(request.GET or None)
+    resultados = []
+
+    if form.is_valid():
+        vaga = form.cleaned_data['vaga'] or None
+        k = form.cleaned_data['k'] or 10
+        ranking = candidate_matcher.top_k(form.ideal, vaga=vaga, k=k)
+
+        resumos = CandidateSummary.objects.in_bulk([user_id for _, user_id in ranking], field_name='user_id')
+        max_distance = len(FEATURES) ** 0.5
+        for distance, user_id in ranking:
+            resumo = resumos.get(user_id)
+            if resumo is not None:
+                resultados.append({
+                    'candidato': resumo,
+                    'distancia': distance,
+                    'aderencia': max(0.0, 1 - distance / max_distance) * 100,
+                })
+
+        if request.GET.get('formato') == 'json':
+            return JsonResponse({
+                'vaga': vaga,
+                'resultados': [
+                    {
+                        'user_id': r['candidato'].user_id,
+                        'nome': r['candidato'].full_name,
+                        'vaga': r['candidato'].vaga,
+                        'distancia': round(r['distancia'], 4),
+                        'aderencia': round(r['aderencia'], 1),
+                    }
+                    for r in resultados
+                ],
+            })
+
+    return render(request, 'core/aderencia.html', {'form': form, 'resultados': resultados})
+
+
+@has_role_decorator('Full')
+def busca_candidatos(request):
+    """Busca textual de candidatos, ordenada por relevância"""
+    form = BuscaCandidatosForm(request.GET or None)
+    page = None
+
+    if form.is_valid() and form.cleaned_data['q']:
+        page = search_candidates(form.cleaned_data['q'], page=form.cleaned_data['pagina'] or 1)
+
+        if request.GET.get('formato') == 'json':
+            return JsonResponse({
+                'pagina': page.number,
+                'proxima': page.has_next,
+                'resultados': [
+                    {
+                        'user_id': user.pk,
+                        'nome': user.get_full_name(),
+                        'email': user.email,
+                        'vaga': user.vaga,
+                        'perfil': getattr(getattr(user, 'candidate_summary', None), 'dominant_quadrant', None),
+                    }
+                    for user in page
+                ],
+            })
+
+    return render(request, 'core/busca_candidatos.html', {'form': form, 'page': page})
+
+
+@has_role_decorator('Full')
+def desempenho(request):
+    """Histogramas de duração por view deste processo (janelas recentes)"""
+    return JsonResponse({
+        'sample_rate': settings.PROFILING_SAMPLE_RATE,
+        'slow_ms': settings.PROFILING_SLOW_MS,
+        'window_seconds': settings.PROFILING_WINDOW_SECONDS,
+        'windows': settings.PROFILING_WINDOWS,
+        'views': view_histograms.snapshot(),
+    })
+
+
+@login_required(login_url='/auth/login')
+def status_submissao(request, receipt):
+    """Situação de uma submissão enfileirada, para o próprio candidato ou para o RH"""
+    status = submission_status(receipt)
+    if status is None or (status['user_id'] != request.user.pk and not has_role(request.user, 'Full')):
+        return JsonResponse({'status': 'error', 'message': 'Submissão não encontrada'}, status=404)
+    del status['user_id']
+    return JsonResponse(status)
+
+
+@has_role_decorator('Full')
+def fila_submissoes(request):
+    """Profundidade e atraso de aplicação da fila de submissões"""
+    queue = journal()
+    return JsonResponse({
+        'enabled': settings.SUBMISSION_QUEUE_ENABLED,
+        'worker': settings.SUBMISSION_QUEUE_WORKER,
+        'worker_alive': worker_alive(),
+        'batch_size': settings.SUBMISSION_QUEUE_BATCH_SIZE,
+        **(queue.metrics() if queue is not None else {}),
+    })
@@ -46,20 +46,23 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Arquivos estáticos respondem aqui, antes de sessão, autenticação e perfil
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.middleware.ProfilingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.TestProgressMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
 ]
 
 ROOT_URLCONF = 'fitcultural.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.profiling.ProfiledDjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -78,14 +81,101 @@ WSGI_APPLICATION = 'fitcultural.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+# Ajustes do SQLite para vários workers gravando ao mesmo tempo (core.sqlite):
+# WAL permite leituras durante uma escrita, e BEGIN IMMEDIATE reserva o bloqueio
+# de escrita no início da transação, de modo que a espera usa o busy_timeout em
+# vez de falhar com "database is locked" ao promover uma leitura para escrita.
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))
+SQLITE_PRAGMAS = {
+    'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'wal'),
+    'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'normal'),
+    'busy_timeout': SQLITE_BUSY_TIMEOUT_MS,
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 128 * 1024 * 1024)),
+    # Valor negativo: tamanho em KiB
+    'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', -20000)),
+}
+# Novas tentativas de obter o bloqueio após o busy_timeout, e limite (ms) acima
+# do qual a espera é registrada no log
+SQLITE_LOCK_RETRIES = int(os.getenv('SQLITE_LOCK_RETRIES', 3))
+SQLITE_SLOW_LOCK_MS = int(os.getenv('SQLITE_SLOW_LOCK_MS', 200))
+
+# Perfil das requisições (core/profiling.py): fração perfilada por completo,
+# limite (ms) acima do qual a requisição é registrada no log, e as janelas
+# rotativas dos histogramas por view
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', 0.1))
+PROFILING_SLOW_MS = int(os.getenv('PROFILING_SLOW_MS', 500))
+PROFILING_WINDOW_SECONDS = int(os.getenv('PROFILING_WINDOW_SECONDS', 300))
+PROFILING_WINDOWS = int(os.getenv('PROFILING_WINDOWS', 12))
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': SQLITE_BUSY_TIMEOUT_MS / 1000,
+            'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+        },
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+#
+# "paginas" guarda o contexto das páginas por candidato (core.page_cache). O
+# padrão é um LRU limitado em memória do processo; com vários workers, use um
+# backend compartilhado (ex.: PAGE_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# e PAGE_CACHE_LOCATION=redis://127.0.0.1:6379) para que a invalidação valha para todos.
+#
+# WEB_CONCURRENCY é o número de processos web (o padrão de --workers do
+# gunicorn e do uvicorn); acima de 1, o check core.W002 avisa se o
+# "paginas" continuar em memória.
+
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', 1))
+
+PAGE_CACHE_BACKEND = os.getenv('PAGE_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'paginas': {
+        'BACKEND': PAGE_CACHE_BACKEND,
+        'LOCATION': os.getenv('PAGE_CACHE_LOCATION', 'paginas'),
+        'TIMEOUT': int(os.getenv('PAGE_CACHE_TIMEOUT', 600)),
+        'KEY_PREFIX': 'fitcultural',
+        # O LocMemCache descarta as entradas menos usadas ao atingir o limite
+        'OPTIONS': (
+            {'MAX_ENTRIES': int(os.getenv('PAGE_CACHE_MAX_ENTRIES', 2000))}
+            if PAGE_CACHE_BACKEND.endswith('LocMemCache') else {}
+        ),
+    },
+    # Papéis e permissões por usuário (users/access.py); como o "paginas", deve
+    # ser compartilhado entre os workers para que a invalidação valha para todos
+    'acessos': {
+        'BACKEND': os.getenv('ACCESS_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('ACCESS_CACHE_LOCATION', 'acessos'),
+        'TIMEOUT': int(os.getenv('ACCESS_CACHE_TIMEOUT', 300)),
+        'KEY_PREFIX': 'fitcultural',
+    },
+}
+
+
+# Sessões (core.sessions): LRU do processo sobre a tabela django_session.
+# Com vários workers, um logout chega aos demais em até SESSION_LRU_TTL segundos.
+
+SESSION_ENGINE = 'core.sessions'
+SESSION_LRU_MAX_ENTRIES = int(os.getenv('SESSION_LRU_MAX_ENTRIES', 10000))
+SESSION_LRU_TTL = int(os.getenv('SESSION_LRU_TTL', 30))
+# Intervalo mínimo entre dois UPDATEs só de expire_date da mesma sessão
+SESSION_EXPIRY_REFRESH_SECONDS = int(os.getenv('SESSION_EXPIRY_REFRESH_SECONDS', 3600))
+# Sessões vencidas apagadas por DELETE em clearsessions/purge_sessions
+SESSION_PURGE_BATCH_SIZE = int(os.getenv('SESSION_PURGE_BATCH_SIZE', 1000))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -124,6 +214,19 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# O collectstatic minifica o JS e o CSS, põe o hash do conteúdo no nome e grava
+# as versões .gz e .br (core.assets). O WhiteNoise serve os arquivos com hash
+# com Cache-Control immutable; os originais sem hash não vão para STATIC_ROOT
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'core.assets.StaticBuildStorage',
+    },
+}
+WHITENOISE_KEEP_ONLY_HASHED_FILES = True
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'mediafiles')
 
@@ -138,5 +241,31 @@ AUTH_USER_MODEL = 'users.Users'
 # Role Permissions settings
 ROLEPERMISSIONS_MODULE = 'fitcultural.roles'
 
+# Intervalo (segundos) entre reconstruções completas do índice de aderência
+MATCH_INDEX_REBUILD_SECONDS = int(os.getenv('MATCH_INDEX_REBUILD_SECONDS', 900))
+
+# Idade (dias) a partir da qual archive_cold_data comprime frases e textos digitados
+ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', 365))
+
+# Fila de submissões (core.submission_queue): com ela ligada, os endpoints de
+# salvamento validam, gravam a submissão em um diário SQLite separado e
+# respondem 202 com um recibo; a gravação no banco acontece em lotes.
+# SUBMISSION_QUEUE_WORKER: 'thread' drena em uma thread de cada processo web;
+# 'external' deixa a drenagem para o comando drain_submissions. Nesse caso a
+# invalidação das páginas acontece no processo do comando, então o cache
+# "paginas" precisa ser compartilhado (PAGE_CACHE_BACKEND; check core.E003).
+SUBMISSION_QUEUE_ENABLED = os.getenv('SUBMISSION_QUEUE_ENABLED', '0') == '1'
+SUBMISSION_QUEUE_PATH = os.getenv('SUBMISSION_QUEUE_PATH', str(BASE_DIR / 'submissions.sqlite3'))
+SUBMISSION_QUEUE_WORKER = os.getenv('SUBMISSION_QUEUE_WORKER', 'thread')
+# Submissões gravadas por transação, e espera (ms) após a primeira para juntar um lote
+SUBMISSION_QUEUE_BATCH_SIZE = int(os.getenv('SUBMISSION_QUEUE_BATCH_SIZE', 50))
+SUBMISSION_QUEUE_LINGER_MS = int(os.getenv('SUBMISSION_QUEUE_LINGER_MS', 50))
+# Intervalo (segundos) entre verificações da fila quando não há aviso de entrada
+SUBMISSION_QUEUE_POLL_SECONDS = float(os.getenv('SUBMISSION_QUEUE_POLL_SECONDS', 1))
+# Entradas em processamento há mais que isso (segundos) voltam para a fila
+SUBMISSION_QUEUE_CLAIM_TIMEOUT = int(os.getenv('SUBMISSION_QUEUE_CLAIM_TIMEOUT', 300))
+# Dias que as entradas aplicadas ficam no diário (o recibo segue em AppliedSubmission)
+SUBMISSION_QUEUE_RETENTION_DAYS = int(os.getenv('SUBMISSION_QUEUE_RETENTION_DAYS', 7))
+
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/auth/login/'
\ No newline at end of file
@@ -0,0 +1,18 @@
+// Filtro de usuário com autocomplete no admin: ao escolher (ou limpar) um
+// usuário, recarrega o changelist com o parâmetro do filtro
+'use strict';
+{
+    const $ = django.jQuery;
+
+    $(document).on('change', 'select.admin-autocomplete-filter', function() {
+        const url = new URL(window.location.href);
+        const param = this.dataset.filterParam;
+        for (const name of [param, 'p', 'apos', 'antes']) {
+            url.searchParams.delete(name);
+        }
+        if (this.value) {
+            url.searchParams.set(param, this.value);
+        }
+        window.location.href = url.toString();
+    });
+}
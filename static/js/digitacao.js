@@ -1,14 +1,14 @@
-// Dados do teste
-const phrases = [
-    "A tecnologia transforma a forma como trabalhamos todos os dias.",
-    "A análise de dados é essencial para decisões estratégicas.",
-    "Velocidade e precisão são fundamentais em ambientes corporativos."
-];
+// Dados do teste: as frases do candidato vêm do banco do servidor (loadPhrases)
+let phrases = [];
+let phraseIds = [];
+let phraseVersion = null;
 
 let currentPhase = 0;
 let startTime = null;
 let results = [];
 let timerInterval = null;
+let keystrokes = [];
+let lastKeyTime = null;
 
 // Elementos DOM
 let welcomeScreen;
@@ -48,6 +48,38 @@ function init() {
 
     // Configurar event listeners
     setupEventListeners();
+    loadPhrases();
+}
+
+/**
+ * Carrega os textos das frases atribuídas ao candidato.
+ * O banco fica no cache do navegador e é revalidado pela ETag: enquanto a
+ * versão não muda, o servidor responde 304 sem reenviar o documento.
+ */
+async function loadPhrases() {
+    const assigned = JSON.parse(document.getElementById('frases-candidato').textContent);
+    try {
+        const response = await fetch(document.querySelector('[data-bancos-url]').dataset.bancosUrl, {
+            credentials: 'same-origin'
+        });
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        const bank = await response.json();
+        if (bank.frases.versao !== assigned.versao) {
+            // O banco mudou depois que a página foi gerada
+            window.location.reload();
+            return;
+        }
+        const texts = new Map(bank.frases.itens.map(item => [item.id, item.texto]));
+        phraseIds = assigned.ids;
+        phraseVersion = assigned.versao;
+        phrases = phraseIds.map(id => texts.get(id));
+        startBtn.disabled = false;
+    } catch (error) {
+        console.error('Erro ao carregar as frases:', error);
+        alert('Não foi possível carregar o teste. Recarregue a página.');
+    }
 }
 
 /**
@@ -63,6 +95,9 @@ function setupEventListeners() {
     inputText.addEventListener('paste', (e) => e.preventDefault());
     inputText.addEventListener('cut', (e) => e.preventDefault());
 
+    // Registrar teclas: [código, ms desde a tecla anterior]
+    inputText.addEventListener('keydown', recordKeystroke);
+
     // Digitação
     inputText.addEventListener('input', () => {
         if (!startTime) {
@@ -98,10 +133,22 @@ function showPhase(phaseIndex) {
     inputText.focus();
     finishPhaseBtn.disabled = true;
     startTime = null;
+    keystrokes = [];
+    lastKeyTime = null;
     clearInterval(timerInterval);
     updateMetrics();
 }
 
+/**
+ * Registra uma tecla pressionada com o intervalo desde a anterior
+ */
+function recordKeystroke(event) {
+    const now = performance.now();
+    const delta = lastKeyTime === null ? 0 : Math.round(now - lastKeyTime);
+    lastKeyTime = now;
+    keystrokes.push([event.keyCode || 0, delta]);
+}
+
 /**
  * Finaliza a fase atual e passa para a próxima
  */
@@ -115,11 +162,14 @@ function finishPhase() {
 
     results.push({
         phase: currentPhase + 1,
+        phraseId: phraseIds[currentPhase],
+        phraseVersion: phraseVersion,
         originalPhrase: originalText,
         typedText: typedText,
         timeSeconds: timeSeconds.toFixed(1),
         wpm: wpm.toFixed(1),
-        accuracy: accuracy.toFixed(1)
+        accuracy: accuracy.toFixed(1),
+        keystrokes: keystrokes
     });
 
     clearInterval(timerInterval);
@@ -4,146 +4,8 @@
  * 25 questões - 5 para cada quadrante
  */
 
-const QUESTIONS = [
-    // Quadrante A - Pensador Analítico (Lógico)
-    {
-        id: 1,
-        quadrant: 'A',
-        text: 'Eu prefiro analisar os dados antes de tomar decisões'
-    },
-    {
-        id: 2,
-        quadrant: 'A',
-        text: 'Gosto de entender o "por quê" das coisas em profundidade'
-    },
-    {
-        id: 3,
-        quadrant: 'A',
-        text: 'Sou uma pessoa que segue a lógica e a razão'
-    },
-    {
-        id: 4,
-        quadrant: 'A',
-        text: 'Prefiro precisão e fatos ao invés de opiniões'
-    },
-    {
-        id: 5,
-        quadrant: 'A',
-        text: 'Gosto de resolver problemas complexos de forma metódica'
-    },
-    
-    // Quadrante B - Pensador Prático (Administrativo)
-    {
-        id: 6,
-        quadrant: 'B',
-        text: 'Eu sou organizado e gosto de seguir procedimentos estabelecidos'
-    },
-    {
-        id: 7,
-        quadrant: 'B',
-        text: 'Prefiro planejar e executar tarefas de forma estruturada'
-    },
-    {
-        id: 8,
-        quadrant: 'B',
-        text: 'Gosto de resultados práticos e mensuráveis'
-    },
-    {
-        id: 9,
-        quadrant: 'B',
-        text: 'Sou confiável e cumpro com as responsabilidades assumidas'
-    },
-    {
-        id: 10,
-        quadrant: 'B',
-        text: 'Prefiro trabalhar dentro de regras e regulamentações claras'
-    },
-    
-    // Quadrante C - Pensador Relacional (Interpessoal)
-    {
-        id: 11,
-        quadrant: 'C',
-        text: 'Eu valoro o trabalho em equipe e a colaboração'
-    },
-    {
-        id: 12,
-        quadrant: 'C',
-        text: 'Gosto de ouvir e compreender os sentimentos das pessoas'
-    },
-    {
-        id: 13,
-        quadrant: 'C',
-        text: 'Sou empático e me importo com o bem-estar dos outros'
-    },
-    {
-        id: 14,
-        quadrant: 'C',
-        text: 'Prefiro ambientes harmoniosos e cooperativos'
-    },
-    {
-        id: 15,
-        quadrant: 'C',
-        text: 'Gosto de construir relacionamentos sólidos e duradouros'
-    },
-    
-    // Quadrante D - Pensador Inovador (Criativo)
-    {
-        id: 16,
-        quadrant: 'D',
-        text: 'Eu sou criativo e gosto de explorar novas ideias'
-    },
-    {
-        id: 17,
-        quadrant: 'D',
-        text: 'Prefiro desafiar o status quo e propor mudanças'
-    },
-    {
-        id: 18,
-        quadrant: 'D',
-        text: 'Gosto de trabalhar em projetos inovadores e estimulantes'
-    },
-    {
-        id: 19,
-        quadrant: 'D',
-        text: 'Sou entusiasta com novas possibilidades e oportunidades'
-    },
-    {
-        id: 20,
-        quadrant: 'D',
-        text: 'Prefiro experimentar e aprender com a prática'
-    }
-];
-
-// Adicionar 5 perguntas misturadas para melhor distribuição
-const ADDITIONAL_QUESTIONS = [
-    {
-        id: 21,
-        quadrant: 'A',
-        text: 'Gosto de questionar e analisar criticamente as informações'
-    },
-    {
-        id: 22,
-        quadrant: 'B',
-        text: 'Sou eficiente na execução de tarefas e cumpro prazos'
-    },
-    {
-        id: 23,
-        quadrant: 'C',
-        text: 'Eu sou alguém que inspira confiança nos outros'
-    },
-    {
-        id: 24,
-        quadrant: 'D',
-        text: 'Gosto de aprender coisas novas e explorar diferentes abordagens'
-    },
-    {
-        id: 25,
-        quadrant: 'A',
-        text: 'Prefiro ter informações completas antes de agir'
-    }
-];
-
-const ALL_QUESTIONS = [...QUESTIONS, ...ADDITIONAL_QUESTIONS];
+// Questões do banco do servidor (loadQuestions), na ordem de exibição
+let ALL_QUESTIONS = [];
 
 const QUADRANT_INFO = {
     A: {
@@ -213,11 +75,39 @@ function init() {
     submitBtn.addEventListener('click', submitTest);
     backBtn.addEventListener('click', () => window.history.back());
 
-    // Inicializar respostas
-    answers = {};
-    ALL_QUESTIONS.forEach(q => {
-        answers[q.id] = null;
-    });
+    loadQuestions();
+}
+
+/**
+ * Carrega o banco de questões do servidor e inicializa as respostas.
+ * O navegador revalida o banco pela ETag e só o baixa de novo quando a
+ * versão muda.
+ */
+async function loadQuestions() {
+    try {
+        const response = await fetch(document.querySelector('[data-bancos-url]').dataset.bancosUrl, {
+            credentials: 'same-origin'
+        });
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        const bank = await response.json();
+        ALL_QUESTIONS = bank.questoes.itens.map(item => ({
+            id: item.id,
+            quadrant: item.quadrante,
+            text: item.texto
+        }));
+
+        // Inicializar respostas
+        answers = {};
+        ALL_QUESTIONS.forEach(q => {
+            answers[q.id] = null;
+        });
+        startBtn.disabled = false;
+    } catch (error) {
+        console.error('Erro ao carregar as questões:', error);
+        alert('Não foi possível carregar o teste. Recarregue a página.');
+    }
 }
 
 /**
@@ -0,0 +1,99 @@
+"""Papéis e permissões do ``rolepermissions`` com cache por usuário.
+
+As verificações do ``rolepermissions`` (decorators e o filtro ``can`` do
+cabeçalho) consultam os grupos e as permissões do usuário a cada chamada.
+Aqui o conjunto de papéis e permissões (definidos em ``fitcultural/roles.py``)
+é calculado uma vez e guardado no cache ``acessos``; com o cache quente, uma
+verificação não faz consultas. A entrada é descartada quando os grupos ou as
+permissões do usuário mudam (``clear_roles``/``assign_role``) ou quando o
+usuário é removido (ver ``users/signals.py``).
+"""
+import inspect
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rolepermissions.decorators import _role_permission_checker
+from rolepermissions.permissions import available_perm_names
+from rolepermissions.roles import get_user_roles
+
+ACCESS_CACHE_ALIAS = 'acessos'
+
+
+def _cache():
+    return caches[ACCESS_CACHE_ALIAS]
+
+
+def _key(user_id):
+    return f'acesso:{user_id}'
+
+
+def load_access(user):
+    """Calcula os papéis e permissões do usuário pelo ``rolepermissions``"""
+    return {
+        'roles': frozenset(role.get_name() for role in get_user_roles(user)),
+        'permissions': frozenset(available_perm_names(user)),
+    }
+
+
+def user_access(user):
+    """Papéis e permissões do usuário, do cache (ou calculados e guardados)"""
+    access = getattr(user, '_access', None)
+    if access is None:
+        cache = _cache()
+        access = cache.get(_key(user.pk))
+        if access is None:
+            access = load_access(user)
+            cache.set(_key(user.pk), access)
+        # Memoriza no objeto para as demais verificações da requisição
+        user._access = access
+    return access
+
+
+def invalidate_user_access(user_id):
+    """Descarta o cache do usuário agora e de novo após o commit.
+
+    A segunda remoção cobre uma requisição concorrente que tenha lido os
+    papéis antigos antes do commit e os gravado no cache.
+    """
+    cache = _cache()
+    cache.delete(_key(user_id))
+    transaction.on_commit(lambda: cache.delete(_key(user_id)))
+
+
+def invalidate_all_access():
+    _cache().clear()
+
+
+def _superpowers(user):
+    # Mesma regra do rolepermissions: superusuários passam em todas as verificações
+    return bool(user and user.is_superuser and getattr(settings, 'ROLEPERMISSIONS_SUPERUSER_SUPERPOWERS', True))
+
+
+def has_role(user, roles):
+    """Equivalente a ``rolepermissions.checkers.has_role``, pelo cache"""
+    if _superpowers(user):
+        return True
+    if not user or not user.is_authenticated:
+        return False
+    if not isinstance(roles, list):
+        roles = [roles]
+    names = {role.get_name() if inspect.isclass(role) else role for role in roles}
+    return not names.isdisjoint(user_access(user)['roles'])
+
+
+def has_permission(user, permission_name):
+    """Equivalente a ``rolepermissions.checkers.has_permission``, pelo cache"""
+    if _superpowers(user):
+        return True
+    if not user or not user.is_authenticated:
+        return False
+    return permission_name in user_access(user)['permissions']
+
+
+def has_role_decorator(role, redirect_to_login=None, redirect_url=None):
+    return _role_permission_checker(has_role, role, redirect_to_login, redirect_url)
+
+
+def has_permission_decorator(permission_name, redirect_to_login=None, redirect_url=None):
+    return _role_permission_checker(has_permission, permission_name, redirect_to_login, redirect_url)
@@ -1,7 +1,9 @@
 from django.contrib import admin
+from django.db.models import Q
 from .models import Users
 from .forms import UserCreationForm, UserChangeForm
 from django.contrib.auth import admin as auth_admin
+from core.search import matching_user_ids
 
 @admin.register(Users)
 class UsersAdmin(auth_admin.UserAdmin):
@@ -21,4 +23,12 @@ class UsersAdmin(auth_admin.UserAdmin):
         ),
     )
     search_fields = ('username', 'email')
-    ordering = ('username',)
\ No newline at end of file
+    ordering = ('username',)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Índice FTS5 (nome, e-mail, vaga) em vez de LIKE '%termo%'; o username,
+        # fora do índice, continua encontrado pelo início
+        user_ids = matching_user_ids(search_term)
+        if user_ids is None:
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(Q(pk__in=user_ids) | Q(username__istartswith=search_term.strip())), False
\ No newline at end of file
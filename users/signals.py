@@ -0,0 +1,34 @@
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .access import invalidate_all_access, invalidate_user_access
+from .models import Users
+
+
+@receiver(m2m_changed, sender=Users.groups.through)
+@receiver(m2m_changed, sender=Users.user_permissions.through)
+def invalidate_access_on_role_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """``assign_role``/``clear_roles`` alteram os grupos e as permissões do usuário"""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        invalidate_user_access(instance.pk)
+    elif pk_set is None:
+        # Ex.: group.user_set.clear() não informa os usuários afetados
+        invalidate_all_access()
+    else:
+        for user_id in pk_set:
+            invalidate_user_access(user_id)
+
+
+@receiver(post_delete, sender=Users)
+def invalidate_access_on_delete(sender, instance, **kwargs):
+    invalidate_user_access(instance.pk)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_access_on_group_change(sender, instance, **kwargs):
+    # Os papéis vêm do nome do grupo; renomear ou remover afeta todos os membros
+    invalidate_all_access()
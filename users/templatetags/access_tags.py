@@ -0,0 +1,15 @@
+from django import template
+
+from users.access import has_permission, has_role
+
+register = template.Library()
+
+
+@register.filter(name='has_role')
+def has_role_filter(user, role):
+    return has_role(user, role.split(','))
+
+
+@register.filter(name='can')
+def can_filter(user, permission_name):
+    return has_permission(user, permission_name)
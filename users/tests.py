@@ -1,3 +1,62 @@
 from django.test import TestCase
+from django.urls import reverse
+from rolepermissions.roles import assign_role, clear_roles
 
-# Create your tests here.
+from .access import has_permission, has_role, invalidate_all_access
+from .forms import UserChangeForm
+from .models import Users
+
+
+class CachedAccessTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.recruiter = Users.objects.create_user(
+            email='recrutador@example.com', username='recrutador', perfil='full', password='senha',
+        )
+        assign_role(cls.recruiter, 'Full')
+
+    def setUp(self):
+        invalidate_all_access()
+
+    def fresh_user(self):
+        # Um objeto novo a cada requisição, como o AuthenticationMiddleware
+        return Users.objects.get(pk=self.recruiter.pk)
+
+    def test_warm_cache_checks_cost_no_queries(self):
+        self.assertTrue(has_permission(self.fresh_user(), 'manage_users'))
+        user = self.fresh_user()
+        with self.assertNumQueries(0):
+            self.assertTrue(has_permission(user, 'manage_users'))
+            self.assertTrue(has_permission(user, 'delete_content'))
+            self.assertTrue(has_role(user, 'Full'))
+            self.assertFalse(has_role(user, 'Basic'))
+
+    def test_clear_roles_invalidates(self):
+        self.assertTrue(has_role(self.fresh_user(), 'Full'))
+        clear_roles(self.fresh_user())
+        user = self.fresh_user()
+        self.assertFalse(has_role(user, 'Full'))
+        self.assertFalse(has_permission(user, 'manage_users'))
+
+    def test_change_form_invalidates(self):
+        self.assertTrue(has_permission(self.fresh_user(), 'manage_users'))
+        form = UserChangeForm(
+            {'first_name': 'Ana', 'last_name': 'Souza', 'email': 'recrutador@example.com', 'perfil': 'basic'},
+            instance=self.fresh_user(),
+        )
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save()
+        user = self.fresh_user()
+        self.assertTrue(has_role(user, 'Basic'))
+        self.assertFalse(has_permission(user, 'manage_users'))
+        self.assertTrue(has_permission(user, 'view_content'))
+
+    def test_protected_view_on_warm_cache(self):
+        self.client.force_login(self.recruiter)
+        url = reverse('list_users')
+        self.client.get(url)
+        # Usuário e a listagem; a sessão vem do LRU de core.sessions e o
+        # decorator e o cabeçalho usam o cache
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
@@ -11,7 +11,7 @@
 from django.shortcuts import render
 from .forms import UserCreationForm, UserChangeForm, CustomAuthenticationForm, CustomPasswordResetForm
 from .models import Users
-from rolepermissions.decorators import has_role_decorator, has_permission_decorator
+from .access import has_role_decorator, has_permission_decorator
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 from django.db import IntegrityError